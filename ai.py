@@ -0,0 +1,259 @@
+# 배치 탐색 AI
+# 현재 조각이 도달할 수 있는 모든 최종 배치(회전 x 열)를 나열하고 보드 휴리스틱으로 평가한다.
+# 보드는 행 비트마스크 튜플로 다루며, 평가 결과는 크기가 제한된 LRU 전치 테이블에 저장한다.
+from collections import OrderedDict
+
+from engine import ACTION_NONE, ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_HARD_DROP
+from pieces import PIECE_MASKS, PIECE_SIZES, PIECE_BOTTOMS, KICKS, ROTATION_COUNT
+
+# 휴리스틱 가중치 (총 높이, 지운 줄, 구멍, 울퉁불퉁함)
+DEFAULT_WEIGHTS = {
+    'height': -0.510066,
+    'lines': 0.760666,
+    'holes': -0.35663,
+    'bumpiness': -0.184483,
+}
+
+GAME_OVER_VALUE = float('-inf')
+
+
+def board_rows(board):
+    # 보드 백엔드에서 행 비트마스크 튜플 얻기
+    if hasattr(board, 'rows'):
+        return tuple(board.rows)
+    return tuple(sum(1 << x for x, cell in enumerate(row) if cell) for row in board.grid)
+
+
+def fits(rows, masks, x, y, width):
+    # 행 비트마스크 튜플 위에서 조각이 놓일 수 있는지 확인 (BitBoard.collides와 같은 규칙)
+    # 벽 차기로 보드 위쪽(y < 0)에 걸친 줄은 좌우 벽만 확인
+    if x < 0 or y + len(masks) > len(rows):
+        return False
+    full_mask = (1 << width) - 1
+    for mask in masks:
+        shifted = mask << x
+        if shifted > full_mask or (y >= 0 and rows[y] & shifted):
+            return False
+        y += 1
+    return True
+
+
+def drop_y(rows, masks, x, y, width):
+    # 조각을 바닥까지 떨어뜨렸을 때의 y 좌표
+    while fits(rows, masks, x, y + 1, width):
+        y += 1
+    return y
+
+
+def column_tops(rows, width):
+    # 열별 맨 위 블록의 행 번호 (빈 열은 보드 높이)
+    tops = [len(rows)] * width
+    full_mask = (1 << width) - 1
+    seen = 0
+    for y, row in enumerate(rows):
+        new = row & ~seen
+        while new:
+            low = new & -new
+            tops[low.bit_length() - 1] = y
+            new ^= low
+        seen |= row
+        if seen == full_mask:
+            break
+    return tops
+
+
+def place(rows, masks, x, y, width):
+    # 조각을 고정하고 가득 찬 줄을 지운 새 보드와 지운 줄 수를 반환 (보드 밖의 칸은 무시)
+    full_mask = (1 << width) - 1
+    new_rows = list(rows)
+    for dy, mask in enumerate(masks):
+        if y + dy >= 0:
+            new_rows[y + dy] |= mask << x
+    kept = [row for row in new_rows if row != full_mask]
+    lines = len(new_rows) - len(kept)
+    if lines:
+        kept = [0] * lines + kept
+    return tuple(kept), lines
+
+
+def board_features(rows, width):
+    # (총 높이, 구멍 수, 울퉁불퉁함)
+    height = len(rows)
+    heights = [0] * width
+    seen = 0
+    holes = 0
+    for y, row in enumerate(rows):
+        new = row & ~seen
+        while new:
+            low = new & -new
+            heights[low.bit_length() - 1] = height - y
+            new ^= low
+        seen |= row
+        holes += bin(seen & ~row).count('1')
+    bumpiness = sum(abs(heights[i] - heights[i + 1]) for i in range(width - 1))
+    return sum(heights), holes, bumpiness
+
+
+class TranspositionTable:
+    # 보드 해시(행 튜플)를 키로 하는 크기 제한 LRU 캐시
+    def __init__(self, max_size=200000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TetrisBot:
+    def __init__(self, weights=None, lookahead=True, beam=8, cache_size=200000):
+        # lookahead: 다음 조각까지 보고 결정 (깊이 2)
+        # beam: 깊이 2에서 확장할 상위 후보 수
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.lookahead = lookahead
+        self.beam = beam
+        self.table = TranspositionTable(cache_size)
+        self._piece = None
+        self._target = None
+        self._last_position = None
+
+    def evaluate(self, rows, width):
+        # 줄 제거를 제외한 보드 점수 (전치 테이블에 저장)
+        value = self.table.get(rows)
+        if value is None:
+            aggregate_height, holes, bumpiness = board_features(rows, width)
+            weights = self.weights
+            value = (weights['height'] * aggregate_height +
+                     weights['holes'] * holes +
+                     weights['bumpiness'] * bumpiness)
+            self.table.put(rows, value)
+        return value
+
+    def placements(self, rows, kind, rotation, x, y, width):
+        # 회전 후 좌우 이동, 하드 드롭으로 도달할 수 있는 배치 목록
+        # 각 항목: (목표 회전, 목표 x, 새 보드, 지운 줄 수)
+        results = []
+        seen_masks = []
+        tops = column_tops(rows, width)
+        for steps in range(ROTATION_COUNT):
+            if steps:
+                # 엔진과 같은 벽 차기 순서로 회전
+                next_rotation = (rotation + 1) % ROTATION_COUNT
+                masks = PIECE_MASKS[kind][next_rotation]
+                for dx, dy in KICKS[kind][rotation]:
+                    if fits(rows, masks, x + dx, y + dy, width):
+                        rotation, x, y = next_rotation, x + dx, y + dy
+                        break
+                else:
+                    break
+            masks = PIECE_MASKS[kind][rotation]
+            if masks in seen_masks:
+                continue
+            seen_masks.append(masks)
+            if not fits(rows, masks, x, y, width):
+                continue
+
+            bottoms = PIECE_BOTTOMS[kind][rotation]
+            for direction in (-1, 1):
+                px = x if direction < 0 else x + 1
+                while fits(rows, masks, px, y, width):
+                    # 열 높이 위로 떨어지는 경우는 아래쪽 윤곽으로 바로 계산
+                    landing = min(tops[px + dx] - 1 - bottom for dx, bottom in enumerate(bottoms))
+                    if y > landing:
+                        landing = drop_y(rows, masks, px, y, width)
+                    new_rows, lines = place(rows, masks, px, landing, width)
+                    results.append((rotation, px, new_rows, lines))
+                    px += direction
+        return results
+
+    def spawn_position(self, kind, width):
+        return width // 2 - PIECE_SIZES[kind][0][0] // 2, 0
+
+    def search(self, rows, kind, rotation, x, y, next_kind, width):
+        # 가장 좋은 (목표 회전, 목표 x)와 그 점수
+        lines_weight = self.weights['lines']
+        scored = []
+        for target_rotation, target_x, new_rows, lines in self.placements(rows, kind, rotation, x, y, width):
+            value = lines_weight * lines + self.evaluate(new_rows, width)
+            scored.append((value, target_rotation, target_x, new_rows, lines))
+        if not scored:
+            return None, GAME_OVER_VALUE
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        if not self.lookahead or next_kind is None:
+            best = scored[0]
+            return (best[1], best[2]), best[0]
+
+        # 다음 조각 미리 보기: 상위 후보만 확장
+        best_target = None
+        best_value = GAME_OVER_VALUE
+        spawn_x, spawn_y = self.spawn_position(next_kind, width)
+        for _, target_rotation, target_x, new_rows, lines in scored[:self.beam]:
+            key = (new_rows, next_kind)
+            follow = self.table.get(key)
+            if follow is None:
+                follow = GAME_OVER_VALUE
+                for _, _, next_rows, next_lines in self.placements(
+                        new_rows, next_kind, 0, spawn_x, spawn_y, width):
+                    follow = max(follow, lines_weight * next_lines + self.evaluate(next_rows, width))
+                self.table.put(key, follow)
+            value = lines_weight * lines + follow
+            if best_target is None or value > best_value:
+                best_target = (target_rotation, target_x)
+                best_value = value
+        return best_target, best_value
+
+    def choose(self, engine):
+        # 엔진의 현재 조각에 대한 목표 배치 계산
+        piece = engine.current_piece
+        width = engine.board.width
+        next_kind = engine.next_piece['kind'] if self.lookahead else None
+        target, _ = self.search(board_rows(engine.board), piece['kind'], piece['rotation'],
+                                piece['x'], piece['y'], next_kind, width)
+        return target
+
+    def next_action(self, engine):
+        # 한 틱에 한 번 호출: 목표 회전 -> 목표 열 -> 하드 드롭 순으로 입력 선택
+        if not engine.accepts_input():
+            return ACTION_NONE
+        piece = engine.current_piece
+        if piece is not self._piece:
+            self._piece = piece
+            self._target = self.choose(engine)
+            self._last_position = None
+        if self._target is None:
+            return ACTION_HARD_DROP
+
+        position = (piece['rotation'], piece['x'])
+        stuck = position == self._last_position
+        self._last_position = position
+        target_rotation, target_x = self._target
+        if stuck:
+            # 이전 입력이 막혔으면 더 움직이지 않고 떨어뜨림
+            return ACTION_HARD_DROP
+        if piece['rotation'] != target_rotation:
+            return ACTION_ROTATE
+        if piece['x'] > target_x:
+            return ACTION_LEFT
+        if piece['x'] < target_x:
+            return ACTION_RIGHT
+        return ACTION_HARD_DROP
+
+    def __call__(self, engine, rng):
+        # tournament/play_game 정책 인터페이스
+        return self.next_action(engine)
@@ -0,0 +1,213 @@
+# NumPy 배치 엔진
+# N개의 보드를 (N, GRID_HEIGHT, GRID_WIDTH) uint8 배열 하나로 들고, 이동/충돌/고정/줄 제거를
+# 벡터 연산으로 한꺼번에 처리한다. 규칙은 TetrisEngine(animations=False)과 같다.
+import sys
+import time
+
+import numpy as np
+
+from constants import SHAPES, GRID_WIDTH, GRID_HEIGHT, LINE_SCORES, LINES_PER_LEVEL
+from engine import (
+    ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_HARD_DROP, TICK_RATE
+)
+from pieces import PIECE_SHAPES, PIECE_SIZES, KICKS, ROTATION_COUNT
+
+# CELL_OFFSETS[kind, rotation] -> 조각의 4칸 (dy, dx)
+CELL_OFFSETS = np.array([
+    [[(y, x) for y, row in enumerate(state) for x, cell in enumerate(row) if cell] for state in states]
+    for states in PIECE_SHAPES
+], dtype=np.int64)
+
+# KICK_OFFSETS[kind, rotation, i] -> i번째 벽 차기 (dx, dy), 짧은 목록은 (0, 0)으로 채움
+_MAX_KICKS = max(len(kicks) for table in KICKS for kicks in table)
+KICK_OFFSETS = np.array([
+    [list(kicks) + [(0, 0)] * (_MAX_KICKS - len(kicks)) for kicks in table]
+    for table in KICKS
+], dtype=np.int64)
+
+PIECE_WIDTHS = np.array([[size[0] for size in sizes] for sizes in PIECE_SIZES], dtype=np.int64)
+_LINE_SCORES = np.array(LINE_SCORES, dtype=np.int64)
+
+
+class BatchTetris:
+    def __init__(self, n, seed=None, tick_rate=TICK_RATE, width=GRID_WIDTH, height=GRID_HEIGHT):
+        # 보드 칸 값: 0 = 빈 칸, kind + 1 = 해당 조각 색상
+        self.n = n
+        self.width = width
+        self.height = height
+        self.tick_rate = tick_rate
+        self.rng = np.random.default_rng(seed)
+
+        self.boards = np.zeros((n, height, width), dtype=np.uint8)
+        self.kind = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.next_kind = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines_cleared = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.pieces_placed = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.tick = np.zeros(n, dtype=np.int64)
+        self.last_fall_tick = np.zeros(n, dtype=np.int64)
+        self.reset()
+
+    def reset(self, mask=None):
+        # mask가 주어지면 해당 게임만 초기화 (게임 오버된 보드 재시작 등)
+        idx = np.arange(self.n) if mask is None else np.flatnonzero(mask)
+        self.boards[idx] = 0
+        self.score[idx] = 0
+        self.lines_cleared[idx] = 0
+        self.level[idx] = 1
+        self.pieces_placed[idx] = 0
+        self.game_over[idx] = False
+        self.tick[idx] = 0
+        self.last_fall_tick[idx] = 0
+        self.next_kind[idx] = self.rng.integers(0, len(SHAPES), size=len(idx))
+        self._spawn(idx)
+
+    def observe(self):
+        # 복사 없이 내부 배열을 그대로 반환 (읽기 전용으로 사용)
+        return {
+            'boards': self.boards,
+            'kind': self.kind,
+            'rotation': self.rotation,
+            'x': self.x,
+            'y': self.y,
+            'next_kind': self.next_kind,
+            'score': self.score,
+            'lines_cleared': self.lines_cleared,
+            'level': self.level,
+            'game_over': self.game_over,
+        }
+
+    def fall_ticks(self, idx):
+        fall_speed = np.maximum(0.05, 0.5 - (self.level[idx] - 1) * 0.05)
+        return np.maximum(1, np.rint(fall_speed * self.tick_rate)).astype(np.int64)
+
+    def _cells(self, kind, rotation, x, y):
+        offsets = CELL_OFFSETS[kind, rotation]
+        return y[:, None] + offsets[:, :, 0], x[:, None] + offsets[:, :, 1]
+
+    def _collides(self, idx, kind, rotation, x, y):
+        # idx 게임들에서 주어진 위치의 조각이 벽, 바닥 또는 블록과 겹치는지 확인
+        ys, xs = self._cells(kind, rotation, x, y)
+        outside = (xs < 0) | (xs >= self.width) | (ys >= self.height)
+        inside = ~outside & (ys >= 0)
+        occupied = self.boards[idx[:, None], np.clip(ys, 0, self.height - 1), np.clip(xs, 0, self.width - 1)] != 0
+        return (outside | (occupied & inside)).any(axis=1)
+
+    def _shift(self, idx, dx, dy):
+        if not len(idx):
+            return
+        blocked = self._collides(idx, self.kind[idx], self.rotation[idx], self.x[idx] + dx, self.y[idx] + dy)
+        moved = idx[~blocked]
+        self.x[moved] += dx
+        self.y[moved] += dy
+
+    def _rotate(self, idx):
+        kind = self.kind[idx]
+        rotation = self.rotation[idx]
+        next_rotation = (rotation + 1) % ROTATION_COUNT
+        pending = np.ones(len(idx), dtype=bool)
+        for i in range(_MAX_KICKS):
+            if not pending.any():
+                break
+            sub = np.flatnonzero(pending)
+            dx = KICK_OFFSETS[kind[sub], rotation[sub], i, 0]
+            dy = KICK_OFFSETS[kind[sub], rotation[sub], i, 1]
+            envs = idx[sub]
+            ok = ~self._collides(envs, kind[sub], next_rotation[sub], self.x[envs] + dx, self.y[envs] + dy)
+            done = envs[ok]
+            self.rotation[done] = next_rotation[sub][ok]
+            self.x[done] += dx[ok]
+            self.y[done] += dy[ok]
+            pending[sub[ok]] = False
+
+    def drop_distance(self, idx):
+        # 각 칸의 열에서 아래쪽 첫 블록(또는 바닥)까지의 거리 중 최소값
+        ys, xs = self._cells(self.kind[idx], self.rotation[idx], self.x[idx], self.y[idx])
+        columns = self.boards[idx[:, None, None], np.arange(self.height)[None, None, :], xs[:, :, None]] != 0
+        below = np.arange(self.height)[None, None, :] > ys[:, :, None]
+        blocked = columns & below
+        first = np.where(blocked.any(axis=2), blocked.argmax(axis=2), self.height)
+        return (first - ys - 1).min(axis=1)
+
+    def _lock(self, idx):
+        # 조각 고정, 줄 제거(한 번의 정렬로 압축), 점수 계산, 다음 조각 생성
+        if not len(idx):
+            return
+        ys, xs = self._cells(self.kind[idx], self.rotation[idx], self.x[idx], self.y[idx])
+        visible = ys >= 0
+        envs = np.broadcast_to(idx[:, None], ys.shape)
+        colors = np.broadcast_to((self.kind[idx] + 1)[:, None], ys.shape).astype(np.uint8)
+        self.boards[envs[visible], ys[visible], xs[visible]] = colors[visible]
+        self.pieces_placed[idx] += 1
+
+        full = (self.boards[idx] != 0).all(axis=2)
+        counts = full.sum(axis=1)
+        cleared = idx[counts > 0]
+        if len(cleared):
+            full = full[counts > 0]
+            count = counts[counts > 0]
+            # 가득 찬 줄을 위로 보내고(순서 유지) 비움
+            order = np.argsort(~full, axis=1, kind='stable')
+            boards = np.take_along_axis(self.boards[cleared], order[:, :, None], axis=1)
+            boards[np.arange(self.height)[None, :] < count[:, None]] = 0
+            self.boards[cleared] = boards
+
+            self.score[cleared] += _LINE_SCORES[np.minimum(count, 4)] * self.level[cleared]
+            self.lines_cleared[cleared] += count
+            self.level[cleared] = self.lines_cleared[cleared] // LINES_PER_LEVEL + 1
+        self._spawn(idx)
+
+    def _spawn(self, idx):
+        self.kind[idx] = self.next_kind[idx]
+        self.next_kind[idx] = self.rng.integers(0, len(SHAPES), size=len(idx))
+        self.rotation[idx] = 0
+        self.x[idx] = self.width // 2 - PIECE_WIDTHS[self.kind[idx], 0] // 2
+        self.y[idx] = 0
+        self.game_over[idx] = self._collides(idx, self.kind[idx], self.rotation[idx], self.x[idx], self.y[idx])
+
+    def step(self, actions):
+        # 모든 게임에 입력을 하나씩 적용하고 한 틱 진행 (게임 오버된 보드는 멈춤)
+        actions = np.asarray(actions)
+        alive = ~self.game_over
+        self._shift(np.flatnonzero(alive & (actions == ACTION_LEFT)), -1, 0)
+        self._shift(np.flatnonzero(alive & (actions == ACTION_RIGHT)), 1, 0)
+        self._shift(np.flatnonzero(alive & (actions == ACTION_DOWN)), 0, 1)
+        rotating = np.flatnonzero(alive & (actions == ACTION_ROTATE))
+        if len(rotating):
+            self._rotate(rotating)
+        dropping = np.flatnonzero(alive & (actions == ACTION_HARD_DROP))
+        if len(dropping):
+            self.y[dropping] += self.drop_distance(dropping)
+            self._lock(dropping)
+
+        # 자동 낙하
+        self.tick[alive] += 1
+        falling = np.flatnonzero(~self.game_over & alive)
+        falling = falling[self.tick[falling] - self.last_fall_tick[falling] >= self.fall_ticks(falling)]
+        if len(falling):
+            blocked = self._collides(falling, self.kind[falling], self.rotation[falling],
+                                     self.x[falling], self.y[falling] + 1)
+            self.y[falling[~blocked]] += 1
+            self._lock(falling[blocked])
+            self.last_fall_tick[falling] = self.tick[falling]
+        return self.game_over
+
+
+if __name__ == "__main__":
+    # 배치 크기별 처리량 측정: python batch.py [배치 크기] [틱 수]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    env = BatchTetris(n, seed=0)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 6, size=(ticks, n))
+    start = time.perf_counter()
+    for t in range(ticks):
+        env.step(actions[t])
+        env.reset(env.game_over)
+    elapsed = time.perf_counter() - start
+    print(f"{n} boards x {ticks} ticks in {elapsed:.2f}s ({n * ticks / elapsed:,.0f} board-ticks/s)")
@@ -0,0 +1,394 @@
+# 엔진/렌더러 핫 패스 벤치마크
+# 마이크로 벤치마크(충돌 검사, 회전, 고정, 줄 제거)와 SDL dummy 드라이버에서의 그리기 벤치마크를
+# 거의 가득 찬 보드에서 실행하고 결과를 JSON으로 저장한다. --compare로 이전 결과와 비교할 수 있다.
+#
+# 사용법: python benchmark.py [--output bench.json] [--compare base.json] [--filter render] [--quick]
+import os
+
+# 화면 없는 리눅스에서도 실행되도록 pygame을 불러오기 전에 dummy 드라이버 지정
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pygame
+
+from board import BitBoard, ListBoard
+from constants import GRID_WIDTH, GRID_HEIGHT, SHAPE_COLORS
+from engine import TetrisEngine, ACTION_HARD_DROP
+from gamestate import GameState
+from profiler import percentile
+
+# 보드 아래쪽에서 채울 줄 수 (줄마다 빈 칸 하나)
+FILLED_ROWS = 16
+BURST_ROWS = 4  # 4줄 x 10칸 x 10개 = 400개 파티클
+
+# 큰 보드 그리기 벤치마크의 (열 수, 줄 수, 채울 줄 수)
+LARGE_BOARDS = ((200, 2000, 1000), (300, 4000, 2000))
+
+
+def measure(fn, setup=None, number=1000, repeat=5):
+    # 호출 한 번당 시간 통계 (마이크로초), setup이 있으면 매 호출 전에 실행하고 측정에서 제외
+    times = []
+    for _ in range(repeat):
+        if setup is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            times.append((time.perf_counter() - start) / number)
+        else:
+            total = 0.0
+            for _ in range(number):
+                setup()
+                start = time.perf_counter()
+                fn()
+                total += time.perf_counter() - start
+            times.append(total / number)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min_us': min(times) * 1e6,
+        'median_us': statistics.median(times) * 1e6,
+        'max_us': max(times) * 1e6,
+    }
+
+
+def fill_board(board, rows=FILLED_ROWS, seed=0):
+    # 아래쪽 rows줄을 줄마다 빈 칸 하나만 남기고 채움
+    rng = random.Random(seed)
+    for y in range(board.height - rows, board.height):
+        gap = rng.randrange(board.width)
+        for x in range(board.width):
+            if x != gap:
+                board.place((1,), x, y, rng.choice(SHAPE_COLORS))
+    return board
+
+
+def complete_rows(board, rows=BURST_ROWS):
+    # 아래쪽 rows줄의 빈 칸을 채워 가득 찬 줄로 만듦
+    for y in range(board.height - rows, board.height):
+        board.place(((1 << board.width) - 1,), 0, y, SHAPE_COLORS[0])
+    return board
+
+
+def full_board(board_class, seed=0):
+    # 아래쪽 BURST_ROWS줄이 가득 찬 거의 꽉 찬 보드 (줄 제거 벤치마크용)
+    return complete_rows(fill_board(board_class(GRID_WIDTH, GRID_HEIGHT), seed=seed))
+
+
+def filled_engine(seed=0):
+    engine = TetrisEngine(seed=seed)
+    fill_board(engine.board, seed=seed)
+    return engine
+
+
+def micro_benchmarks(scale):
+    engine = filled_engine()
+    piece = engine.current_piece
+    landing = dict(piece, y=engine.drop_position(piece))
+    results = {}
+
+    results['valid_position.spawn'] = measure(lambda: engine.valid_position(piece), number=20000 * scale)
+    results['valid_position.landing'] = measure(
+        lambda: engine.valid_position(landing, y_offset=1), number=20000 * scale)
+    results['drop_position'] = measure(lambda: engine.drop_position(piece), number=5000 * scale)
+    results['rotate_piece'] = measure(lambda: engine.rotate_piece(piece), number=20000 * scale)
+    # 네 번 회전하면 제자리로 돌아오므로 상태를 되돌리지 않고 반복
+    results['try_rotate'] = measure(engine.try_rotate, number=20000 * scale)
+
+    start = engine.snapshot()
+
+    def before_lock():
+        engine.restore(start)
+        engine.current_piece['y'] = engine.drop_position(engine.current_piece)
+    results['lock_piece'] = measure(engine.lock_piece, before_lock, number=2000 * scale)
+
+    # 게임 상태 스냅샷 (복제는 참조 복사만, 캡처는 새 조각을 뽑기 전까지 RNG 상태를 다시 씀)
+    engine.restore(start)
+    results['state.clone'] = measure(start.clone, number=100000 * scale)
+    results['state.snapshot'] = measure(engine.snapshot, number=20000 * scale)
+    results['state.restore'] = measure(lambda: engine.restore(start), number=20000 * scale)
+    data = start.to_bytes()
+    results['state.to_bytes'] = measure(start.to_bytes, number=5000 * scale)
+    results['state.from_bytes'] = measure(lambda: GameState.from_bytes(data), number=2000 * scale)
+
+    for board_class in (BitBoard, ListBoard):
+        template = full_board(board_class)
+        rows = template.full_rows()
+        boards = []
+
+        def before_clear():
+            boards.append(template.copy())
+        results[f'clear_rows.{board_class.__name__}'] = measure(
+            lambda: boards.pop().clear_rows(rows), before_clear, number=2000 * scale)
+
+    # 공유 메모리 상태 스트림에 한 틱 쓰기 (보드가 바뀐 틱과 그대로인 틱)
+    from statestream import StateStreamWriter
+    with tempfile.TemporaryDirectory() as tmp:
+        stream = StateStreamWriter(os.path.join(tmp, 'state'), GRID_WIDTH, GRID_HEIGHT)
+        results['statestream.publish'] = measure(lambda: stream.publish(engine), number=20000 * scale)
+
+        def board_changed():
+            stream.grid_version = None
+        results['statestream.publish_changed'] = measure(
+            lambda: stream.publish(engine), board_changed, number=5000 * scale)
+        stream.close()
+    return results
+
+
+def render_benchmarks(scale):
+    # Tetris 화면을 만들고 거의 가득 찬 보드에서 그리기 단계별로 측정
+    from tetris import Tetris, CELL_SIZE
+
+    game = Tetris()
+    game.show_start_screen = False
+    game.engine.reset(seed=0)
+    fill_board(game.engine.board)
+    engine = game.engine
+    number = 300 * scale
+    results = {}
+
+    def burst():
+        # 4줄을 지울 때와 같은 400개 파티클을 만들고 몇 프레임 퍼뜨림 (보드는 그대로 둠)
+        game.particles.clear()
+        full = complete_rows(engine.board.copy())
+        for y in range(GRID_HEIGHT - BURST_ROWS, GRID_HEIGHT):
+            for x, color in enumerate(full.grid[y]):
+                game.particles.emit(x * CELL_SIZE + CELL_SIZE // 2, y * CELL_SIZE + CELL_SIZE // 2, color, 10)
+        for _ in range(10):
+            game.particles.update()
+
+    results['draw_blocks'] = measure(game.draw_blocks, number=number)
+    game.particles.clear()
+    results['draw_particles.empty'] = measure(game.draw_particles, number=number)
+    burst()
+    results['draw_particles.burst400'] = measure(game.draw_particles, number=number)
+    game.particles.clear()
+    results['frame.compose'] = measure(game.compose_frame, number=number)
+    results['frame.render'] = measure(game.render, number=number)
+    burst()
+    results['frame.compose_burst400'] = measure(game.compose_frame, number=number)
+    results['frame.render_burst400'] = measure(game.render, number=number)
+    results['particles.update_burst400'] = measure(game.particles.update, burst, number=number)
+    game.particles.clear()
+
+    # 하드 드롭 애니메이션 중간 상태
+    engine.apply(ACTION_HARD_DROP)
+    for _ in range(engine.seconds_to_ticks(engine.hard_drop_duration) // 2):
+        engine.step()
+    results['draw_hard_drop_animation'] = measure(game.draw_hard_drop_animation, number=number)
+    pygame.quit()
+    return results
+
+
+def large_board_benchmarks(scale):
+    # 큰 보드에서 보이는 영역(기본 40 x 24칸)만 그리는지 확인 (프레임 시간이 보드 크기와 거의 무관해야 함)
+    from tetris import Tetris
+
+    number = 100 * scale
+    results = {}
+    for width, height, rows in LARGE_BOARDS:
+        game = Tetris(board_width=width, board_height=height)
+        game.show_start_screen = False
+        game.engine.reset(seed=0)
+        fill_board(game.engine.board, rows=rows)
+        name = f'{width}x{height}'
+        game.render()
+        results[f'{name}.draw_blocks'] = measure(game.draw_blocks, number=number)
+        results[f'{name}.frame.render'] = measure(game.render, number=number)
+
+        # 채워진 영역에서 뷰포트가 프레임마다 한 줄씩 올라갈 때 (새로 보이는 덩어리를 그림)
+        viewport = game.viewport
+        bottom = height - viewport.rows
+        span = rows - viewport.rows
+
+        def scroll():
+            viewport.y = bottom - (bottom - viewport.y + 1) % span
+            game.draw_blocks()
+
+        results[f'{name}.draw_blocks_scroll'] = measure(scroll, number=number)
+        results[f'{name}.board_copy'] = measure(game.engine.board.copy, number=number)
+        pygame.quit()
+    return results
+
+
+def gl_benchmarks(scale):
+    # OpenGL 렌더러의 프레임 시간 (GPU 작업이 끝날 때까지 포함), 화면 배율 1배/2배와 파티클 400/2000개
+    # 헤드리스 컨텍스트(EGL/OSMesa)를 만들 수 없으면 건너뜀
+    from tetris import Tetris, CELL_SIZE
+    try:
+        # glrenderer가 헤드리스 플랫폼을 정한 뒤 불러온 OpenGL을 써야 함
+        from glrenderer import GL
+    except ImportError as e:
+        print(f"gl: 건너뜀 ({e})", file=sys.stderr)
+        return {}
+
+    number = 300 * scale
+    results = {}
+    for window_scale in (1, 2):
+        try:
+            game = Tetris(max_particles=4000, renderer='gl', scale=window_scale)
+        except RuntimeError as e:
+            print(f"gl: 건너뜀 ({e})", file=sys.stderr)
+            return results
+        game.show_start_screen = False
+        game.engine.reset(seed=0)
+        fill_board(game.engine.board)
+        full = complete_rows(game.engine.board.copy())
+
+        def render():
+            game.render()
+            GL.glFinish()
+
+        def burst(per_cell):
+            game.particles.clear()
+            for y in range(GRID_HEIGHT - BURST_ROWS, GRID_HEIGHT):
+                for x, color in enumerate(full.grid[y]):
+                    game.particles.emit(x * CELL_SIZE + CELL_SIZE // 2, y * CELL_SIZE + CELL_SIZE // 2, color, per_cell)
+            for _ in range(10):
+                game.particles.update()
+
+        suffix = '' if window_scale == 1 else f'.x{window_scale}'
+        results[f'frame.render{suffix}'] = measure(render, number=number)
+        burst(10)
+        results[f'frame.render_burst400{suffix}'] = measure(render, number=number)
+        burst(50)
+        results[f'frame.render_burst2000{suffix}'] = measure(render, number=number)
+    pygame.quit()
+    return results
+
+
+def input_benchmarks(scale):
+    # 실제 시계로 게임 루프를 돌리며 다른 스레드에서 무작위 간격으로 키를 눌러
+    # 키 이벤트에서 엔진 적용, 화면 표시까지의 지연을 측정 (하드 드롭 섞음, 효과 중 입력은 버퍼를 거침)
+    import threading
+    from tetris import Tetris
+
+    game = Tetris(seed=0)
+    game.show_start_screen = False
+    presses = 100 * scale
+    keys = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE)
+
+    def press_keys():
+        rng = random.Random(0)
+        for _ in range(presses):
+            time.sleep(rng.uniform(0.01, 0.05))
+            key = rng.choice(keys)
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+            pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key))
+            if game.engine.game_over:
+                pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_r))
+        time.sleep(0.1)
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    thread = threading.Thread(target=press_keys)
+    thread.start()
+    game.run()
+    thread.join()
+
+    # 바로 적용된 입력과 효과가 끝날 때까지 버퍼에 있던 입력을 따로 집계
+    results = {}
+    samples = list(game.inputs.latency.samples)
+    for name, buffered, index in (('apply', False, 2), ('present', False, 3), ('buffered_present', True, 3)):
+        times = sorted(sample[index] for sample in samples if sample[1] == buffered)
+        if not times:
+            continue
+        results[name] = {
+            'number': len(times),
+            'repeat': 1,
+            'min_us': times[0] * 1e6,
+            'median_us': percentile(times, 0.5) * 1e6,
+            'p99_us': percentile(times, 0.99) * 1e6,
+            'max_us': times[-1] * 1e6,
+        }
+    return results
+
+
+GROUPS = {
+    'micro': micro_benchmarks,
+    'render': render_benchmarks,
+    'large': large_board_benchmarks,
+    'gl': gl_benchmarks,
+    'input': input_benchmarks,
+}
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+    }
+
+
+def compare(results, base, threshold):
+    # 기준 결과 대비 중앙값 비율, threshold보다 느려진 항목 목록 반환
+    regressions = []
+    for name, stats in results.items():
+        old = base.get(name)
+        if not old:
+            continue
+        ratio = stats['median_us'] / old['median_us'] if old['median_us'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  <-- regression'
+            regressions.append(name)
+        print(f"{name:32s} {old['median_us']:10.2f} -> {stats['median_us']:10.2f} us  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="테트리스 벤치마크")
+    parser.add_argument('--output', help="결과를 저장할 JSON 파일 (지정하지 않으면 표준 출력)")
+    parser.add_argument('--compare', metavar='BASE', help="비교할 이전 결과 JSON")
+    parser.add_argument('--threshold', type=float, default=0.10, help="회귀로 판단할 중앙값 증가 비율")
+    parser.add_argument('--filter', choices=sorted(GROUPS), help="한 그룹만 실행")
+    parser.add_argument('--quick', action='store_true', help="반복 횟수를 줄여 빠르게 실행")
+    args = parser.parse_args()
+
+    scale = 1 if args.quick else 5
+    results = {}
+    for group, run in GROUPS.items():
+        if args.filter and group != args.filter:
+            continue
+        for name, stats in run(scale).items():
+            results[f'{group}.{name}'] = stats
+
+    report = {'meta': metadata(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+        for name, stats in results.items():
+            print(f"{name:32s} {stats['median_us']:10.2f} us")
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)['results']
+        if compare(results, base, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+# 게임 보드 백엔드
+# 조각은 각 행을 비트마스크로 표현한 masks 튜플로 전달된다 (비트 i = 조각 기준 i번째 열).
+from constants import CELL_CODES, CODE_COLORS
+
+# 칸 코드 -> 색상 표 (0은 빈 칸), 처음 보는 색상은 cell_code가 새 코드를 붙임
+CODE_TABLE = [0] * (max(CODE_COLORS) + 1)
+for _code, _color in CODE_COLORS.items():
+    CODE_TABLE[_code] = _color
+
+
+def cell_code(color):
+    # 칸 색상의 1바이트 코드 (빈 칸 0)
+    if not color:
+        return 0
+    code = CELL_CODES.get(color)
+    if code is None:
+        code = len(CODE_TABLE)
+        if code > 255:
+            raise ValueError(f"칸 색상이 너무 많음: {color}")
+        CELL_CODES[color] = code
+        CODE_COLORS[code] = color
+        CODE_TABLE.append(color)
+    return code
+
+
+# 칸 코드 줄 -> 채워진 칸을 '1'로 바꾼 문자열 (뒤집어서 int(..., 2)로 행 비트마스크 계산)
+_FILLED_DIGITS = bytes([ord('0')] + [ord('1')] * 255)
+
+
+def row_mask(codes):
+    # 칸 코드 줄의 행 비트마스크 (비트 x = x번째 칸)
+    return int(codes.translate(_FILLED_DIGITS)[::-1], 2) if codes else 0
+
+
+def shape_masks(shape):
+    # 모양(0/1 리스트)을 행별 비트마스크 튜플로 변환
+    return tuple(
+        sum(1 << x for x, cell in enumerate(row) if cell)
+        for row in shape
+    )
+
+
+def mask_columns(mask):
+    # 비트마스크에서 채워진 열 번호를 차례로 반환
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ListBoard:
+    # 색상 튜플의 리스트-오브-리스트 보드 (기존 구현)
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.grid = [[0 for _ in range(width)] for _ in range(height)]
+        self.version = 0  # 보드가 바뀔 때마다 증가 (캐시 무효화용)
+
+    def copy(self):
+        board = ListBoard.__new__(ListBoard)
+        board.width = self.width
+        board.height = self.height
+        board.version = self.version
+        board.grid = [row[:] for row in self.grid]
+        return board
+
+    def freeze(self):
+        # 바꿀 수 없는 보드 상태 (BitBoard.freeze와 같은 형식)
+        cells = tuple(self.row_codes(y) for y in range(self.height))
+        return cells, tuple(map(row_mask, cells)), self.column_heights, self.column_holes
+
+    @classmethod
+    def thaw(cls, width, height, frozen, version=0):
+        # freeze로 얻은 상태에서 보드 생성
+        board = cls.__new__(cls)
+        board.width = width
+        board.height = height
+        board.version = version
+        lookup = CODE_TABLE.__getitem__
+        board.grid = [list(map(lookup, row)) for row in frozen[0]]
+        return board
+
+    def collides(self, masks, x, y):
+        # 조각이 벽, 바닥 또는 기존 블록과 겹치는지 확인
+        for dy, mask in enumerate(masks):
+            pos_y = y + dy
+            for dx in mask_columns(mask):
+                pos_x = x + dx
+                if (pos_x < 0 or pos_x >= self.width or
+                    pos_y >= self.height or
+                    (pos_y >= 0 and self.grid[pos_y][pos_x])):
+                    return True
+        return False
+
+    def place(self, masks, x, y, color):
+        # 조각을 보드에 고정 (보드 밖의 칸은 무시)
+        self.version += 1
+        for dy, mask in enumerate(masks):
+            pos_y = y + dy
+            for dx in mask_columns(mask):
+                pos_x = x + dx
+                if 0 <= pos_y < self.height and 0 <= pos_x < self.width:
+                    self.grid[pos_y][pos_x] = color
+
+    def row_codes(self, y):
+        # y번째 줄의 칸 코드 (칸마다 1바이트)
+        return bytes(map(cell_code, self.grid[y]))
+
+    def full_rows(self, rows=None):
+        # 가득 찬 줄 목록 (아래쪽부터), rows를 주면 그 줄들만 확인
+        if rows is None:
+            rows = range(self.height)
+        return sorted((y for y in rows if 0 <= y < self.height and all(self.grid[y])), reverse=True)
+
+    # 읽기 전용 지표 (BitBoard와 같은 값을 매번 전체 스캔으로 계산)
+    @property
+    def row_fill(self):
+        return tuple(sum(1 for cell in row if cell) for row in self.grid)
+
+    @property
+    def column_heights(self):
+        heights = []
+        for x in range(self.width):
+            top = next((y for y in range(self.height) if self.grid[y][x]), self.height)
+            heights.append(self.height - top)
+        return tuple(heights)
+
+    @property
+    def column_holes(self):
+        return tuple(
+            sum(1 for y in range(self.height - h, self.height) if not self.grid[y][x])
+            for x, h in enumerate(self.column_heights)
+        )
+
+    @property
+    def holes(self):
+        return sum(self.column_holes)
+
+    @property
+    def aggregate_height(self):
+        return sum(self.column_heights)
+
+    @property
+    def max_height(self):
+        return max(self.column_heights)
+
+    @property
+    def bumpiness(self):
+        heights = self.column_heights
+        return sum(abs(heights[i] - heights[i + 1]) for i in range(self.width - 1))
+
+    def landing_y(self, bottoms, x):
+        # 열 높이 위에 떨어진 조각의 y 좌표 (bottoms: 조각의 열별 가장 아래 칸)
+        heights = self.column_heights
+        return min(self.height - heights[x + dx] - 1 - bottom for dx, bottom in enumerate(bottoms))
+
+    def insert_garbage(self, count, hole, color):
+        # 아래쪽에 hole 열만 빈 줄 count개를 넣고 전체를 위로 밀어 올림
+        # 보드 위로 밀려난 블록이 있으면 True
+        self.version += 1
+        count = min(count, self.height)
+        overflow = any(any(row) for row in self.grid[:count])
+        self.grid = self.grid[count:] + [
+            [0 if x == hole else color for x in range(self.width)] for _ in range(count)
+        ]
+        return overflow
+
+    def clear_rows(self, rows):
+        # 줄 제거 후 위쪽 줄을 아래로 내림
+        self.version += 1
+        for y in sorted(rows):
+            for y2 in range(y, 0, -1):
+                self.grid[y2] = self.grid[y2 - 1][:]
+            self.grid[0] = [0] * self.width
+
+
+class CellGrid:
+    # BitBoard 칸 코드를 색상 리스트로 보여 주는 읽기 전용 뷰 (grid[y]는 그 줄만 풀어서 새 리스트로 반환)
+    __slots__ = ('cells',)
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __getitem__(self, y):
+        return list(map(CODE_TABLE.__getitem__, self.cells[y]))
+
+    def __iter__(self):
+        lookup = CODE_TABLE.__getitem__
+        for row in self.cells:
+            yield list(map(lookup, row))
+
+
+class BitBoard:
+    # 각 행을 정수 비트마스크로 저장하는 보드, 색상은 줄마다 칸당 1바이트 코드(bytes)로 저장
+    # 줄은 바꿀 수 없는 bytes라 빈 줄은 객체 하나를 함께 쓰고 복사할 때 줄 리스트만 복사한다 (큰 보드용).
+    # 열 높이와 열별 구멍 수는 고정/줄 제거 때 바뀐 부분만 갱신한다 (줄별 칸 수는 행 비트마스크의 비트 수).
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.full_mask = (1 << width) - 1
+        self.rows = [0] * height
+        self.empty_row = bytes(width)
+        self.cells = [self.empty_row] * height
+        self._heights = [0] * width
+        self._column_holes = [0] * width
+        self.version = 0  # 보드가 바뀔 때마다 증가 (캐시 무효화용)
+
+    def copy(self):
+        board = BitBoard.__new__(BitBoard)
+        board.width = self.width
+        board.height = self.height
+        board.version = self.version
+        board.full_mask = self.full_mask
+        board.rows = self.rows[:]
+        board.empty_row = self.empty_row
+        board.cells = self.cells[:]
+        board._heights = self._heights[:]
+        board._column_holes = self._column_holes[:]
+        return board
+
+    def freeze(self):
+        # 바꿀 수 없는 보드 상태 (칸 코드 줄, 행 비트마스크, 열 높이, 열별 구멍 수)
+        # 줄은 이미 bytes라 리스트를 튜플로 옮길 뿐 줄 내용은 복사하지 않음
+        return tuple(self.cells), tuple(self.rows), tuple(self._heights), tuple(self._column_holes)
+
+    @classmethod
+    def thaw(cls, width, height, frozen, version=0):
+        # freeze로 얻은 상태에서 보드 생성 (줄 객체는 함께 씀)
+        cells, rows, heights, column_holes = frozen
+        board = cls.__new__(cls)
+        board.width = width
+        board.height = height
+        board.version = version
+        board.full_mask = (1 << width) - 1
+        board.rows = list(rows)
+        board.empty_row = bytes(width)
+        board.cells = list(cells)
+        board._heights = list(heights)
+        board._column_holes = list(column_holes)
+        return board
+
+    @classmethod
+    def from_codes(cls, width, height, cells, version=0):
+        # 칸 코드 줄에서 보드 생성 (행 비트마스크와 열 지표를 다시 계산, 빈 줄은 객체 하나를 함께 씀)
+        board = cls(width, height)
+        board.version = version
+        empty = board.empty_row
+        board.cells = [empty if row == empty else row for row in cells]
+        board.rows = list(map(row_mask, board.cells))
+        for x in range(width):
+            board._rescan_column(x)
+        return board
+
+    @property
+    def grid(self):
+        # 칸별 색상 (빈 칸은 0, 읽기 전용)
+        return CellGrid(self.cells)
+
+    def row_codes(self, y):
+        # y번째 줄의 칸 코드 (복사 없이 저장된 bytes 그대로)
+        return self.cells[y]
+
+    # 읽기 전용 지표 (휴리스틱, HUD용)
+    @property
+    def row_fill(self):
+        # 줄별 채워진 칸 수
+        return tuple(row.bit_count() for row in self.rows)
+
+    @property
+    def column_heights(self):
+        # 열별 높이 (바닥부터 가장 위 블록까지의 칸 수, 빈 열은 0)
+        return tuple(self._heights)
+
+    @property
+    def column_holes(self):
+        # 열별 구멍 수 (가장 위 블록 아래의 빈 칸)
+        return tuple(self._column_holes)
+
+    @property
+    def holes(self):
+        return sum(self._column_holes)
+
+    @property
+    def aggregate_height(self):
+        return sum(self._heights)
+
+    @property
+    def max_height(self):
+        return max(self._heights)
+
+    @property
+    def bumpiness(self):
+        heights = self._heights
+        return sum(abs(heights[i] - heights[i + 1]) for i in range(self.width - 1))
+
+    def landing_y(self, bottoms, x):
+        # 열 높이 위에 떨어진 조각의 y 좌표 (bottoms: 조각의 열별 가장 아래 칸)
+        # 조각이 이미 어떤 열의 맨 위 블록보다 아래에 있으면 이 값은 맞지 않음 (호출하는 쪽에서 확인)
+        heights = self._heights
+        height = self.height - 1
+        return min(height - heights[x + dx] - bottom for dx, bottom in enumerate(bottoms))
+
+    def collides(self, masks, x, y):
+        # 행마다 이동한 마스크와 AND 연산 한 번으로 충돌 확인
+        if x < 0 or y < 0 or y + len(masks) > self.height:
+            return self._collides_edge(masks, x, y)
+        rows = self.rows
+        full_mask = self.full_mask
+        for mask in masks:
+            shifted = mask << x
+            if shifted > full_mask or rows[y] & shifted:
+                return True  # 오른쪽 벽 밖 또는 블록과 겹침
+            y += 1
+        return False
+
+    def _collides_edge(self, masks, x, y):
+        # 왼쪽 벽, 보드 위쪽 또는 바닥에 걸친 경우
+        rows = self.rows
+        for dy, mask in enumerate(masks):
+            if x >= 0:
+                shifted = mask << x
+            elif mask & ((1 << -x) - 1):
+                return True
+            else:
+                shifted = mask >> -x
+            if shifted > self.full_mask:
+                return True
+            pos_y = y + dy
+            if shifted and pos_y >= self.height:
+                return True
+            if pos_y >= 0 and rows[pos_y] & shifted:
+                return True
+        return False
+
+    def place(self, masks, x, y, color):
+        # 조각을 보드에 고정 (보드 밖의 칸은 무시)
+        # 조각이 채운 칸만 보고 열 높이와 구멍 수를 갱신
+        self.version += 1
+        height = self.height
+        rows = self.rows
+        heights = self._heights
+        column_holes = self._column_holes
+        code = cell_code(color)
+        for dy, mask in enumerate(masks):
+            pos_y = y + dy
+            if not 0 <= pos_y < height:
+                continue
+            shifted = (mask << x if x >= 0 else mask >> -x) & self.full_mask
+            added = shifted & ~rows[pos_y]
+            if not added:
+                continue
+            rows[pos_y] |= added
+            code_row = bytearray(self.cells[pos_y])
+            for pos_x in mask_columns(added):
+                code_row[pos_x] = code
+                top = height - heights[pos_x]
+                if pos_y > top:
+                    # 맨 위 블록 아래의 구멍을 채움
+                    column_holes[pos_x] -= 1
+                else:
+                    # 새 맨 위 블록: 기존 맨 위 블록과의 사이는 구멍
+                    # (같은 조각이 나중에 채우는 칸은 위의 경우로 다시 빠짐)
+                    column_holes[pos_x] += top - pos_y - 1
+                    heights[pos_x] = height - pos_y
+            self.cells[pos_y] = bytes(code_row)
+
+    def full_rows(self, rows=None):
+        # 가득 찬 줄 목록 (아래쪽부터), rows를 주면 그 줄들만 확인 (방금 고정한 조각의 줄)
+        board_rows = self.rows
+        full_mask = self.full_mask
+        height = self.height
+        if rows is None:
+            rows = range(height)
+        full = [y for y in rows if 0 <= y < height and board_rows[y] == full_mask]
+        if len(full) > 1:
+            full.sort(reverse=True)
+        return full
+
+    def insert_garbage(self, count, hole, color):
+        # 아래쪽에 hole 열만 빈 줄 count개를 넣고 전체를 위로 밀어 올림
+        # 보드 위로 밀려난 블록이 있으면 True
+        self.version += 1
+        count = min(count, self.height)
+        overflow = any(self.rows[:count])
+        garbage = self.full_mask & ~(1 << hole)
+        self.rows = self.rows[count:] + [garbage] * count
+        code_row = bytearray([cell_code(color)]) * self.width
+        code_row[hole] = 0
+        self.cells = self.cells[count:] + [bytes(code_row)] * count
+        for x in range(self.width):
+            self._rescan_column(x)
+        return overflow
+
+    def clear_rows(self, rows):
+        # 제거할 줄을 빼고 남은 줄을 아래로 모은 뒤 위쪽을 빈 줄로 채움 (한 번의 압축)
+        self.version += 1
+        cleared = set(rows)
+        height = self.height
+        keep = [y for y in range(height) if y not in cleared]
+        count = height - len(keep)
+        self.rows = [0] * count + [self.rows[y] for y in keep]
+        self.cells = [self.empty_row] * count + [self.cells[y] for y in keep]
+
+        # 가득 찬 줄은 모든 열의 맨 위 블록 이하에 있으므로 높이는 count만큼 낮아지고 구멍 수는 그대로,
+        # 맨 위 블록이 있던 줄이 지워진 열만 다시 계산
+        heights = self._heights
+        for x in range(self.width):
+            if height - heights[x] in cleared:
+                self._rescan_column(x)
+            else:
+                heights[x] -= count
+
+    def _rescan_column(self, x):
+        bit = 1 << x
+        rows = self.rows
+        top = 0
+        while top < self.height and not rows[top] & bit:
+            top += 1
+        filled = sum(1 for y in range(top, self.height) if rows[y] & bit)
+        self._heights[x] = self.height - top
+        self._column_holes[x] = self.height - top - filled
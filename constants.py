@@ -0,0 +1,41 @@
+# 게임 로직과 화면에서 함께 쓰는 상수
+
+# 색상 정의
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GRAY = (128, 128, 128)
+DARK_GRAY = (51, 51, 51)  # #333333에 해당하는 RGB 값
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+CYAN = (0, 255, 255)
+MAGENTA = (255, 0, 255)
+YELLOW = (255, 255, 0)
+ORANGE = (255, 165, 0)
+
+# 테트리미노 모양 정의
+SHAPES = [
+    [[1, 1, 1, 1]],  # I
+    [[1, 1], [1, 1]],  # O
+    [[1, 1, 1], [0, 1, 0]],  # T
+    [[1, 1, 1], [1, 0, 0]],  # L
+    [[1, 1, 1], [0, 0, 1]],  # J
+    [[1, 1, 0], [0, 1, 1]],  # Z
+    [[0, 1, 1], [1, 1, 0]]   # S
+]
+
+# 테트리미노 색상 정의
+SHAPE_COLORS = [CYAN, YELLOW, MAGENTA, ORANGE, BLUE, RED, GREEN]
+
+# 칸 색상 <-> 작은 정수 코드 (0 빈 칸, 1~7 조각, 8 쓰레기 줄) - 네트워크 전송과 상태 스트림용
+CELL_CODES = {color: i + 1 for i, color in enumerate(SHAPE_COLORS)}
+CELL_CODES[GRAY] = len(SHAPE_COLORS) + 1
+CODE_COLORS = {code: color for color, code in CELL_CODES.items()}
+
+# 보드 크기
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+
+# 한 번에 지운 줄 수에 따른 기본 점수 (레벨을 곱함)
+LINE_SCORES = [0, 100, 300, 500, 800]
+LINES_PER_LEVEL = 10
@@ -0,0 +1,328 @@
+# 화면 없이 동작하는 테트리스 게임 엔진
+# pygame 없이 고정 틱 단위로 게임 규칙(이동, 회전, 고정, 줄 제거, 점수, 레벨)을 진행한다.
+import random
+import sys
+import time
+
+from board import BitBoard
+from gamestate import GameState
+from constants import SHAPES, GRAY, GRID_WIDTH, GRID_HEIGHT, LINE_SCORES, LINES_PER_LEVEL
+from pieces import PIECE_SHAPES, PIECE_MASKS, PIECE_BOTTOMS, KICKS, ROTATION_COUNT, make_piece, set_rotation
+
+# 입력 동작
+ACTION_NONE = 0
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_DOWN = 3
+ACTION_ROTATE = 4
+ACTION_HARD_DROP = 5
+ACTIONS = (ACTION_NONE, ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_HARD_DROP)
+
+# 초당 로직 틱 수 (기존 60 FPS 루프와 같은 속도)
+TICK_RATE = 60
+
+# 새 조각은 가장 높은 블록보다 이만큼 위에서 나옴 (기본 크기 보드에서는 항상 맨 위)
+SPAWN_GAP = GRID_HEIGHT
+
+
+class TetrisEngine:
+    def __init__(self, seed=None, tick_rate=TICK_RATE, animations=True, board_class=BitBoard,
+                 width=GRID_WIDTH, height=GRID_HEIGHT):
+        # seed: 조각 생성용 난수 시드 (게임마다 독립된 RNG 사용)
+        # animations: False이면 하드 드롭과 줄 제거 효과를 기다리지 않고 즉시 처리
+        # board_class: 보드 백엔드 (BitBoard 또는 ListBoard, 게임 결과는 동일)
+        # width, height: 보드 크기 (수백 열, 수천 줄까지 가능)
+        self.board_class = board_class
+        self.width = width
+        self.height = height
+        self.tick_rate = tick_rate
+        self.animations = animations
+        self.rng = random.Random(seed)
+        self.cached_rng_state = None  # 마지막으로 읽은 RNG 상태 (조각을 새로 뽑으면 None)
+        # 단계별 시간 측정 (profiler.FrameProfiler, 없으면 None)
+        self.profiler = None
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
+            self.cached_rng_state = None
+
+        self.board = self.board_class(self.width, self.height)
+        self.landing_cache = {}
+        self.landing_version = self.board.version
+        self.current_piece = self.new_piece()
+        self.current_piece['y'] = self.spawn_row()
+        self.next_piece = self.new_piece()
+        self.game_over = False
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.pieces_placed = 0
+        self.fall_speed = 0.5  # 초당 한 칸씩 떨어짐
+        self.tick = 0
+        self.last_fall_tick = 0
+
+        # 줄 제거 효과
+        self.lines_to_clear = []
+        self.clear_effect_tick = 0
+        self.clear_effect_duration = 1.0  # 효과 지속 시간 (초)
+
+        # 하드 드롭 애니메이션
+        self.hard_drop_active = False
+        self.hard_drop_start_tick = 0
+        self.hard_drop_duration = 0.15  # 하드 드롭 애니메이션 지속 시간 (초)
+        self.hard_drop_start_y = 0
+        self.hard_drop_end_y = 0
+        self.hard_drop_piece = None
+
+        # 대전에서 받은 쓰레기 줄 [(줄 수, 구멍 열)] (다음 조각이 나올 때 보드 아래에 추가)
+        self.pending_garbage = []
+
+    def snapshot(self):
+        # 현재 상태의 gamestate.GameState (restore로 되돌림, RNG 상태 포함)
+        return GameState.capture(self)
+
+    def restore(self, state):
+        # snapshot으로 저장한 상태로 되돌림 (같은 스냅샷을 여러 번 복원할 수 있음)
+        state.apply_to(self)
+
+    def rng_state(self):
+        # RNG 상태 튜플 (RNG는 new_piece에서만 쓰므로 새 조각을 뽑기 전까지는 같은 튜플을 다시 씀)
+        if self.cached_rng_state is None:
+            self.cached_rng_state = self.rng.getstate()
+        return self.cached_rng_state
+
+    def set_rng_state(self, state):
+        if state is not self.cached_rng_state:
+            self.rng.setstate(state)
+            self.cached_rng_state = state
+
+    @property
+    def grid(self):
+        # 칸별 색상 (빈 칸은 0)
+        return self.board.grid
+
+    def seconds_to_ticks(self, seconds):
+        return max(1, int(round(seconds * self.tick_rate)))
+
+    def new_piece(self):
+        # 새로운 테트리미노 생성
+        self.cached_rng_state = None
+        shape_idx = self.rng.randint(0, len(SHAPES) - 1)
+        return make_piece(shape_idx, self.width)
+
+    def spawn_row(self):
+        # 새 조각이 나오는 줄 (높은 보드에서는 가장 높은 블록보다 SPAWN_GAP줄 위)
+        return max(0, self.height - self.board.max_height - SPAWN_GAP)
+
+    def valid_position(self, piece, x_offset=0, y_offset=0):
+        # 테트리미노가 유효한 위치에 있는지 확인
+        return not self.board.collides(piece['masks'], piece['x'] + x_offset, piece['y'] + y_offset)
+
+    def rotate_piece(self, piece):
+        # 테트리미노 회전 (미리 계산된 회전 상태 조회)
+        return PIECE_SHAPES[piece['kind']][(piece['rotation'] + 1) % ROTATION_COUNT]
+
+    def try_rotate(self):
+        # 테트리미노 회전 시도, 막히면 벽 차기 오프셋을 차례로 시도
+        piece = self.current_piece
+        kind = piece['kind']
+        rotation = piece['rotation']
+        next_rotation = (rotation + 1) % ROTATION_COUNT
+        masks = PIECE_MASKS[kind][next_rotation]
+
+        for dx, dy in KICKS[kind][rotation]:
+            if not self.board.collides(masks, piece['x'] + dx, piece['y'] + dy):
+                set_rotation(piece, next_rotation)
+                piece['x'] += dx
+                piece['y'] += dy
+                return True
+        return False
+
+    def drop_position(self, piece):
+        # 조각이 떨어졌을 때 도착하는 y 좌표
+        # 열 높이와 조각의 아래쪽 윤곽으로 구한 착지 위치를 (종류, 회전, x)별로 캐시 (보드가 바뀌면 비움)
+        board = self.board
+        if self.landing_version != board.version:
+            self.landing_cache.clear()
+            self.landing_version = board.version
+        key = (piece['kind'], piece['rotation'], piece['x'])
+        landing = self.landing_cache.get(key)
+        if landing is None:
+            landing = self.landing_cache[key] = board.landing_y(PIECE_BOTTOMS[piece['kind']][piece['rotation']],
+                                                                piece['x'])
+        if piece['y'] <= landing:
+            return landing
+
+        # 튀어나온 블록 아래로 들어간 조각은 한 칸씩 확인
+        distance = 0
+        while self.valid_position(piece, y_offset=distance + 1):
+            distance += 1
+        return piece['y'] + distance
+
+    def accepts_input(self):
+        # 효과 중에는 입력 무시
+        return not self.game_over and not self.lines_to_clear and not self.hard_drop_active
+
+    def apply(self, action):
+        # 입력 하나를 처리 (시간은 진행하지 않음)
+        # 이번 입력으로 가득 찬 줄 목록을 반환
+        if action == ACTION_NONE or not self.accepts_input():
+            return []
+
+        piece = self.current_piece
+        if action == ACTION_LEFT:
+            if self.valid_position(piece, x_offset=-1):
+                piece['x'] -= 1
+        elif action == ACTION_RIGHT:
+            if self.valid_position(piece, x_offset=1):
+                piece['x'] += 1
+        elif action == ACTION_DOWN:
+            if self.valid_position(piece, y_offset=1):
+                piece['y'] += 1
+        elif action == ACTION_ROTATE:
+            self.try_rotate()
+        elif action == ACTION_HARD_DROP:
+            end_y = self.drop_position(piece)
+            if not self.animations:
+                piece['y'] = end_y
+                return self.lock_piece()
+
+            # 하드 드롭 애니메이션 시작
+            self.hard_drop_start_y = float(piece['y'])
+            self.hard_drop_end_y = float(end_y)
+            self.hard_drop_piece = piece.copy()
+            self.hard_drop_active = True
+            self.hard_drop_start_tick = self.tick
+        return []
+
+    def step(self, action=ACTION_NONE):
+        # 입력을 처리하고 로직을 한 틱 진행
+        # 이번 틱에 가득 찬 줄 목록을 반환 (줄 제거 효과 시작 시점)
+        profiler = self.profiler
+        full_rows = list(self.apply(action))
+        self.tick += 1
+
+        # 하드 드롭 애니메이션 처리
+        if (self.hard_drop_active and
+                self.tick - self.hard_drop_start_tick >= self.seconds_to_ticks(self.hard_drop_duration)):
+            self.hard_drop_active = False
+            # 최종 위치로 이동
+            self.current_piece['y'] = int(self.hard_drop_end_y)
+            full_rows.extend(self.lock_piece())
+        if profiler:
+            profiler.mark('hard_drop')
+
+        # 줄 제거 효과 처리
+        if (self.lines_to_clear and
+                self.tick - self.clear_effect_tick >= self.seconds_to_ticks(self.clear_effect_duration)):
+            self.clear_lines(self.lines_to_clear)
+        if profiler:
+            profiler.mark('line_clear')
+
+        # 자동 낙하 (효과 중에는 낙하 중지)
+        if (not self.game_over and not self.lines_to_clear and not self.hard_drop_active and
+                self.tick - self.last_fall_tick >= self.seconds_to_ticks(self.fall_speed)):
+            if self.valid_position(self.current_piece, y_offset=1):
+                self.current_piece['y'] += 1
+            else:
+                full_rows.extend(self.lock_piece())
+            self.last_fall_tick = self.tick
+        if profiler:
+            profiler.mark('auto_fall')
+
+        return full_rows
+
+    def lock_piece(self):
+        # 테트리미노를 그리드에 고정하고 가득 찬 줄 목록을 반환
+        piece = self.current_piece
+        self.board.place(piece['masks'], piece['x'], piece['y'], piece['color'])
+        self.pieces_placed += 1
+
+        # 완성된 줄 확인 (조각이 놓인 줄만)
+        full_rows = self.board.full_rows(range(piece['y'], piece['y'] + len(piece['masks'])))
+
+        if not full_rows:
+            # 완성된 줄이 없으면 바로 다음 테트리미노 설정
+            self.spawn_next()
+        elif self.animations:
+            # 완성된 줄이 있으면 효과 시작, 다음 테트리미노는 효과가 끝난 후에 설정됨
+            self.lines_to_clear = full_rows
+            self.clear_effect_tick = self.tick
+        else:
+            self.clear_lines(full_rows)
+        return full_rows
+
+    def clear_lines(self, rows):
+        # 줄 제거 및 점수 계산
+        lines_cleared = len(rows)
+        self.board.clear_rows(rows)
+
+        self.score += LINE_SCORES[min(lines_cleared, 4)] * self.level
+        self.lines_cleared += lines_cleared
+        self.level = self.lines_cleared // LINES_PER_LEVEL + 1
+        self.fall_speed = max(0.05, 0.5 - (self.level - 1) * 0.05)
+
+        # 효과 종료
+        self.lines_to_clear = []
+        self.spawn_next()
+
+    def add_garbage(self, lines, hole):
+        # 상대가 보낸 쓰레기 줄 예약 (hole: 비어 있는 열)
+        if lines > 0:
+            self.pending_garbage.append((lines, hole))
+
+    def spawn_next(self):
+        # 다음 테트리미노 설정
+        self.current_piece = self.next_piece
+        self.next_piece = self.new_piece()
+
+        # 예약된 쓰레기 줄 추가 (블록이 보드 위로 밀려나면 게임 오버)
+        for lines, hole in self.pending_garbage:
+            if self.board.insert_garbage(lines, hole, GRAY):
+                self.game_over = True
+        self.pending_garbage = []
+        self.current_piece['y'] = self.spawn_row()
+
+        # 게임 오버 확인
+        if not self.valid_position(self.current_piece):
+            self.game_over = True
+
+    def clear_effect_progress(self, alpha=0.0):
+        # 줄 제거 효과 진행률 (0.0 ~ 1.0), alpha: 다음 틱까지 진행한 비율 (그리기 보간용)
+        return min(1.0, (self.tick + alpha - self.clear_effect_tick) / (self.clear_effect_duration * self.tick_rate))
+
+    def hard_drop_progress(self, alpha=0.0):
+        # 하드 드롭 애니메이션 진행률 (0.0 ~ 1.0), alpha: 다음 틱까지 진행한 비율 (그리기 보간용)
+        return min(1.0, (self.tick + alpha - self.hard_drop_start_tick) / (self.hard_drop_duration * self.tick_rate))
+
+
+def random_policy(engine, rng):
+    # 무작위 입력을 고르는 간단한 정책 (처리량 측정용)
+    return rng.choice(ACTIONS)
+
+
+def play_game(engine, policy, rng, max_ticks=None):
+    # 게임 오버(또는 max_ticks)까지 한 판을 진행
+    while not engine.game_over:
+        if max_ticks is not None and engine.tick >= max_ticks:
+            break
+        engine.step(policy(engine, rng))
+    return engine
+
+
+if __name__ == "__main__":
+    # 헤드리스 처리량 측정: python engine.py [게임 수]
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    engine = TetrisEngine(seed=0, animations=False)
+    rng = random.Random(0)
+    ticks = 0
+    start = time.perf_counter()
+    for i in range(games):
+        engine.reset(seed=i)
+        play_game(engine, random_policy, rng)
+        ticks += engine.tick
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {ticks} ticks in {elapsed:.2f}s "
+          f"({games / elapsed:.1f} games/s, {ticks / elapsed:.0f} ticks/s)")
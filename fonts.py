@@ -0,0 +1,80 @@
+# 글꼴 찾기와 지연 로딩
+# 시스템 글꼴 목록 읽기(리눅스에서는 fc-list 실행)는 느리므로, 후보 이름 목록으로 찾은 글꼴 파일 경로를
+# 캐시 파일에 저장해 다음 실행부터는 목록을 읽지 않는다. 글꼴은 처음 글자를 그릴 때 크기별로 한 번만 연다.
+import json
+import os
+
+import pygame
+
+FONT_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'tetris', 'fonts.json'
+)
+
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path, cache):
+    # 캐시를 쓰지 못해도 게임은 계속 (다음 실행에서 다시 찾음)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(cache, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def resolve_font(names, cache_path=FONT_CACHE_PATH):
+    # names 중 시스템에 있는 첫 글꼴의 파일 경로 (없으면 None = pygame 기본 글꼴)
+    # 캐시된 경로의 파일이 사라졌으면 다시 찾음 (글꼴을 새로 설치했으면 캐시 파일을 지우면 됨)
+    key = ','.join(names)
+    cache = load_cache(cache_path) if cache_path else {}
+    if key in cache and (cache[key] is None or os.path.exists(cache[key])):
+        return cache[key]
+    path = pygame.font.match_font(names) if names else None
+    if cache_path:
+        cache[key] = path
+        save_cache(cache_path, cache)
+    return path
+
+
+class FontLoader:
+    def __init__(self, names, cache_path=FONT_CACHE_PATH, timer=None):
+        # names: 우선순위 순 글꼴 이름, timer: 시작 시간 측정 (글꼴을 여는 시간을 'fonts' 단계로 기록)
+        self.names = tuple(names)
+        self.cache_path = cache_path
+        self.timer = timer
+        self.path = None
+        self.resolved = False
+        self.fonts = {}
+
+    def get(self, size):
+        # size 크기의 글꼴 (처음 요청할 때 font 모듈 초기화, 경로 찾기, 파일 열기)
+        font = self.fonts.get(size)
+        if font is None:
+            timer = self.timer if self.timer and not self.timer.done else None
+            if timer:
+                resumed = timer.current
+                timer.begin('fonts')
+            if not pygame.font.get_init():
+                pygame.font.init()
+            if not self.resolved:
+                self.path = resolve_font(self.names, self.cache_path)
+                self.resolved = True
+            try:
+                font = pygame.font.Font(self.path, size)
+            except (OSError, pygame.error):
+                # 캐시된 파일을 열 수 없으면 기본 글꼴
+                font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+            if timer:
+                timer.begin(resumed)
+        return font
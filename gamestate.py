@@ -0,0 +1,163 @@
+# 게임 상태 스냅샷
+# 보드, 현재/다음 조각, 점수, 레벨, 줄 수, 타이머, RNG 상태를 바꿀 수 없는 값(bytes 줄, 정수 튜플)으로만 담는다.
+# 모든 값을 함께 쓸 수 있으므로 복제는 슬롯 몇 개의 참조 복사로 끝나고 (보드 크기와 무관),
+# 엔진에서 캡처할 때도 줄 리스트를 튜플로 옮길 뿐 줄 내용은 복사하지 않는다. RNG 상태 튜플은
+# 엔진이 새 조각을 뽑기 전까지 같은 객체를 다시 쓰므로 연속한 캡처는 RNG 상태도 함께 쓴다.
+# to_bytes/from_bytes는 고정 형식 바이트열(헤더, 값, 조각, RNG 상태, 칸당 1바이트)로 바꾸고
+# (기본 10 x 20 보드에서 약 2.9KB(2857바이트), 그중 RNG 상태가 약 2.5KB),
+# digest는 프로세스나 실행 환경과 무관하게 같은 상태면 같은 8바이트 해시를 준다.
+import hashlib
+import struct
+
+from board import BitBoard
+from pieces import piece_state, piece_from_state
+
+STATE_MAGIC = b'TSTA'
+STATE_VERSION = 1
+HEADER = struct.Struct('<4sBHHQ')  # 매직, 형식 버전, 너비, 높이, 보드 버전
+
+# 그대로 복사되는 엔진 값과 직렬화 형식 (보드, 조각, 줄 목록, RNG는 따로)
+FIELDS = (
+    ('game_over', '?'), ('score', 'q'), ('level', 'q'), ('lines_cleared', 'q'), ('pieces_placed', 'q'),
+    ('fall_speed', 'd'), ('tick', 'q'), ('last_fall_tick', 'q'),
+    ('clear_effect_tick', 'q'), ('clear_effect_duration', 'd'),
+    ('hard_drop_active', '?'), ('hard_drop_start_tick', 'q'), ('hard_drop_duration', 'd'),
+    ('hard_drop_start_y', 'd'), ('hard_drop_end_y', 'd'),
+)
+STATE_FIELDS = tuple(name for name, _ in FIELDS)
+VALUES = struct.Struct('<' + ''.join(code for _, code in FIELDS))
+PIECE = struct.Struct('<bBhh')  # 종류 (-1은 없음), 회전, x, y
+COUNT = struct.Struct('<H')
+RNG = struct.Struct('<BH?d')  # 버전, 내부 상태 길이, gauss_next 여부, gauss_next
+NO_PIECE = (-1, 0, 0, 0)
+
+
+class GameState:
+    __slots__ = ('width', 'height', 'version', 'board', 'pieces', 'values', 'clearing', 'garbage', 'rng')
+
+    def __init__(self, width, height, version, board, pieces, values, clearing, garbage, rng):
+        # board: (칸 코드 줄, 행 비트마스크, 열 높이, 열별 구멍 수) 튜플 (board.freeze)
+        # pieces: (현재 조각, 다음 조각, 하드 드롭 중인 조각) 각각 (종류, 회전, x, y) 또는 None
+        # values: STATE_FIELDS 순서의 값, clearing: 지울 줄, garbage: 예약된 쓰레기 줄 (줄 수, 구멍 열)
+        # rng: random.Random.getstate() 튜플
+        # version: 캡처할 때의 보드 버전 (캐시 무효화용, 비교와 해시에는 쓰지 않음)
+        self.width = width
+        self.height = height
+        self.version = version
+        self.board = board
+        self.pieces = pieces
+        self.values = values
+        self.clearing = clearing
+        self.garbage = garbage
+        self.rng = rng
+
+    @classmethod
+    def capture(cls, engine):
+        # 엔진의 현재 상태 (줄과 RNG 상태 튜플은 복사하지 않고 함께 씀)
+        return cls(
+            engine.width, engine.height, engine.board.version, engine.board.freeze(),
+            (piece_state(engine.current_piece), piece_state(engine.next_piece), piece_state(engine.hard_drop_piece)),
+            tuple([getattr(engine, name) for name in STATE_FIELDS]),
+            tuple(engine.lines_to_clear), tuple(engine.pending_garbage), engine.rng_state(),
+        )
+
+    def apply_to(self, engine):
+        # 엔진을 이 상태로 되돌림 (같은 상태를 여러 번 적용할 수 있음)
+        for name, value in zip(STATE_FIELDS, self.values):
+            setattr(engine, name, value)
+        engine.width = self.width
+        engine.height = self.height
+        engine.board = engine.board_class.thaw(self.width, self.height, self.board, self.version)
+        engine.landing_cache = {}
+        engine.landing_version = self.version
+        current, following, dropping = self.pieces
+        engine.current_piece = piece_from_state(current)
+        engine.next_piece = piece_from_state(following)
+        engine.hard_drop_piece = piece_from_state(dropping)
+        engine.lines_to_clear = list(self.clearing)
+        engine.pending_garbage = list(self.garbage)
+        engine.set_rng_state(self.rng)
+
+    def clone(self):
+        # 모든 값을 함께 쓰는 복사본 (보드 크기와 무관한 O(1))
+        state = GameState.__new__(GameState)
+        state.width = self.width
+        state.height = self.height
+        state.version = self.version
+        state.board = self.board
+        state.pieces = self.pieces
+        state.values = self.values
+        state.clearing = self.clearing
+        state.garbage = self.garbage
+        state.rng = self.rng
+        return state
+
+    __copy__ = clone
+
+    def key(self):
+        # 비교와 해시에 쓰는 값 (보드 버전 제외)
+        return (self.width, self.height, self.board[0], self.pieces, self.values, self.clearing, self.garbage,
+                self.rng)
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return self is other or self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def payload(self):
+        # 헤더를 뺀 직렬화 내용 (값, 조각, 줄 목록, RNG 상태, 칸 코드)
+        rng_version, internal, gauss = self.rng
+        parts = [VALUES.pack(*self.values)]
+        parts.extend(PIECE.pack(*(piece or NO_PIECE)) for piece in self.pieces)
+        parts.append(COUNT.pack(len(self.clearing)))
+        parts.append(struct.pack(f'<{len(self.clearing)}H', *self.clearing))
+        parts.append(COUNT.pack(len(self.garbage)))
+        parts.append(struct.pack(f'<{len(self.garbage) * 2}H', *(value for pair in self.garbage for value in pair)))
+        parts.append(RNG.pack(rng_version, len(internal), gauss is not None, gauss or 0.0))
+        parts.append(struct.pack(f'<{len(internal)}I', *internal))
+        parts.extend(self.board[0])
+        return b''.join(parts)
+
+    def to_bytes(self):
+        return HEADER.pack(STATE_MAGIC, STATE_VERSION, self.width, self.height, self.version) + self.payload()
+
+    @classmethod
+    def from_bytes(cls, data):
+        # to_bytes로 만든 바이트열에서 상태 생성 (행 비트마스크와 열 지표는 칸 코드에서 다시 계산)
+        magic, version, width, height, board_version = HEADER.unpack_from(data)
+        if magic != STATE_MAGIC or version != STATE_VERSION:
+            raise ValueError("게임 상태 형식이 아님")
+        pos = HEADER.size
+        values = VALUES.unpack_from(data, pos)
+        pos += VALUES.size
+        pieces = []
+        for _ in range(3):
+            piece = PIECE.unpack_from(data, pos)
+            pos += PIECE.size
+            pieces.append(None if piece[0] < 0 else piece)
+        count, = COUNT.unpack_from(data, pos)
+        clearing = struct.unpack_from(f'<{count}H', data, pos + COUNT.size)
+        pos += COUNT.size + count * 2
+        count, = COUNT.unpack_from(data, pos)
+        flat = struct.unpack_from(f'<{count * 2}H', data, pos + COUNT.size)
+        garbage = tuple(zip(flat[::2], flat[1::2]))
+        pos += COUNT.size + count * 4
+        rng_version, length, has_gauss, gauss = RNG.unpack_from(data, pos)
+        internal = struct.unpack_from(f'<{length}I', data, pos + RNG.size)
+        pos += RNG.size + length * 4
+        if len(data) != pos + width * height:
+            raise ValueError("게임 상태 길이가 맞지 않음")
+        cells = [data[pos + y * width:pos + (y + 1) * width] for y in range(height)]
+        board = BitBoard.from_codes(width, height, cells).freeze()
+        return cls(width, height, board_version, board, tuple(pieces), values, clearing, garbage,
+                   (rng_version, internal, gauss if has_gauss else None))
+
+    def digest(self):
+        # 안정적인 8바이트 해시 (보드 버전 제외, 같은 상태면 프로세스와 무관하게 같은 값)
+        h = hashlib.blake2b(digest_size=8)
+        h.update(struct.pack('<HH', self.width, self.height))
+        h.update(self.payload())
+        return h.digest()
@@ -0,0 +1,570 @@
+# OpenGL 렌더러
+# 보드 칸, 조각, 잔상, 파티클, 글자를 모두 사각형 인스턴스(위치, 크기, 텍스처 좌표, 색)로 만들어
+# 프레임마다 정점 버퍼 하나에 올리고 glDrawArraysInstanced 한 번으로 그린다.
+# 텍스처는 아틀라스 하나에 흰 텍셀(단색 사각형), 흰 원(파티클), 글리프를 함께 두고 색을 곱해 쓴다.
+# 글리프는 처음 쓰일 때 한 번만 아틀라스에 올리고, 글자 줄은 슬롯별로 인스턴스 배열을 캐시한다.
+#
+# 화면이 없는 CI에서는 Mesa 소프트웨어 렌더러(llvmpipe)의 EGL surfaceless 또는 OSMesa 컨텍스트를 만들어
+# 프레임버퍼 객체에 그린다 (PYOPENGL_PLATFORM=egl 또는 osmesa, SDL dummy 드라이버에서는 egl이 기본값).
+import ctypes
+import os
+import random
+
+# SDL dummy 드라이버(화면 없음)에서는 창 컨텍스트를 만들 수 없으므로 OpenGL을 불러오기 전에 헤드리스 플랫폼 지정
+if os.environ.get('SDL_VIDEODRIVER') == 'dummy':
+    os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+    os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+import numpy as np
+import pygame
+from OpenGL import GL
+
+from constants import BLACK, DARK_GRAY, WHITE
+from particles import ALPHA_BUCKETS
+
+VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec2 corner;
+layout(location = 1) in vec4 rect;
+layout(location = 2) in vec4 uv;
+layout(location = 3) in vec4 color;
+uniform vec2 screen;
+out vec2 v_uv;
+out vec4 v_color;
+void main() {
+    vec2 pos = rect.xy + corner * rect.zw;
+    gl_Position = vec4(pos.x / screen.x * 2.0 - 1.0, 1.0 - pos.y / screen.y * 2.0, 0.0, 1.0);
+    v_uv = mix(uv.xy, uv.zw, corner);
+    v_color = color;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330 core
+in vec2 v_uv;
+in vec4 v_color;
+uniform sampler2D atlas;
+out vec4 frag;
+void main() {
+    frag = texture(atlas, v_uv) * v_color;
+}
+"""
+
+# 인스턴스 하나 = x, y, w, h, u0, v0, u1, v1, r, g, b, a (float32)
+INSTANCE_FLOATS = 12
+ATLAS_SIZE = 1024
+CIRCLE_SIZE = 64  # 아틀라스의 원 지름 (파티클은 이 원을 줄여서 그림)
+GLYPH_PADDING = 1  # 선형 보간 때 옆 글리프가 번지지 않도록 둘레에 비워 두는 텍셀
+
+
+class GlyphAtlas:
+    def __init__(self, size=ATLAS_SIZE):
+        # 한 줄씩 채우는 단순한 선반 배치 (가득 차면 글리프를 모두 비우고 다시 채움)
+        self.size = size
+        self.texture = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, size, size, 0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE,
+                        bytes(size * size * 4))
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE)
+        self.glyphs = {}
+        self.generation = -1  # reset할 때마다 증가 (이전 텍스처 좌표를 담은 캐시 무효화용)
+        self.reset()
+
+    def reset(self):
+        self.glyphs = {}
+        self.generation += 1
+        self.x = self.y = self.row_height = 0
+        # 단색 사각형용 흰 텍셀과 파티클용 흰 원
+        white = pygame.Surface((4, 4), pygame.SRCALPHA)
+        white.fill((255, 255, 255, 255))
+        u0, v0, _, _ = self.add(white)
+        texel = 1.0 / self.size
+        self.white = (u0 + texel, v0 + texel, u0 + texel, v0 + texel)
+        circle = pygame.Surface((CIRCLE_SIZE, CIRCLE_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(circle, (255, 255, 255, 255), (CIRCLE_SIZE // 2, CIRCLE_SIZE // 2), CIRCLE_SIZE // 2)
+        self.circle = self.add(circle)
+
+    def add(self, surface):
+        # surface를 아틀라스에 올리고 텍스처 좌표 (u0, v0, u1, v1) 반환 (자리가 없으면 None)
+        w, h = surface.get_size()
+        pad = GLYPH_PADDING
+        if self.x + w + 2 * pad > self.size:
+            self.x = 0
+            self.y += self.row_height
+            self.row_height = 0
+        if self.y + h + 2 * pad > self.size or w + 2 * pad > self.size:
+            return None
+        x, y = self.x + pad, self.y + pad
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+        GL.glTexSubImage2D(GL.GL_TEXTURE_2D, 0, x, y, w, h, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE,
+                           pygame.image.tostring(surface, 'RGBA'))
+        self.x += w + 2 * pad
+        self.row_height = max(self.row_height, h + 2 * pad)
+        return (x / self.size, y / self.size, (x + w) / self.size, (y + h) / self.size)
+
+    def glyph(self, font, char):
+        # (텍스처 좌표, 너비, 높이) - 처음 쓰는 글자만 렌더링해 올림
+        key = (id(font), char)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            surface = font.render(char, True, WHITE)
+            uv = self.add(surface)
+            if uv is None:
+                # 아틀라스가 가득 참: 비우고 다시 채움 (이전 글자 줄 캐시도 무효화됨)
+                self.reset()
+                uv = self.add(surface)
+            glyph = self.glyphs[key] = (uv, surface.get_width(), surface.get_height())
+        return glyph
+
+
+class HeadlessContext:
+    def __init__(self, width, height):
+        # 창 없이 그리기 위한 OpenGL 3.3 core 컨텍스트와 프레임버퍼 객체
+        platform = os.environ.get('PYOPENGL_PLATFORM')
+        if platform == 'egl':
+            self.init_egl()
+        elif platform == 'osmesa':
+            self.init_osmesa(width, height)
+        else:
+            raise RuntimeError("헤드리스 OpenGL에는 PYOPENGL_PLATFORM=egl 또는 osmesa가 필요함")
+        self.width = width
+        self.height = height
+        self.framebuffer = GL.glGenFramebuffers(1)
+        self.colorbuffer = GL.glGenRenderbuffers(1)
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, self.colorbuffer)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_RGBA8, width, height)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.framebuffer)
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0, GL.GL_RENDERBUFFER, self.colorbuffer)
+        if GL.glCheckFramebufferStatus(GL.GL_FRAMEBUFFER) != GL.GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("프레임버퍼를 만들 수 없음")
+
+    def init_egl(self):
+        from OpenGL import EGL
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("EGL 초기화 실패 (EGL_PLATFORM=surfaceless 확인)")
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        config_attribs = (EGL.EGLint * 5)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE,
+        )
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        if not EGL.eglChooseConfig(display, config_attribs, ctypes.pointer(config), 1, ctypes.pointer(count)) \
+                or not count.value:
+            raise RuntimeError("OpenGL을 지원하는 EGL 설정이 없음")
+        context_attribs = (EGL.EGLint * 7)(
+            EGL.EGL_CONTEXT_MAJOR_VERSION, 3, EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+            EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT, EGL.EGL_NONE,
+        )
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, context_attribs)
+        if not context or not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+            raise RuntimeError("EGL 컨텍스트를 만들 수 없음")
+        self.display = display
+        self.context = context
+
+    def init_osmesa(self, width, height):
+        from OpenGL import arrays, osmesa
+        attribs = [
+            osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+            osmesa.OSMESA_PROFILE, osmesa.OSMESA_CORE_PROFILE,
+            osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 3, osmesa.OSMESA_CONTEXT_MINOR_VERSION, 3,
+            0,
+        ]
+        self.context = osmesa.OSMesaCreateContextAttribs(attribs, None)
+        if not self.context:
+            raise RuntimeError("OSMesa 컨텍스트를 만들 수 없음")
+        # OSMesa 기본 버퍼 (실제 그리기는 프레임버퍼 객체에 함)
+        self.osmesa_buffer = arrays.GLubyteArray.zeros((height, width, 4))
+        if not osmesa.OSMesaMakeCurrent(self.context, self.osmesa_buffer, GL.GL_UNSIGNED_BYTE, width, height):
+            raise RuntimeError("OSMesa 컨텍스트를 활성화할 수 없음")
+
+    def read_pixels(self):
+        # 프레임버퍼 내용 (높이, 너비, RGB) - 위쪽 줄부터
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.framebuffer)
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        data = GL.glReadPixels(0, 0, self.width, self.height, GL.GL_RGB, GL.GL_UNSIGNED_BYTE)
+        return np.frombuffer(data, np.uint8).reshape(self.height, self.width, 3)[::-1]
+
+
+class GLRenderer:
+    def __init__(self, size, cell_size, grid_origin, perf_rect, ghost_alpha, scale=1, headless=False):
+        # size: 게임 화면 크기 (논리 좌표), scale: 실제 그리는 해상도 배율
+        # headless가 아니면 호출하는 쪽이 OPENGL 창을 먼저 만들어 둠
+        self.width, self.height = size
+        self.cell_size = cell_size
+        self.grid_x, self.grid_y = grid_origin
+        self.perf_rect = perf_rect
+        self.ghost_alpha = ghost_alpha
+        self.pixel_size = (int(self.width * scale), int(self.height * scale))
+        self.context = HeadlessContext(*self.pixel_size) if headless else None
+
+        self.program = self.build_program()
+        self.screen_uniform = GL.glGetUniformLocation(self.program, 'screen')
+        self.atlas = GlyphAtlas()
+
+        # 사각형 모서리 4개 (삼각형 띠) + 인스턴스 버퍼
+        self.vao = GL.glGenVertexArrays(1)
+        GL.glBindVertexArray(self.vao)
+        corners = np.array([0, 0, 1, 0, 0, 1, 1, 1], dtype=np.float32)
+        self.corner_buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.corner_buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, corners.nbytes, corners, GL.GL_STATIC_DRAW)
+        GL.glEnableVertexAttribArray(0)
+        GL.glVertexAttribPointer(0, 2, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
+
+        self.instance_buffer = GL.glGenBuffers(1)
+        self.capacity = 0
+        self.reserve(4096)
+        stride = INSTANCE_FLOATS * 4
+        for location in (1, 2, 3):
+            GL.glEnableVertexAttribArray(location)
+            GL.glVertexAttribPointer(location, 4, GL.GL_FLOAT, GL.GL_FALSE, stride,
+                                     ctypes.c_void_p((location - 1) * 16))
+            GL.glVertexAttribDivisor(location, 1)
+
+        GL.glEnable(GL.GL_BLEND)
+        GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+
+        # 프레임 사이에 재사용하는 인스턴스 배열 캐시
+        self.static_instances = None
+        self.static_generation = None  # 고정 레이어를 만들 때의 아틀라스 세대
+        self.board_key = None
+        self.board_instances = None
+        self.next_key = None
+        self.next_instances = None
+        self.text_cache = {}
+        self.instances = 0  # 마지막 프레임의 인스턴스 수
+
+    def build_program(self):
+        def compile_shader(source, kind):
+            shader = GL.glCreateShader(kind)
+            GL.glShaderSource(shader, source)
+            GL.glCompileShader(shader)
+            if not GL.glGetShaderiv(shader, GL.GL_COMPILE_STATUS):
+                raise RuntimeError(GL.glGetShaderInfoLog(shader).decode())
+            return shader
+
+        program = GL.glCreateProgram()
+        for source, kind in ((VERTEX_SHADER, GL.GL_VERTEX_SHADER), (FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER)):
+            GL.glAttachShader(program, compile_shader(source, kind))
+        GL.glLinkProgram(program)
+        if not GL.glGetProgramiv(program, GL.GL_LINK_STATUS):
+            raise RuntimeError(GL.glGetProgramInfoLog(program).decode())
+        return program
+
+    def reserve(self, count):
+        # 인스턴스 버퍼 크기를 count개 이상으로 (두 배씩 늘림)
+        if count <= self.capacity:
+            return
+        self.capacity = max(count, self.capacity * 2)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.instance_buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, self.capacity * INSTANCE_FLOATS * 4, None, GL.GL_STREAM_DRAW)
+
+    # 인스턴스 만들기
+
+    def rect(self, x, y, w, h, color, alpha=255):
+        # 단색 사각형
+        r, g, b = color
+        return (x, y, w, h, *self.atlas.white, r / 255, g / 255, b / 255, alpha / 255)
+
+    def tile(self, x, y, color, size=None, alpha=255):
+        # 테두리가 흰색인 블록 (sprites.BlockSprites.tile/trail과 같은 모양)
+        size = size or self.cell_size
+        if alpha == 255:
+            return [self.rect(x, y, size, size, WHITE), self.rect(x + 1, y + 1, size - 2, size - 2, color)]
+        # 반투명 블록은 테두리와 안쪽이 겹치지 않게 나눠 그림
+        return [
+            self.rect(x, y, size, 1, WHITE, alpha),
+            self.rect(x, y + size - 1, size, 1, WHITE, alpha),
+            self.rect(x, y + 1, 1, size - 2, WHITE, alpha),
+            self.rect(x + size - 1, y + 1, 1, size - 2, WHITE, alpha),
+            self.rect(x + 1, y + 1, size - 2, size - 2, color, alpha),
+        ]
+
+    def shape_tiles(self, shape, color, origin_x, origin_y, alpha=255):
+        cell = self.cell_size
+        quads = []
+        for y, row in enumerate(shape):
+            for x, filled in enumerate(row):
+                if filled:
+                    quads += self.tile(origin_x + x * cell, origin_y + y * cell, color, alpha=alpha)
+        return quads
+
+    def text(self, slot, font, text):
+        # 글자 줄의 인스턴스 배열(원점 기준)과 크기, 슬롯별로 값이 바뀔 때만 다시 만듦
+        # 만드는 중에 아틀라스가 비워지면 앞 글자의 좌표가 무효이므로 처음부터 다시 만듦
+        atlas = self.atlas
+        cached = self.text_cache.get(slot)
+        while cached is None or cached[0] != text or cached[1] is not font or cached[2] != atlas.generation:
+            generation = atlas.generation
+            quads = []
+            for i, char in enumerate(text):
+                if char == ' ':
+                    continue
+                uv, w, h = atlas.glyph(font, char)
+                x = font.size(text[:i])[0] if i else 0
+                quads.append((x, 0, w, h, *uv, 1.0, 1.0, 1.0, 1.0))
+            instances = np.array(quads, dtype=np.float32).reshape(-1, INSTANCE_FLOATS)
+            cached = (text, font, generation, instances, font.size(text))
+            self.text_cache[slot] = cached
+        return cached[3], cached[4]
+
+    def place_text(self, slot, font, text, x, y, center=False):
+        instances, (w, _) = self.text(slot, font, text)
+        placed = instances.copy()
+        placed[:, 0] += x - (w // 2 if center else 0)
+        placed[:, 1] += y
+        return placed
+
+    def static_layer(self, game):
+        # 격자, 다음 조각 영역 테두리 (한 번만 만듦)
+        cell = self.cell_size
+        viewport = game.viewport
+        gx, gy = self.grid_x, self.grid_y
+        quads = []
+        for x in range(viewport.cols + 1):
+            quads.append(self.rect(gx + x * cell, gy, 1, viewport.rows * cell + 1, DARK_GRAY))
+        for y in range(viewport.rows + 1):
+            quads.append(self.rect(gx, gy + y * cell, viewport.cols * cell + 1, 1, DARK_GRAY))
+        nx = game.panel_x
+        size = 6 * cell
+        quads += [
+            self.rect(nx, gy, size, size, BLACK),
+            self.rect(nx, gy, size, 1, WHITE),
+            self.rect(nx, gy + size - 1, size, 1, WHITE),
+            self.rect(nx, gy, 1, size, WHITE),
+            self.rect(nx + size - 1, gy, 1, size, WHITE),
+        ]
+        return np.array(quads, dtype=np.float32)
+
+    def board_layer(self, game):
+        # 보이는 영역의 고정된 블록 (줄 제거 효과가 없으면 보드나 뷰포트가 바뀔 때만 다시 만듦)
+        engine = game.engine
+        viewport = game.viewport
+        lines_to_clear = engine.lines_to_clear
+        key = (engine.board, engine.board.version, viewport.x, viewport.y)  # 보드 객체가 바뀌면 버전이 다시 작아질 수 있음
+        if not lines_to_clear and self.board_key == key:
+            return self.board_instances
+
+        cell = self.cell_size
+        origin_x, origin_y = game.view_origin()
+        grid = engine.grid
+        visible_cols = viewport.visible_cols()
+        quads = []
+        if lines_to_clear:
+            flash_state, expand = game.clear_effect_state()
+        for y in viewport.visible_rows():
+            pos_y = origin_y + y * cell
+            clearing = lines_to_clear and y in lines_to_clear
+            row = grid[y]
+            for x in visible_cols:
+                color = row[x]
+                if color == 0:
+                    continue
+                pos_x = origin_x + x * cell
+                if clearing:
+                    if flash_state == 0:
+                        quads += self.tile(pos_x - expand // 2, pos_y - expand // 2, color, cell + expand)
+                        if random.random() < 0.1:
+                            game.particles.emit(pos_x + cell // 2, pos_y + cell // 2, color)
+                    else:
+                        quads.append(self.rect(pos_x, pos_y, cell, cell, WHITE))
+                else:
+                    quads += self.tile(pos_x, pos_y, color)
+        instances = np.array(quads, dtype=np.float32).reshape(-1, INSTANCE_FLOATS)
+        if not lines_to_clear:
+            self.board_key = key
+            self.board_instances = instances
+        return instances
+
+    def piece_layer(self, game):
+        # 하드 드롭 잔상 또는 고스트와 현재 조각 (보이는 보드 영역 밖의 칸은 뺌)
+        engine = game.engine
+        cell = self.cell_size
+        view_x, view_y = game.view_origin()
+        quads = []
+        if engine.hard_drop_active:
+            piece = engine.hard_drop_piece
+            alpha = int(255 * (1 - engine.hard_drop_progress(game.tick_alpha) * 0.5))
+            # 소프트웨어 렌더러의 잔상 타일과 같은 알파 단계
+            bucket = round(alpha * (ALPHA_BUCKETS - 1) / 255)
+            quads = self.shape_tiles(piece['shape'], piece['color'], view_x + piece['x'] * cell,
+                                     int(view_y + game.hard_drop_y() * cell),
+                                     alpha=bucket * 255 // (ALPHA_BUCKETS - 1))
+        elif not engine.game_over and not engine.lines_to_clear:
+            piece = engine.current_piece
+            origin_x = view_x + piece['x'] * cell
+            ghost_y = engine.drop_position(piece)
+            if ghost_y != piece['y']:
+                bucket = round(self.ghost_alpha * (ALPHA_BUCKETS - 1) / 255)
+                quads += self.shape_tiles(piece['shape'], piece['color'], origin_x, view_y + ghost_y * cell,
+                                          alpha=bucket * 255 // (ALPHA_BUCKETS - 1))
+            quads += self.shape_tiles(piece['shape'], piece['color'], origin_x, view_y + piece['y'] * cell)
+        instances = np.array(quads, dtype=np.float32).reshape(-1, INSTANCE_FLOATS)
+        # 보이는 보드 영역과 겹치지 않는 사각형(뷰포트 아래로 내려간 고스트 등)은 뺌
+        bounds = game.board_rect
+        xs, ys = instances[:, 0], instances[:, 1]
+        inside = (xs >= bounds.left) & (xs < bounds.right) & (ys + instances[:, 3] > bounds.top) & (ys < bounds.bottom)
+        return instances[inside]
+
+    def next_layer(self, game):
+        next_piece = game.engine.next_piece
+        key = (next_piece['kind'], next_piece['rotation'])
+        if key != self.next_key:
+            cell = self.cell_size
+            shape = next_piece['shape']
+            offset_x = (6 - len(shape[0])) // 2
+            offset_y = (6 - len(shape)) // 2
+            self.next_instances = np.array(self.shape_tiles(
+                shape, next_piece['color'],
+                game.panel_x + offset_x * cell,
+                self.grid_y + offset_y * cell,
+            ), dtype=np.float32)
+            self.next_key = key
+        return self.next_instances
+
+    def info_layer(self, game):
+        engine = game.engine
+        info_x = game.panel_x
+        info_y = self.grid_y + 6 * self.cell_size + 20
+        return np.concatenate([
+            self.place_text('score', game.font, f"점수: {engine.score}", info_x, info_y),
+            self.place_text('level', game.font, f"레벨: {engine.level}", info_x, info_y + 40),
+            self.place_text('lines', game.font, f"줄: {engine.lines_cleared}", info_x, info_y + 80),
+        ])
+
+    def particle_layer(self, game):
+        # 파티클 전체를 벡터 연산으로 인스턴스 배열로 만듦
+        particles = game.particles
+        n = len(particles)
+        if not n:
+            return None
+        xs, ys, diameters, colors, buckets = particles.circles()
+        palette = np.array(particles.palette, dtype=np.float32) / 255
+        instances = np.empty((n, INSTANCE_FLOATS), dtype=np.float32)
+        instances[:, 0] = xs
+        instances[:, 1] = ys
+        instances[:, 2] = diameters
+        instances[:, 3] = diameters
+        instances[:, 4:8] = self.atlas.circle
+        instances[:, 8:11] = palette[colors]
+        instances[:, 11] = buckets * 255 // (ALPHA_BUCKETS - 1) / 255
+        return instances
+
+    def message_layer(self, game, title_slot, title_font, title, title_y, body_slot, body, body_y):
+        # 반투명 오버레이와 가운데 정렬한 두 줄
+        cx = self.width // 2
+        return np.concatenate([
+            np.array([self.rect(0, 0, self.width, self.height, BLACK, 128)], dtype=np.float32),
+            self.place_text(title_slot, title_font, title, cx, title_y, center=True),
+            self.place_text(body_slot, game.font, body, cx, body_y, center=True),
+        ])
+
+    def perf_layer(self, game):
+        fps, p50, p99, input_p50, input_p99 = game.perf_stats
+        rect = self.perf_rect
+        x, y = rect.x + 6, rect.y + 5
+        font = game.perf_font
+        return np.concatenate([
+            np.array([self.rect(rect.x, rect.y, rect.w, rect.h, BLACK, 128)], dtype=np.float32),
+            self.place_text('perf_fps', font, f"FPS {fps:.1f}", x, y),
+            self.place_text('perf_frame', font, f"frame p50 {p50 * 1000:.2f} / p99 {p99 * 1000:.2f} ms", x, y + 20),
+            self.place_text('perf_input', font, f"input p50 {input_p50 * 1000:.2f} / p99 {input_p99 * 1000:.2f} ms",
+                            x, y + 40),
+            self.place_text('perf_particles', font, f"particles {len(game.particles)}", x, y + 60),
+        ])
+
+    def render(self, game):
+        # game(tetris.Tetris)의 현재 상태를 그림 (단계 이름은 소프트웨어 렌더러와 같음)
+        # 모으는 중에 아틀라스가 비워졌으면 먼저 모은 글자 좌표가 무효이므로 한 번 더 모음
+        if game.profiler:
+            game.profiler.mark('prepare')
+        generation = self.atlas.generation
+        layers = self.collect_layers(game)
+        if self.atlas.generation != generation:
+            layers = self.collect_layers(game)
+        self.draw(np.concatenate([layer for layer in layers if layer is not None and len(layer)]))
+
+    def collect_layers(self, game):
+        profiler = game.profiler
+        engine = game.engine
+        layers = []
+        if game.show_start_screen:
+            layers.append(self.place_text('title', game.title_font, "BCAI 테트리스", self.width // 2,
+                                          self.height // 2 - 100, center=True))
+            layers.append(self.place_text('start', game.font, "시작하려면 스페이스바를 누르세요", self.width // 2,
+                                          self.height // 2, center=True))
+            if profiler:
+                profiler.mark('draw_start_screen')
+        else:
+            if self.static_instances is None or self.static_generation != self.atlas.generation:
+                self.static_instances = self.static_layer(game)
+                self.static_generation = self.atlas.generation
+            layers.append(self.static_instances)
+            layers.append(self.board_layer(game))
+            if profiler:
+                profiler.mark('draw_blocks')
+            layers.append(self.piece_layer(game))
+            if profiler:
+                profiler.mark('draw_piece')
+            layers.append(self.next_layer(game))
+            if profiler:
+                profiler.mark('draw_next_piece')
+            layers.append(self.info_layer(game))
+            if profiler:
+                profiler.mark('draw_info')
+            layers.append(self.particle_layer(game))
+            if profiler:
+                profiler.mark('draw_particles')
+            if engine.game_over:
+                _, (_, title_h) = self.text('game_over', game.game_over_font, "GAME OVER")
+                layers.append(self.message_layer(
+                    game, 'game_over', game.game_over_font, "GAME OVER", self.height // 2 - title_h // 2 - 30,
+                    'restart', "R 키를 눌러 재시작", self.height // 2 + title_h // 2))
+                if profiler:
+                    profiler.mark('draw_game_over')
+            elif game.paused:
+                layers.append(self.message_layer(
+                    game, 'pause', game.title_font, "일시정지", self.height // 2 - 60,
+                    'resume', "P 키를 눌러 계속", self.height // 2))
+                if profiler:
+                    profiler.mark('draw_pause')
+        if game.show_perf:
+            game.refresh_perf_stats()
+            layers.append(self.perf_layer(game))
+            profiler.mark('draw_overlay')
+        return layers
+
+    def draw(self, instances):
+        # 인스턴스 배열을 버퍼에 올리고 한 번에 그림
+        count = len(instances)
+        self.instances = count
+        if self.context:
+            GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.context.framebuffer)
+        GL.glViewport(0, 0, *self.pixel_size)
+        GL.glClearColor(0.0, 0.0, 0.0, 1.0)
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+        if not count:
+            return
+        self.reserve(count)
+        GL.glUseProgram(self.program)
+        GL.glUniform2f(self.screen_uniform, self.width, self.height)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.atlas.texture)
+        GL.glBindVertexArray(self.vao)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.instance_buffer)
+        # 이전 프레임이 쓰던 버퍼를 기다리지 않도록 버퍼를 새로 받은 뒤 채움
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, self.capacity * INSTANCE_FLOATS * 4, None, GL.GL_STREAM_DRAW)
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, 0, instances.nbytes, np.ascontiguousarray(instances, np.float32))
+        GL.glDrawArraysInstanced(GL.GL_TRIANGLE_STRIP, 0, 4, count)
+
+    def read_pixels(self):
+        # 헤드리스 컨텍스트에 그린 마지막 프레임 (테스트/비교용)
+        GL.glFinish()
+        return self.context.read_pixels()
+
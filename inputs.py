@@ -0,0 +1,175 @@
+# 키 입력 처리와 입력 지연 측정
+# 키를 누르고 뗀 이벤트로 동작별 눌림 상태를 관리하고, 로직 틱마다 한 번 눌림 상태를 확인해
+# 좌우 자동 반복(DAS: 첫 반복까지의 지연, ARR: 반복 간격)과 소프트 드롭 반복을 만든다.
+# 효과(하드 드롭, 줄 제거) 중에 누른 입력은 버퍼에 두었다가 조작할 수 있게 되는 첫 틱에 순서대로 적용하고
+# (다음 조각의 회전 선입력 등), 좌우 키를 누르고 있으면 효과 중에도 DAS를 충전해 두었다가 바로 이어서 움직인다.
+# 키 입력마다 이벤트를 받은 시각, 엔진에 적용한 시각, 그 결과가 처음 화면에 나간 시각을 기록해 지연을 잰다.
+import csv
+import json
+import time
+from collections import deque
+
+from engine import ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_HARD_DROP
+from profiler import percentile
+
+# 기본 자동 반복 설정 (밀리초, 60틱 기준 DAS 10틱, ARR 2틱)
+DAS_MS = 167
+ARR_MS = 33
+SOFT_DROP_MS = 33
+
+# 효과 중에 모아 둘 최대 입력 수 (넘으면 오래된 입력부터 버림)
+BUFFER_SIZE = 4
+
+# 누르고 있으면 반복하는 동작
+REPEAT_ACTIONS = (ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN)
+
+# 자동 반복 동작의 이동 방향 (열, 줄)
+SHIFTS = {ACTION_LEFT: (-1, 0), ACTION_RIGHT: (1, 0), ACTION_DOWN: (0, 1)}
+
+ACTION_NAMES = {
+    ACTION_LEFT: 'left',
+    ACTION_RIGHT: 'right',
+    ACTION_DOWN: 'down',
+    ACTION_ROTATE: 'rotate',
+    ACTION_HARD_DROP: 'hard_drop',
+}
+
+
+class InputLatency:
+    def __init__(self, capacity=600):
+        # capacity: 보관할 최근 입력 수
+        # 각 기록: (동작, 버퍼 여부, 이벤트 -> 엔진 적용 시간, 이벤트 -> 화면 표시 시간) (초)
+        self.samples = deque(maxlen=capacity)
+        self.pending = []  # 적용했지만 아직 화면에 나가지 않은 입력 (동작, 버퍼 여부, 이벤트 시각, 적용 시각)
+        self.count = 0
+
+    def applied(self, action, buffered, event_time, now):
+        self.pending.append((action, buffered, event_time, now))
+
+    def presented(self, now):
+        # 화면을 내보낸 직후 호출 (대기 중이던 입력의 결과가 이번 프레임에 처음 나감)
+        for action, buffered, event_time, applied_time in self.pending:
+            self.samples.append((action, buffered, applied_time - event_time, now - event_time))
+        self.count += len(self.pending)
+        self.pending = []
+
+    def stats(self):
+        # (이벤트 -> 화면 표시 p50, p99) - 오버레이 표시용
+        present = sorted(sample[3] for sample in self.samples)
+        return percentile(present, 0.5), percentile(present, 0.99)
+
+    def summary(self):
+        samples = list(self.samples)
+        applied = sorted(sample[2] for sample in samples)
+        present = sorted(sample[3] for sample in samples)
+        return {
+            'inputs': self.count,
+            'buffered': sum(1 for sample in samples if sample[1]),
+            'apply_p50_ms': percentile(applied, 0.5) * 1000,
+            'apply_p99_ms': percentile(applied, 0.99) * 1000,
+            'present_p50_ms': percentile(present, 0.5) * 1000,
+            'present_p99_ms': percentile(present, 0.99) * 1000,
+            'present_max_ms': (present[-1] if present else 0.0) * 1000,
+        }
+
+    def dump(self, path):
+        # 확장자가 .csv이면 입력별 CSV, 아니면 요약과 입력별 기록을 담은 JSON으로 저장
+        samples = list(self.samples)
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['action', 'buffered', 'apply_ms', 'present_ms'])
+                for action, buffered, applied, present in samples:
+                    writer.writerow([ACTION_NAMES[action], int(buffered), f'{applied * 1000:.4f}',
+                                     f'{present * 1000:.4f}'])
+        else:
+            with open(path, 'w') as f:
+                json.dump({
+                    'summary': self.summary(),
+                    'inputs': [
+                        {'action': ACTION_NAMES[action], 'buffered': buffered,
+                         'apply_ms': round(applied * 1000, 4), 'present_ms': round(present * 1000, 4)}
+                        for action, buffered, applied, present in samples
+                    ],
+                }, f, indent=1)
+
+
+class InputHandler:
+    def __init__(self, apply, tick_rate, das_ms=DAS_MS, arr_ms=ARR_MS, soft_drop_ms=SOFT_DROP_MS,
+                 buffer_size=BUFFER_SIZE, clock=time.perf_counter):
+        # apply: 동작 하나를 엔진에 적용하는 함수 (기록, 파티클 처리를 포함한 Tetris.apply_action)
+        # arr_ms가 0이면 DAS가 찬 뒤 벽까지 한 번에 이동
+        self.apply = apply
+        self.das_ticks = max(1, round(das_ms * tick_rate / 1000))
+        self.arr_ticks = round(arr_ms * tick_rate / 1000)
+        self.soft_drop_ticks = max(1, round(soft_drop_ms * tick_rate / 1000))
+        self.clock = clock
+        self.buffer = deque(maxlen=buffer_size)  # (동작, 이벤트 시각)
+        self.held = {}  # 누르고 있는 반복 동작 -> 누른 뒤 지난 틱 수
+        self.direction = None  # 좌우 키를 함께 누르면 나중에 누른 쪽
+        self.latency = InputLatency()
+
+    def reset(self):
+        # 새 게임: 버퍼와 눌림 상태를 비움 (지연 기록은 유지)
+        self.buffer.clear()
+        self.held.clear()
+        self.direction = None
+
+    def press(self, action, engine, event_time):
+        # 키를 누른 순간: 조작할 수 있으면 다음 틱을 기다리지 않고 바로 적용, 효과 중이면 버퍼에 넣음
+        if action in REPEAT_ACTIONS:
+            self.held[action] = 0
+            if action != ACTION_DOWN:
+                self.direction = action
+        if engine.accepts_input():
+            self._apply(action, False, event_time)
+        elif not engine.game_over:
+            self.buffer.append((action, event_time))
+
+    def release(self, action):
+        self.held.pop(action, None)
+        if action == self.direction:
+            # 반대쪽 키를 아직 누르고 있으면 그쪽으로 DAS를 처음부터 다시 충전
+            other = ACTION_RIGHT if action == ACTION_LEFT else ACTION_LEFT
+            self.direction = other if other in self.held else None
+            if self.direction:
+                self.held[other] = 0
+
+    def release_all(self):
+        # 창이 포커스를 잃으면 떼는 이벤트를 받지 못하므로 모두 뗀 것으로 처리
+        self.held.clear()
+        self.direction = None
+
+    def tick(self, engine):
+        # 로직 틱마다 한 번 (engine.step 직전): 버퍼의 입력을 적용하고 눌림 상태로 자동 반복 동작을 만듦
+        while self.buffer and engine.accepts_input():
+            action, event_time = self.buffer.popleft()
+            self._apply(action, True, event_time)
+
+        held = self.held
+        for action in held:
+            held[action] += 1
+        if not engine.accepts_input():
+            return  # 효과 중에는 DAS만 충전
+
+        direction = self.direction
+        if direction is not None:
+            charged = held[direction] - self.das_ticks
+            if charged >= 0 and not self.arr_ticks:
+                self.repeat(engine, direction, engine.board.width)
+            elif charged >= 0 and charged % self.arr_ticks == 0:
+                self.repeat(engine, direction)
+        if ACTION_DOWN in held and held[ACTION_DOWN] % self.soft_drop_ticks == 0:
+            self.repeat(engine, ACTION_DOWN)
+
+    def repeat(self, engine, action, count=1):
+        # 자동 반복 이동을 count번 (막히면 멈춤, 막힌 이동은 적용하지 않으므로 입력 기록에도 남지 않음)
+        dx, dy = SHIFTS[action]
+        for _ in range(count):
+            if not engine.valid_position(engine.current_piece, x_offset=dx, y_offset=dy):
+                break
+            self.apply(action)
+
+    def _apply(self, action, buffered, event_time):
+        self.apply(action)
+        self.latency.applied(action, buffered, event_time, self.clock())
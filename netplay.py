@@ -0,0 +1,526 @@
+# 대전 서버와 클라이언트 (asyncio TCP)
+# 서버가 모든 게임 로직을 실행하고(권한 서버), 클라이언트에는 틱마다 바뀐 부분만 작은 바이너리 메시지로 보낸다.
+# 한 이벤트 루프의 틱 작업 하나가 모든 대전을 함께 진행하므로 코어 하나에서 수십 개의 대전을 처리할 수 있다.
+#
+# 메시지 = 길이(u16, 종류 바이트 포함) + 종류(u8) + 내용
+#   클라이언트 -> 서버: HELLO(역할, 관전할 대전 번호), INPUT(동작)
+#   서버 -> 클라이언트: WELCOME(대전 번호, 내 번호, 보드 크기, 틱 속도), STATE(플레이어 하나의 변경분), END(승자)
+# STATE = 헤더(틱, 플레이어, 상태, 점수, 줄, 레벨, 현재 조각, 다음 조각, 받을 쓰레기 줄) + 바뀐 줄들
+#   각 줄은 줄 번호(u16) + 칸마다 4비트 색상 코드
+#
+# 사용법:
+#   python netplay.py server --port 7777
+#   python netplay.py client --host 127.0.0.1 --port 7777 [--spectate 대전번호]
+#   python netplay.py selftest --matches 24 --seconds 10
+import argparse
+import asyncio
+import random
+import struct
+import time
+from collections import deque
+
+from constants import CELL_CODES, CODE_COLORS, GRAY, SHAPE_COLORS
+from engine import TetrisEngine, ACTIONS, ACTION_NONE, ACTION_HARD_DROP, TICK_RATE
+from profiler import percentile
+
+DEFAULT_PORT = 7777
+
+# 메시지 종류
+MSG_HELLO = 1
+MSG_INPUT = 2
+MSG_WELCOME = 3
+MSG_STATE = 4
+MSG_END = 5
+
+ROLE_PLAYER = 0
+ROLE_SPECTATOR = 1
+SPECTATOR = 255  # WELCOME의 플레이어 번호 (관전자)
+NO_WINNER = 255
+
+FRAME = struct.Struct('<HB')
+HELLO = struct.Struct('<BI')
+WELCOME = struct.Struct('<IBHHH')
+STATE = struct.Struct('<IBBIHBBBhhBBH')
+ROW_INDEX = struct.Struct('<H')
+
+STATE_GAME_OVER = 1
+
+# 지운 줄 수 -> 상대에게 보내는 쓰레기 줄 수
+GARBAGE_LINES = [0, 0, 1, 2, 4]
+
+# 클라이언트가 보내는 쓰기 버퍼가 이만큼 밀리면 연결을 끊음 (느린 클라이언트가 서버를 막지 않도록)
+MAX_WRITE_BUFFER = 256 * 1024
+
+# 틱 처리 시간을 보관할 최근 틱 수 (1분)
+TICK_HISTORY = 60 * TICK_RATE
+
+
+def frame(kind, payload=b''):
+    return FRAME.pack(len(payload) + 1, kind) + payload
+
+
+async def read_frame(reader):
+    # (종류, 내용) 또는 연결이 끊기면 (None, b'')
+    try:
+        length, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+        return kind, await reader.readexactly(length - 1)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None, b''
+
+
+def pack_row(codes):
+    # 칸 코드 한 줄(board.row_codes, 칸당 1바이트)을 칸당 4비트로 압축
+    if len(codes) % 2:
+        codes += b'\0'
+    return bytes(high << 4 | low for high, low in zip(codes[::2], codes[1::2]))
+
+
+def unpack_row(data, width):
+    codes = []
+    for byte in data:
+        codes.append(byte >> 4)
+        codes.append(byte & 0x0F)
+    return codes[:width]
+
+
+class PlayerFeed:
+    # 플레이어 하나의 마지막으로 보낸 상태 (바뀐 부분만 보내기 위해)
+    def __init__(self, engine):
+        self.engine = engine
+        self.board = None  # 마지막으로 확인한 보드와 버전 (보드 객체가 바뀌면 버전이 다시 작아질 수 있음)
+        self.version = None
+        self.codes = [None] * engine.board.height  # 줄별 마지막으로 보낸 칸 코드
+        self.header = None
+
+    def encode(self, tick, player, full=False):
+        # 마지막으로 보낸 상태와 다른 부분의 STATE 메시지 (바뀐 것이 없으면 None)
+        # full: 새로 들어온 관전자용 전체 상태 (보낸 기록은 바꾸지 않음)
+        engine = self.engine
+        piece = engine.current_piece
+        header = (
+            STATE_GAME_OVER if engine.game_over else 0,
+            engine.score, min(engine.lines_cleared, 0xFFFF), min(engine.level, 0xFF),
+            piece['kind'], piece['rotation'], piece['x'], piece['y'], engine.next_piece['kind'],
+            min(sum(lines for lines, _ in engine.pending_garbage), 0xFF),
+        )
+        changed = []
+        board = engine.board
+        if full or board is not self.board or board.version != self.version:
+            # 칸 코드 bytes를 그대로 비교하고 바뀐 줄만 압축 (BitBoard의 바뀌지 않은 줄은 같은 객체)
+            sent = self.codes
+            for y in range(board.height):
+                codes = board.row_codes(y)
+                if full or (codes is not sent[y] and codes != sent[y]):
+                    changed.append((y, pack_row(codes)))
+                    if not full:
+                        sent[y] = codes
+            if not full:
+                self.board = board
+                self.version = board.version
+        if not full:
+            if header == self.header and not changed:
+                return None
+            self.header = header
+        payload = bytearray(STATE.pack(tick, player, *header, len(changed)))
+        for y, packed in changed:
+            payload += ROW_INDEX.pack(y)
+            payload += packed
+        return frame(MSG_STATE, bytes(payload))
+
+
+class Match:
+    # 두 플레이어의 대전 (같은 시드로 같은 조각 순서)
+    def __init__(self, match_id, seed):
+        self.match_id = match_id
+        self.engines = [TetrisEngine(seed=seed, animations=False) for _ in range(2)]
+        self.feeds = [PlayerFeed(engine) for engine in self.engines]
+        self.rng = random.Random(seed)  # 쓰레기 줄 구멍 위치
+        self.players = [None, None]
+        self.spectators = []
+        self.inputs = [[], []]
+        self.tick = 0
+        self.started = False
+        self.winner = None
+
+    @property
+    def writers(self):
+        return [writer for writer in self.players if writer] + self.spectators
+
+    def welcome(self, writer, player):
+        board = self.engines[0].board
+        writer.write(frame(MSG_WELCOME, WELCOME.pack(self.match_id, player, board.width, board.height, TICK_RATE)))
+
+    def send_full_state(self, writer):
+        for player, feed in enumerate(self.feeds):
+            writer.write(feed.encode(self.tick, player, full=True))
+
+    def step(self):
+        # 입력 적용, 한 틱 진행, 쓰레기 줄 교환 후 모든 참가자에게 보낼 바이트 반환
+        self.tick += 1
+        attacks = []
+        for player, engine in enumerate(self.engines):
+            lines = engine.lines_cleared
+            for action in self.inputs[player]:
+                engine.apply(action)
+            self.inputs[player].clear()
+            engine.step()
+            cleared = engine.lines_cleared - lines
+            attacks.append(GARBAGE_LINES[min(cleared, 4)])
+        for player, lines in enumerate(attacks):
+            if lines:
+                self.engines[1 - player].add_garbage(lines, self.rng.randrange(self.engines[1 - player].board.width))
+
+        out = b''.join(filter(None, (feed.encode(self.tick, player) for player, feed in enumerate(self.feeds))))
+        over = [engine.game_over for engine in self.engines]
+        if any(over):
+            self.winner = NO_WINNER if all(over) else over.index(False)
+            out += frame(MSG_END, bytes([self.winner]))
+        return out
+
+
+class TetrisServer:
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, seed=None):
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.matches = {}
+        self.on_finish = None  # 대전이 끝날 때마다 호출 (대전), 끝난 대전은 서버에 남기지 않음
+        self.waiting = None  # 상대를 기다리는 대전
+        self.next_match_id = 1
+        self.server = None
+        self.tick_started = 0.0
+        self.tick_count = 0
+        self.tick_durations = deque(maxlen=TICK_HISTORY)  # 최근 틱 처리 시간 (초)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ticker = asyncio.create_task(self.run_ticks())
+        return self
+
+    async def close(self):
+        self.ticker.cancel()
+        self.server.close()
+        for match in list(self.matches.values()):
+            for writer in match.writers:
+                writer.close()
+        await self.server.wait_closed()
+
+    def join(self, writer):
+        # 기다리는 대전에 넣거나 새 대전을 만듦, (대전, 플레이어 번호) 반환
+        match = self.waiting
+        if match is None:
+            match = Match(self.next_match_id, self.rng.getrandbits(63))
+            self.next_match_id += 1
+            self.matches[match.match_id] = match
+            self.waiting = match
+            player = 0
+        else:
+            self.waiting = None
+            player = 1
+            match.started = True
+        match.players[player] = writer
+        match.welcome(writer, player)
+        if match.started:
+            for writer in match.writers:
+                match.send_full_state(writer)
+        return match, player
+
+    def spectate(self, writer, match_id):
+        # 지정한 대전(0이면 가장 최근 대전)을 관전
+        if match_id == 0 and self.matches:
+            match_id = max(self.matches)
+        match = self.matches.get(match_id)
+        if match is None:
+            writer.close()
+            return None
+        match.spectators.append(writer)
+        match.welcome(writer, SPECTATOR)
+        match.send_full_state(writer)
+        return match
+
+    def leave(self, match, writer):
+        if writer in match.spectators:
+            match.spectators.remove(writer)
+            return
+        player = match.players.index(writer)
+        match.players[player] = None
+        if self.waiting is match:
+            self.waiting = None
+            del self.matches[match.match_id]
+        elif match.winner is None:
+            # 기권: 상대 승리
+            match.engines[player].game_over = True
+
+    async def handle_client(self, reader, writer):
+        kind, payload = await read_frame(reader)
+        if kind != MSG_HELLO:
+            writer.close()
+            return
+        role, match_id = HELLO.unpack(payload)
+        if role == ROLE_SPECTATOR:
+            match = self.spectate(writer, match_id)
+            player = None
+        else:
+            match, player = self.join(writer)
+        if match is None:
+            return
+
+        while True:
+            kind, payload = await read_frame(reader)
+            if kind is None:
+                break
+            if kind == MSG_INPUT and player is not None and match.started and payload and payload[0] in ACTIONS:
+                match.inputs[player].append(payload[0])
+        self.leave(match, writer)
+        writer.close()
+
+    async def run_ticks(self):
+        # 고정 간격으로 모든 대전을 한 틱씩 진행 (늦어지면 밀린 틱을 건너뛰지 않고 바로 이어서 진행)
+        loop = asyncio.get_running_loop()
+        dt = 1.0 / TICK_RATE
+        next_time = loop.time()
+        while True:
+            self.tick_started = time.perf_counter()
+            for match in list(self.matches.values()):
+                if not match.started:
+                    continue
+                data = match.step()
+                for writer in match.writers:
+                    if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                        writer.close()
+                    elif data:
+                        writer.write(data)
+                if match.winner is not None:
+                    del self.matches[match.match_id]
+                    if self.on_finish:
+                        self.on_finish(match)
+            self.tick_count += 1
+            self.tick_durations.append(time.perf_counter() - self.tick_started)
+
+            next_time += dt
+            delay = next_time - loop.time()
+            if delay < -0.25:
+                next_time = loop.time()  # 크게 밀리면 기준 시각을 다시 잡음
+            await asyncio.sleep(max(0.0, delay))
+
+
+class PlayerView:
+    # 클라이언트가 받은 변경분으로 유지하는 플레이어 상태 복사본
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = [[0] * width for _ in range(height)]
+        self.tick = 0
+        self.game_over = False
+        self.score = 0
+        self.lines = 0
+        self.level = 1
+        self.piece = None  # (종류, 회전, x, y)
+        self.next_kind = None
+        self.pending_garbage = 0
+
+    def apply(self, payload):
+        (self.tick, _, flags, self.score, self.lines, self.level,
+         kind, rotation, x, y, self.next_kind, self.pending_garbage, count) = STATE.unpack_from(payload)
+        self.game_over = bool(flags & STATE_GAME_OVER)
+        self.piece = (kind, rotation, x, y)
+        pos = STATE.size
+        row_size = (self.width + 1) // 2
+        for _ in range(count):
+            y = ROW_INDEX.unpack_from(payload, pos)[0]
+            pos += ROW_INDEX.size
+            self.cells[y] = unpack_row(payload[pos:pos + row_size], self.width)
+            pos += row_size
+
+
+class TetrisClient:
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.match_id = None
+        self.player = None
+        self.tick_rate = TICK_RATE
+        self.views = []
+        self.winner = None
+        self.closed = False
+        self.on_state = None  # 메시지를 받을 때마다 호출 (플레이어 번호)
+
+    async def connect(self, host, port, role=ROLE_PLAYER, match_id=0):
+        # 접속 후 WELCOME까지 기다림
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(frame(MSG_HELLO, HELLO.pack(role, match_id)))
+        kind, payload = await read_frame(self.reader)
+        if kind != MSG_WELCOME:
+            raise ConnectionError("서버가 접속을 거부함")
+        self.match_id, self.player, width, height, self.tick_rate = WELCOME.unpack(payload)
+        self.views = [PlayerView(width, height) for _ in range(2)]
+        return self
+
+    def send_action(self, action):
+        if not self.closed and action != ACTION_NONE:
+            self.writer.write(frame(MSG_INPUT, bytes([action])))
+
+    async def listen(self):
+        # 대전이 끝나거나 연결이 끊길 때까지 메시지 처리
+        while True:
+            kind, payload = await read_frame(self.reader)
+            if kind is None:
+                break
+            if kind == MSG_STATE:
+                player = payload[4]  # 헤더의 플레이어 번호 (틱 다음 바이트)
+                self.views[player].apply(payload)
+                if self.on_state:
+                    self.on_state(player)
+            elif kind == MSG_END:
+                self.winner = payload[0]
+                break
+        self.closed = True
+        self.writer.close()
+
+
+async def run_viewer(host, port, role, match_id):
+    # pygame 창에 두 보드를 나란히 그리고 키 입력을 서버로 보냄
+    import pygame
+    from pieces import PIECE_SHAPES
+    from sprites import BlockSprites
+    from tetris import KEY_ACTIONS, CELL_SIZE
+
+    client = await TetrisClient().connect(host, port, role, match_id)
+    width, height = client.views[0].width, client.views[0].height
+    gap = CELL_SIZE
+    pygame.init()
+    screen = pygame.display.set_mode((width * CELL_SIZE * 2 + gap, height * CELL_SIZE + 40))
+    pygame.display.set_caption(f"테트리스 대전 #{client.match_id}")
+    font = pygame.font.SysFont(None, 28)
+    sprites = BlockSprites(CELL_SIZE)
+    listener = asyncio.create_task(client.listen())
+
+    running = True
+    while running and not client.closed:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key in KEY_ACTIONS and client.player != SPECTATOR:
+                client.send_action(KEY_ACTIONS[event.key])
+
+        screen.fill((0, 0, 0))
+        for index, view in enumerate(client.views):
+            origin_x = index * (width * CELL_SIZE + gap)
+            blits = [
+                (sprites.tile(CODE_COLORS[code]), (origin_x + x * CELL_SIZE, y * CELL_SIZE))
+                for y, row in enumerate(view.cells)
+                for x, code in enumerate(row)
+                if code
+            ]
+            if view.piece and not view.game_over:
+                kind, rotation, px, py = view.piece
+                tile = sprites.tile(SHAPE_COLORS[kind])
+                blits += [
+                    (tile, (origin_x + (px + x) * CELL_SIZE, (py + y) * CELL_SIZE))
+                    for y, row in enumerate(PIECE_SHAPES[kind][rotation])
+                    for x, cell in enumerate(row)
+                    if cell
+                ]
+            screen.blits(blits, doreturn=False)
+            pygame.draw.rect(screen, GRAY, (origin_x, 0, width * CELL_SIZE, height * CELL_SIZE), 1)
+            me = " (me)" if index == client.player else ""
+            label = font.render(f"P{index + 1}{me}  score {view.score}  garbage {view.pending_garbage}", True, (255, 255, 255))
+            screen.blit(label, (origin_x + 4, height * CELL_SIZE + 10))
+        pygame.display.flip()
+        await asyncio.sleep(1 / 60)
+
+    listener.cancel()
+    pygame.quit()
+    if client.winner is not None:
+        print("winner:", "draw" if client.winner == NO_WINNER else f"P{client.winner + 1}")
+
+
+async def selftest(matches, seconds, seed=0):
+    # 같은 프로세스에서 서버와 무작위 입력 클라이언트 2 x matches개를 localhost로 연결해 대전을 한 번씩 진행하고
+    # 틱 처리 시간과 전달 지연을 재고, 대전이 끝날 때 클라이언트 복사본이 서버 상태와 같은지 확인
+    server = await TetrisServer('127.0.0.1', 0, seed=seed).start()
+    rng = random.Random(seed)
+    latencies = []
+    results = {'matches': 0, 'mismatches': 0}
+    finished = {}  # 대전 번호 -> 끝난 대전
+
+    def on_finish(match):
+        finished[match.match_id] = match
+    server.on_finish = on_finish
+
+    def verify(client):
+        match = finished[client.match_id]
+        for view, engine in zip(client.views, match.engines):
+            cells = [[CELL_CODES.get(cell, 0) if cell else 0 for cell in row] for row in engine.grid]
+            if cells != view.cells or view.score != engine.score or view.game_over != engine.game_over:
+                results['mismatches'] += 1
+
+    async def bot(deadline):
+        # 제한 시간이 지나면 하드 드롭만 보내 대전을 빨리 끝냄
+        client = await TetrisClient().connect('127.0.0.1', server.port)
+
+        def on_state(player):
+            latencies.append(time.perf_counter() - server.tick_started)
+        client.on_state = on_state
+        listener = asyncio.create_task(client.listen())
+        while not client.closed:
+            if time.perf_counter() > deadline:
+                client.send_action(ACTION_HARD_DROP)
+            elif rng.random() < 0.3:
+                client.send_action(rng.choice(ACTIONS[1:-1]) if rng.random() < 0.9 else ACTION_HARD_DROP)
+            await asyncio.sleep(1 / TICK_RATE)
+        await listener
+        if client.winner is not None:
+            verify(client)
+            if client.player == 0:
+                results['matches'] += 1
+
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(bot(deadline) for _ in range(matches * 2)))
+    await server.close()
+
+    durations = sorted(server.tick_durations)
+    lat = sorted(latencies)
+    return {
+        'matches_finished': results['matches'],
+        'mirror_mismatches': results['mismatches'],
+        'server_ticks': server.tick_count,
+        'tick_ms_p50': percentile(durations, 0.5) * 1000,
+        'tick_ms_p99': percentile(durations, 0.99) * 1000,
+        'latency_ms_p50': percentile(lat, 0.5) * 1000,
+        'latency_ms_p99': percentile(lat, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="테트리스 대전 서버/클라이언트")
+    sub = parser.add_subparsers(dest='mode', required=True)
+    server_parser = sub.add_parser('server')
+    server_parser.add_argument('--host', default='0.0.0.0')
+    server_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    client_parser = sub.add_parser('client')
+    client_parser.add_argument('--host', default='127.0.0.1')
+    client_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    client_parser.add_argument('--spectate', type=int, metavar='MATCH', help="대전 관전 (0이면 가장 최근 대전)")
+    test_parser = sub.add_parser('selftest')
+    test_parser.add_argument('--matches', type=int, default=24)
+    test_parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.mode == 'server':
+        async def serve():
+            server = await TetrisServer(args.host, args.port).start()
+            print(f"listening on {args.host}:{server.port}")
+            await server.server.serve_forever()
+        asyncio.run(serve())
+    elif args.mode == 'client':
+        role = ROLE_PLAYER if args.spectate is None else ROLE_SPECTATOR
+        asyncio.run(run_viewer(args.host, args.port, role, args.spectate or 0))
+    else:
+        for key, value in asyncio.run(selftest(args.matches, args.seconds)).items():
+            print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
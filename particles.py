@@ -0,0 +1,117 @@
+# 파티클 시스템
+# 파티클 속성을 미리 할당한 NumPy 배열(구조체 배열)에 저장하고 한 번의 벡터 연산으로 갱신한다.
+# 죽은 파티클은 뒤쪽의 살아 있는 파티클로 채워 압축하고, 원 모양은 미리 그린 스프라이트를 재사용한다.
+import numpy as np
+import pygame
+
+# 스프라이트 알파 단계 수
+ALPHA_BUCKETS = 16
+
+# 속성 배열의 행 번호
+_X, _Y, _VX, _VY, _LIFE, _DECAY, _SIZE, _COLOR = range(8)
+
+
+class ParticleSystem:
+    def __init__(self, max_particles=2000, gravity=0.1, seed=None):
+        # max_particles: 동시에 존재할 수 있는 최대 파티클 수 (넘치는 파티클은 생성하지 않음)
+        self.max_particles = max_particles
+        self.gravity = gravity
+        self.rng = np.random.default_rng(seed)
+        self.data = np.zeros((8, max_particles), dtype=np.float64)
+        self.count = 0
+        self.palette = []
+        self.palette_index = {}
+        self.sprites = {}
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, x, y, color, n=1):
+        # (x, y)에서 n개 생성 (크기, 속도, 수명 감소율은 무작위)
+        n = min(n, self.max_particles - self.count)
+        if n <= 0:
+            return
+        color_index = self.palette_index.get(color)
+        if color_index is None:
+            color_index = self.palette_index[color] = len(self.palette)
+            self.palette.append(color)
+
+        rng = self.rng
+        block = self.data[:, self.count:self.count + n]
+        block[_X] = x
+        block[_Y] = y
+        block[_VX] = rng.uniform(-2, 2, n)
+        block[_VY] = rng.uniform(-5, -1, n)
+        block[_LIFE] = 1.0  # 수명 (1.0 = 100%)
+        block[_DECAY] = rng.uniform(0.01, 0.03, n)  # 수명 감소율
+        block[_SIZE] = rng.uniform(2, 5, n)
+        block[_COLOR] = color_index
+        self.count += n
+
+    def update(self):
+        # 이동, 중력, 수명 감소를 한 번에 계산하고 죽은 파티클 제거
+        n = self.count
+        if not n:
+            return
+        data = self.data[:, :n]
+        data[_X] += data[_VX]
+        data[_Y] += data[_VY]
+        data[_VY] += self.gravity
+        data[_LIFE] -= data[_DECAY]
+
+        dead = np.flatnonzero(data[_LIFE] <= 0)
+        if not len(dead):
+            return
+        keep = n - len(dead)
+        # 앞쪽 구멍을 뒤쪽의 살아 있는 파티클로 채움
+        holes = dead[dead < keep]
+        movers = keep + np.flatnonzero(data[_LIFE, keep:] > 0)
+        data[:, holes] = data[:, movers]
+        self.count = keep
+
+    def sprite(self, diameter, color_index, bucket):
+        key = (diameter, color_index, bucket)
+        surface = self.sprites.get(key)
+        if surface is None:
+            alpha = bucket * 255 // (ALPHA_BUCKETS - 1)
+            radius = diameter // 2
+            surface = pygame.Surface((diameter, diameter), pygame.SRCALPHA)
+            pygame.draw.circle(surface, (*self.palette[color_index], alpha), (radius, radius), radius)
+            self.sprites[key] = surface
+        return surface
+
+    def circles(self):
+        # 그릴 원 목록 (왼쪽 위 x, y, 지름, 색상 번호, 알파 단계) - 정수 배열
+        data = self.data[:, :self.count]
+        diameters = (data[_SIZE] * 2).astype(np.int64)
+        buckets = np.rint(np.clip(data[_LIFE], 0, 1) * (ALPHA_BUCKETS - 1)).astype(np.int64)
+        xs = np.trunc(data[_X] - data[_SIZE]).astype(np.int64)
+        ys = np.trunc(data[_Y] - data[_SIZE]).astype(np.int64)
+        colors = data[_COLOR].astype(np.int64)
+        return xs, ys, diameters, colors, buckets
+
+    def draw(self, surface):
+        # 캐시된 원 스프라이트를 한 번의 blits 호출로 그림
+        if not self.count:
+            return
+        xs, ys, diameters, colors, buckets = self.circles()
+        sprite = self.sprite
+        surface.blits([
+            (sprite(d, c, b), (x, y))
+            for d, c, b, x, y in zip(diameters.tolist(), colors.tolist(), buckets.tolist(), xs.tolist(), ys.tolist())
+        ], doreturn=False)
+
+    def bounds(self):
+        # 모든 파티클을 덮는 사각형 (없으면 None)
+        n = self.count
+        if not n:
+            return None
+        data = self.data[:, :n]
+        left = int(np.floor((data[_X] - data[_SIZE]).min())) - 1
+        top = int(np.floor((data[_Y] - data[_SIZE]).min())) - 1
+        right = int(np.ceil((data[_X] + data[_SIZE]).max())) + 2
+        bottom = int(np.ceil((data[_Y] + data[_SIZE]).max())) + 2
+        return pygame.Rect(left, top, right - left, bottom - top)
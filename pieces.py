@@ -0,0 +1,123 @@
+# 테트리미노 회전 테이블
+# 모든 모양의 회전 상태(시계 방향 0~3)와 비트마스크, 크기를 임포트 시점에 한 번만 계산한다.
+from board import shape_masks
+from constants import SHAPES, SHAPE_COLORS
+
+ROTATION_COUNT = 4
+
+
+def _rotate(shape):
+    # 시계 방향 90도 회전
+    return tuple(zip(*reversed(shape)))
+
+
+def _build_rotations(shape):
+    states = [tuple(tuple(row) for row in shape)]
+    for _ in range(ROTATION_COUNT - 1):
+        states.append(_rotate(states[-1]))
+    return states
+
+
+# PIECE_SHAPES[kind][rotation] -> 모양 (튜플의 튜플)
+PIECE_SHAPES = [_build_rotations(shape) for shape in SHAPES]
+
+# PIECE_MASKS[kind][rotation] -> 행별 비트마스크
+PIECE_MASKS = [[shape_masks(state) for state in states] for states in PIECE_SHAPES]
+
+# PIECE_SIZES[kind][rotation] -> (너비, 높이)
+PIECE_SIZES = [[(len(state[0]), len(state)) for state in states] for states in PIECE_SHAPES]
+
+# PIECE_BOTTOMS[kind][rotation] -> 열별 가장 아래 칸의 행 번호 (아래쪽 윤곽, 착지 위치 계산용)
+PIECE_BOTTOMS = [
+    [tuple(max(y for y, row in enumerate(state) if row[x]) for x in range(len(state[0]))) for state in states]
+    for states in PIECE_SHAPES
+]
+
+# DISTINCT_ROTATIONS[kind] -> 서로 다른 모양을 가진 회전 상태 목록 (배치 탐색용)
+DISTINCT_ROTATIONS = [
+    [rotation for rotation, masks in enumerate(states) if masks not in states[:rotation]]
+    for states in PIECE_MASKS
+]
+
+# SRS 방식 벽 차기 오프셋 (시계 방향 회전 rotation -> rotation + 1)
+# SRS 표는 y축이 위쪽이므로 화면 좌표(아래쪽 +)로 부호를 바꿔서 저장한다.
+_SRS_JLSTZ = [
+    [(0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)],
+    [(0, 0), (1, 0), (1, -1), (0, 2), (1, 2)],
+    [(0, 0), (1, 0), (1, 1), (0, -2), (1, -2)],
+    [(0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)],
+]
+_SRS_I = [
+    [(0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)],
+    [(0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)],
+    [(0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)],
+    [(0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)],
+]
+_SRS_O = [[(0, 0)]] * ROTATION_COUNT
+
+
+def _build_kicks(kind, table):
+    # 회전 기준점이 왼쪽 위이므로, 오른쪽 벽에 붙어 회전할 때를 위해
+    # 회전 전후 너비 차이만큼 왼쪽으로 미는 오프셋도 마지막에 시도한다.
+    kicks = []
+    for rotation, offsets in enumerate(table):
+        offsets = [(dx, -dy) for dx, dy in offsets]
+        old_width = PIECE_SIZES[kind][rotation][0]
+        new_width = PIECE_SIZES[kind][(rotation + 1) % ROTATION_COUNT][0]
+        push = (old_width - new_width, 0)
+        if push not in offsets:
+            offsets.append(push)
+        kicks.append(tuple(offsets))
+    return kicks
+
+
+# KICKS[kind][rotation] -> 회전 시 차례로 시도할 (dx, dy) 오프셋
+KICKS = [
+    _build_kicks(kind, _SRS_I if kind == 0 else _SRS_O if kind == 1 else _SRS_JLSTZ)
+    for kind in range(len(SHAPES))
+]
+
+
+def make_piece(kind, grid_width, rotation=0):
+    # 보드 위쪽 가운데에 새 조각 생성
+    width = PIECE_SIZES[kind][rotation][0]
+    return {
+        'kind': kind,
+        'rotation': rotation,
+        'shape': PIECE_SHAPES[kind][rotation],
+        'masks': PIECE_MASKS[kind][rotation],
+        'color': SHAPE_COLORS[kind],
+        'x': grid_width // 2 - width // 2,
+        'y': 0
+    }
+
+
+def set_rotation(piece, rotation):
+    # 조각의 회전 상태를 테이블 값으로 교체
+    kind = piece['kind']
+    piece['rotation'] = rotation
+    piece['shape'] = PIECE_SHAPES[kind][rotation]
+    piece['masks'] = PIECE_MASKS[kind][rotation]
+
+
+def piece_state(piece):
+    # 조각의 (종류, 회전, x, y) 튜플 (스냅샷용, 없으면 None)
+    if piece is None:
+        return None
+    return piece['kind'], piece['rotation'], piece['x'], piece['y']
+
+
+def piece_from_state(state):
+    # piece_state로 얻은 튜플에서 조각 생성
+    if state is None:
+        return None
+    kind, rotation, x, y = state
+    return {
+        'kind': kind,
+        'rotation': rotation,
+        'shape': PIECE_SHAPES[kind][rotation],
+        'masks': PIECE_MASKS[kind][rotation],
+        'color': SHAPE_COLORS[kind],
+        'x': x,
+        'y': y
+    }
@@ -0,0 +1,148 @@
+# 프레임 단계별 프로파일러
+# 프레임마다 단계별 소요 시간을 고정 크기 링 버퍼에 기록한다.
+# 사용하지 않을 때는 호출하는 쪽에서 profiler가 None인지만 확인하므로 비용이 거의 없다.
+import csv
+import json
+import time
+
+# 프런트엔드가 기록하는 단계 (순서대로 표시/저장)
+FRAME_PHASES = (
+    'events',
+    'input',
+    'bot',
+    'hard_drop',
+    'line_clear',
+    'auto_fall',
+    'stream',
+    'update_particles',
+    'prepare',
+    'draw_start_screen',
+    'draw_blocks',
+    'draw_piece',
+    'draw_next_piece',
+    'draw_info',
+    'draw_particles',
+    'draw_game_over',
+    'draw_pause',
+    'draw_overlay',
+    'present',
+    'wait',
+)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    def __init__(self, phases=FRAME_PHASES, capacity=600):
+        # capacity: 링 버퍼에 보관할 최근 프레임 수
+        self.phases = tuple(phases)
+        self.index = {name: i for i, name in enumerate(self.phases)}
+        self.capacity = capacity
+        # 각 행: 단계별 시간 + 마지막 칸은 프레임 전체 시간 (초)
+        self.samples = [[0.0] * (len(self.phases) + 1) for _ in range(capacity)]
+        self.frames = 0
+        self.current = self.samples[0]
+        self.frame_start = self.last = time.perf_counter()
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        self.current = self.samples[self.frames % self.capacity]
+        for i in range(len(self.current)):
+            self.current[i] = 0.0
+        self.frame_start = self.last = now
+
+    def mark(self, phase):
+        # 직전 mark 이후 경과 시간을 phase에 더함
+        now = time.perf_counter()
+        self.current[self.index[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        now = time.perf_counter()
+        self.current[-1] = now - self.frame_start
+        self.frames += 1
+
+    def recent(self):
+        # 기록된 프레임 (오래된 것부터)
+        count = min(self.frames, self.capacity)
+        start = self.frames - count
+        return [self.samples[i % self.capacity] for i in range(start, self.frames)]
+
+    def frame_stats(self):
+        # (FPS, 프레임 시간 p50, p99) - 오버레이 표시용, 단계별 합계는 계산하지 않음
+        totals = sorted(row[-1] for row in self.recent())
+        if not totals:
+            return 0.0, 0.0, 0.0
+        mean_total = sum(totals) / len(totals)
+        return 1.0 / mean_total if mean_total else 0.0, percentile(totals, 0.5), percentile(totals, 0.99)
+
+    def summary(self):
+        rows = self.recent()
+        totals = sorted(row[-1] for row in rows)
+        mean_total = sum(totals) / len(totals) if totals else 0.0
+        return {
+            'frames': self.frames,
+            'fps': 1.0 / mean_total if mean_total else 0.0,
+            'frame_p50_ms': percentile(totals, 0.5) * 1000,
+            'frame_p99_ms': percentile(totals, 0.99) * 1000,
+            'phase_mean_ms': {
+                name: sum(row[i] for row in rows) / len(rows) * 1000 if rows else 0.0
+                for name, i in self.index.items()
+            },
+        }
+
+    def dump(self, path):
+        # 확장자가 .csv이면 프레임별 CSV, 아니면 요약과 프레임을 담은 JSON으로 저장
+        rows = self.recent()
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow([f'{name}_ms' for name in self.phases] + ['frame_ms'])
+                for row in rows:
+                    writer.writerow([f'{value * 1000:.4f}' for value in row])
+        else:
+            with open(path, 'w') as f:
+                json.dump({
+                    'phases': list(self.phases),
+                    'summary': self.summary(),
+                    'frames_ms': [[round(value * 1000, 4) for value in row] for row in rows],
+                }, f, indent=1)
+
+
+class StartupTimer:
+    def __init__(self, start=None, phase=None):
+        # start: 측정 기준 시각 (perf_counter, 기본값은 지금), phase: start부터 진행 중인 단계
+        self.start = self.last = time.perf_counter() if start is None else start
+        self.phases = {}
+        self.current = phase
+        self.total = 0.0
+        self.done = False
+
+    def begin(self, phase):
+        # 지금까지의 시간을 진행 중인 단계에 더하고 phase 단계를 시작 (같은 단계는 합산)
+        now = time.perf_counter()
+        if self.current:
+            self.phases[self.current] = self.phases.get(self.current, 0.0) + now - self.last
+        self.current = phase
+        self.last = now
+
+    def finish(self):
+        # 첫 프레임을 화면에 내보낸 직후 호출
+        self.begin(None)
+        self.total = self.last - self.start
+        self.done = True
+
+    def summary(self):
+        return {
+            'time_to_first_frame_ms': self.total * 1000,
+            'phases_ms': {name: value * 1000 for name, value in self.phases.items()},
+        }
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=1)
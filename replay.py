@@ -0,0 +1,261 @@
+# 입력 기록과 헤드리스 재생
+# 게임 시드와 프레임 번호가 붙은 입력을 작은 바이너리 로그로 저장하고,
+# 화면 없이 최대 속도로 다시 실행해 최종 점수와 보드 해시를 확인한다.
+# 재생 중 일정 간격으로 엔진 스냅샷을 남겨 두어 원하는 프레임으로 바로 이동할 수 있다.
+#
+# 로그 형식: 헤더(매직, 버전, 틱 속도, 보드 크기) 다음에 레코드가 이어진다.
+# 레코드 = 직전 레코드와의 프레임 차이(varint) + 태그 1바이트 (+ 태그별 데이터)
+#   1~5: 엔진 입력 동작, TAG_RESET: 새 게임 시드(8바이트), TAG_END: 최종 점수(8바이트) + 해시(8바이트)
+# 프레임 번호는 기록 시작부터 센 엔진 틱 수 (게임을 다시 시작해도 이어서 증가)
+import argparse
+import hashlib
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+from constants import GRID_WIDTH, GRID_HEIGHT
+from engine import TetrisEngine, ACTIONS, ACTION_NONE
+
+LOG_MAGIC = b'TRPL'
+LOG_VERSION = 1
+HEADER = struct.Struct('<4sBHHH')
+TAG_RESET = 0x10
+TAG_END = 0x1F
+SEED = struct.Struct('<Q')
+END = struct.Struct('<Q8s')
+
+def state_hash(engine):
+    # 보드 칸 코드 (빈 칸 0, 쓰레기 줄 포함 칸 종류마다 다른 코드), 현재/다음 조각, 점수로 계산한 8바이트 해시
+    h = hashlib.blake2b(digest_size=8)
+    board = engine.board
+    for y in range(board.height):
+        h.update(board.row_codes(y))
+    for piece in (engine.current_piece, engine.next_piece):
+        h.update(struct.pack('<Biii', piece['kind'], piece['rotation'], piece['x'], piece['y']))
+    h.update(struct.pack('<QQQ?', engine.score, engine.lines_cleared, engine.tick, engine.game_over))
+    return h.digest()
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class InputRecorder:
+    def __init__(self, path, tick_rate, width=GRID_WIDTH, height=GRID_HEIGHT):
+        # 입력이 들어올 때마다 파일에 이어 쓰므로 비정상 종료 직전까지의 기록도 남음
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(LOG_MAGIC, LOG_VERSION, tick_rate, width, height))
+        self.base = 0
+        self.last_frame = 0
+
+    def _write(self, engine, tag, payload=b''):
+        frame = self.base + engine.tick
+        record = bytearray()
+        write_varint(record, frame - self.last_frame)
+        record.append(tag)
+        record += payload
+        self.file.write(record)
+        self.last_frame = frame
+
+    def record(self, engine, action):
+        # engine.apply 직전에 호출 (엔진이 무시할 입력은 기록하지 않음)
+        if action != ACTION_NONE and engine.accepts_input():
+            self._write(engine, action)
+
+    def reset(self, engine, seed):
+        # engine.reset(seed) 직전에 호출
+        self._write(engine, TAG_RESET, SEED.pack(seed))
+        self.base += engine.tick
+
+    def close(self, engine):
+        # 최종 점수와 해시를 기록하고 파일을 닫음
+        self._write(engine, TAG_END, END.pack(engine.score, state_hash(engine)))
+        self.file.close()
+
+
+def read_log(path):
+    # (헤더 dict, [(프레임, 태그, 데이터)]) 반환
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, tick_rate, width, height = HEADER.unpack_from(data)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError(f"{path}: 지원하지 않는 로그 형식")
+    header = {'tick_rate': tick_rate, 'width': width, 'height': height}
+
+    events = []
+    pos = HEADER.size
+    frame = 0
+    while pos < len(data):
+        delta, pos = read_varint(data, pos)
+        frame += delta
+        tag = data[pos]
+        pos += 1
+        if tag == TAG_RESET:
+            payload = SEED.unpack_from(data, pos)[0]
+            pos += SEED.size
+        elif tag == TAG_END:
+            payload = END.unpack_from(data, pos)
+            pos += END.size
+        elif tag in ACTIONS:
+            payload = None
+        else:
+            raise ValueError(f"{path}: 알 수 없는 레코드 {tag:#x}")
+        events.append((frame, tag, payload))
+    return header, events
+
+
+class Replayer:
+    def __init__(self, path, snapshot_interval=600):
+        # snapshot_interval: 재생 중 엔진 스냅샷을 남기는 프레임 간격 (탐색 시 최대 재실행 프레임 수)
+        self.header, self.events = read_log(path)
+        self.snapshot_interval = snapshot_interval
+        self.engine = TetrisEngine(seed=0, tick_rate=self.header['tick_rate'],
+                                   width=self.header['width'], height=self.header['height'])
+        self.end = self.events[-1] if self.events and self.events[-1][1] == TAG_END else None
+        self.snapshots = []
+        self.position = 0
+        self.base = 0
+
+    @property
+    def frame(self):
+        return self.base + self.engine.tick
+
+    @property
+    def last_frame(self):
+        return self.events[-1][0] if self.events else 0
+
+    def run_to(self, target):
+        # target 프레임의 입력을 처리하기 직전 상태까지 진행
+        engine = self.engine
+        events = self.events
+        interval = self.snapshot_interval
+        while True:
+            frame = self.base + engine.tick
+            if frame % interval == 0 and (not self.snapshots or frame > self.snapshots[-1][0]):
+                self.snapshots.append((frame, self.position, self.base, engine.snapshot()))
+            if frame >= target:
+                return
+            self.apply_events(frame)
+            engine.step()
+
+    def apply_events(self, frame):
+        # frame에 기록된 입력과 새 게임 시작을 차례로 처리
+        engine = self.engine
+        events = self.events
+        while self.position < len(events) and events[self.position][0] == frame:
+            _, tag, payload = events[self.position]
+            self.position += 1
+            if tag == TAG_RESET:
+                self.base += engine.tick
+                engine.reset(seed=payload)
+            elif tag != TAG_END:
+                engine.apply(tag)
+
+    def seek(self, target):
+        # target 이전의 가장 가까운 스냅샷에서 다시 진행 (아직 지나지 않은 구간은 이어서 진행)
+        best = None
+        for snapshot in self.snapshots:
+            if snapshot[0] > target:
+                break
+            best = snapshot
+        if best and (target < self.frame or best[0] > self.frame):
+            _, self.position, self.base, state = best
+            self.engine.restore(state)
+        self.run_to(target)
+        return self.engine
+
+    def verify(self):
+        # 로그 끝까지 재생하고 기록된 점수/해시와 비교 (일치 여부, 점수, 해시)
+        # 종료 기록과 같은 프레임의 입력(틱 없이 적용된 키 입력 직후 종료)까지 처리한 뒤 비교
+        self.run_to(self.last_frame)
+        self.apply_events(self.last_frame)
+        digest = state_hash(self.engine)
+        if self.end is None:
+            return None, self.engine.score, digest
+        score, expected = self.end[2]
+        return (score, expected) == (self.engine.score, digest), self.engine.score, digest
+
+
+def selftest(games=20, seed=0):
+    # 무작위 입력으로 게임을 기록하고 다시 재생해 점수와 해시가 같은지 확인 (실패한 게임 수 반환)
+    # 마지막 입력(홀수 번째 게임은 새 게임 시작까지)이 종료 기록과 같은 프레임에 오는 경우를 포함
+    rng = random.Random(seed)
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'selftest.bin')
+        for game in range(games):
+            engine = TetrisEngine(seed=0)
+            recorder = InputRecorder(path, engine.tick_rate)
+            for _ in range(1 + game % 2):
+                game_seed = rng.getrandbits(63)
+                recorder.reset(engine, game_seed)
+                engine.reset(seed=game_seed)
+                for _ in range(rng.randrange(1, 3000)):
+                    action = rng.choice(ACTIONS)
+                    recorder.record(engine, action)
+                    engine.apply(action)
+                    engine.step()
+                    if engine.game_over:
+                        break
+                while not engine.accepts_input() and not engine.game_over:
+                    engine.step()
+                action = rng.choice(ACTIONS[1:])
+                recorder.record(engine, action)
+                engine.apply(action)
+            recorder.close(engine)
+            ok, _, _ = Replayer(path).verify()
+            if not ok:
+                failures += 1
+                print(f"selftest: game {game} MISMATCH")
+    print(f"selftest: {games - failures}/{games} ok")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="테트리스 입력 기록 재생")
+    parser.add_argument('log', nargs='?', help="tetris.py --record로 저장한 로그 파일")
+    parser.add_argument('--seek', type=int, metavar='FRAME', help="해당 프레임으로 이동해 상태 출력")
+    parser.add_argument('--snapshot-interval', type=int, default=600)
+    parser.add_argument('--selftest', action='store_true', help="무작위 게임을 기록하고 재생해 일치하는지 확인")
+    args = parser.parse_args()
+    if args.selftest:
+        return 1 if selftest() else 0
+    if not args.log:
+        parser.error("로그 파일을 지정해야 함")
+
+    replayer = Replayer(args.log, args.snapshot_interval)
+    start = time.perf_counter()
+    ok, score, digest = replayer.verify()
+    elapsed = time.perf_counter() - start
+    frames = replayer.last_frame
+    print(f"frames: {frames} ({frames / elapsed if elapsed else 0:.0f} frames/s)")
+    print(f"score: {score} hash: {digest.hex()}")
+    print("verify:", {True: "ok", False: "MISMATCH", None: "no end record"}[ok])
+
+    if args.seek is not None:
+        engine = replayer.seek(args.seek)
+        print(f"seek {args.seek}: tick {engine.tick} score {engine.score} "
+              f"lines {engine.lines_cleared} hash {state_hash(engine).hex()}")
+    return 1 if ok is False else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
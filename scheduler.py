@@ -0,0 +1,80 @@
+# 고정 틱 스케줄러
+# 프레임마다 단조 시계(perf_counter)를 한 번 읽어 누적기에 더하고, 쌓인 시간만큼 로직을 고정 간격으로 진행한다.
+# 렌더러는 다음 틱까지 남은 비율(alpha)로 틱 사이를 보간하고, 로직이 밀리면 그리기를 건너뛰어 따라잡는다.
+# 로직은 항상 1/tick_rate초 단위로만 진행되므로 그리기가 느려져도 게임 진행은 같다.
+import time
+
+
+class FixedStepScheduler:
+    def __init__(self, tick_rate, render_fps=60, max_ticks_per_frame=8, max_frame_skip=4,
+                 clock=time.perf_counter, sleep=time.sleep):
+        # render_fps: 초당 최대 그리기 횟수 (0이면 제한 없음)
+        # max_ticks_per_frame: 한 프레임에 따라잡을 최대 틱 수 (넘는 시간은 버려 게임이 잠시 느려짐)
+        # max_frame_skip: 로직이 밀릴 때 연속으로 건너뛸 수 있는 최대 그리기 횟수
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.render_interval = 1.0 / render_fps if render_fps else 0.0
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.max_frame_skip = max_frame_skip
+        self.clock = clock
+        self.sleep = sleep
+        self.now = None
+        self.accumulator = 0.0
+        self.next_render = 0.0
+        self.behind = False
+        self.skipped = 0
+        self.dropped_time = 0.0  # 따라잡지 못해 버린 시간 (초)
+
+    @property
+    def alpha(self):
+        # 마지막 틱 이후 다음 틱까지 진행한 비율 (0.0 ~ 1.0, 보간용)
+        return min(1.0, self.accumulator * self.tick_rate)
+
+    def begin_frame(self, running=True):
+        # 시계를 읽고 이번 프레임에 진행할 틱 수를 반환 (running이 False이면 시간을 쌓지 않음)
+        now = self.clock()
+        elapsed = 0.0 if self.now is None else now - self.now
+        self.now = now
+        if not running:
+            self.accumulator = 0.0
+            self.behind = False
+            return 0
+
+        self.accumulator += elapsed
+        ticks = int(self.accumulator * self.tick_rate)
+        self.behind = ticks > 1
+        if ticks > self.max_ticks_per_frame:
+            self.dropped_time += (ticks - self.max_ticks_per_frame) * self.dt
+            ticks = self.max_ticks_per_frame
+            self.accumulator = ticks * self.dt
+        self.accumulator -= ticks * self.dt
+        return ticks
+
+    def should_render(self, urgent=False):
+        # 그리기 속도 제한과 프레임 건너뛰기 (begin_frame에서 읽은 시각 기준)
+        # urgent: 아직 화면에 나가지 않은 입력이 있으면 속도 제한을 기다리지 않고 바로 그림 (로직이 밀릴 때는 제외)
+        if self.render_interval and self.now < self.next_render and not urgent:
+            return False
+        if self.behind and self.skipped < self.max_frame_skip:
+            self.skipped += 1
+            return False
+        self.skipped = 0
+        if self.render_interval:
+            self.next_render += self.render_interval
+            if self.next_render <= self.now or self.next_render > self.now + self.render_interval:
+                self.next_render = self.now + self.render_interval
+        return True
+
+    def delay(self):
+        # 다음 틱 또는 다음 그리기 시각까지 남은 시간 (초, 대기 시간 계산에만 시계를 다시 읽음)
+        # 그리기 속도 제한이 없으면 기다리지 않고 바로 다음 프레임을 그림
+        if self.now is None or not self.render_interval:
+            return 0.0
+        due = min(self.now + self.dt - self.accumulator, self.next_render)
+        return due - self.clock()
+
+    def wait(self):
+        # 다음 틱 또는 다음 그리기 시각까지 잠듦
+        delay = self.delay()
+        if delay > 0:
+            self.sleep(delay)
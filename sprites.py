@@ -0,0 +1,62 @@
+# 블록 스프라이트 캐시
+# 색상별 블록 타일, 줄 제거 효과의 확대 크기별 타일, 하드 드롭 잔상의 알파 단계별 타일을
+# 한 번만 그려 두고 blit/blits로 재사용한다.
+import pygame
+
+from constants import WHITE
+
+# 잔상 타일의 알파 단계 수
+ALPHA_BUCKETS = 16
+
+
+class BlockSprites:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.tiles = {}
+        self.trails = {}
+        self.solids = {}
+
+    def tile(self, color, size=None):
+        # 테두리가 있는 불투명 블록 (size: 확대 효과용 한 변 길이)
+        size = size or self.cell_size
+        key = (color, size)
+        surface = self.tiles.get(key)
+        if surface is None:
+            surface = pygame.Surface((size, size)).convert()
+            surface.fill(color)
+            pygame.draw.rect(surface, WHITE, (0, 0, size, size), 1)
+            self.tiles[key] = surface
+        return surface
+
+    def solid(self, color):
+        # 테두리 없는 단색 블록 (깜빡임 효과)
+        surface = self.solids.get(color)
+        if surface is None:
+            surface = pygame.Surface((self.cell_size, self.cell_size)).convert()
+            surface.fill(color)
+            self.solids[color] = surface
+        return surface
+
+    def trail(self, color, alpha):
+        # 반투명 잔상 블록 (알파는 ALPHA_BUCKETS 단계로 양자화)
+        bucket = round(alpha * (ALPHA_BUCKETS - 1) / 255)
+        key = (color, bucket)
+        surface = self.trails.get(key)
+        if surface is None:
+            alpha = bucket * 255 // (ALPHA_BUCKETS - 1)
+            size = self.cell_size
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.rect(surface, (*color, alpha), (0, 0, size, size))
+            pygame.draw.rect(surface, (255, 255, 255, alpha), (0, 0, size, size), 1)
+            surface = surface.convert_alpha()
+            self.trails[key] = surface
+        return surface
+
+    def prewarm(self, colors, max_expand=0):
+        # 게임 중에 쓰일 타일을 미리 생성
+        for color in colors:
+            for expand in range(max_expand + 1):
+                self.tile(color, self.cell_size + expand)
+            for bucket in range(ALPHA_BUCKETS):
+                self.trail(color, bucket * 255 // (ALPHA_BUCKETS - 1))
+        self.solid(WHITE)
@@ -0,0 +1,171 @@
+# 공유 메모리 상태 스트림
+# 게임이 틱마다 보드, 현재/다음 조각, 점수, 레벨, 줄 수를 메모리 맵 파일의 링 버퍼에 고정 형식으로 쓰고,
+# 분석 도구나 방송 오버레이 같은 다른 프로세스가 게임 루프를 막지 않고 읽는다.
+# 리눅스에서는 /dev/shm 아래 경로를 쓰면 디스크를 거치지 않는다.
+#
+# 파일 형식 (리틀 엔디언):
+#   헤더: 매직, 버전, 보드 너비/높이, 슬롯 수, 슬롯 크기, 지금까지 쓴 상태 수(written)
+#   슬롯 capacity개: 시퀀스, 틱, 점수, 레벨, 줄, 상태 비트, 현재 조각(종류, 회전, x, y), 다음 조각 종류, 보드 칸 코드
+# n번째 상태(1부터)는 (n - 1) % capacity 슬롯에 쓰고, 쓰는 동안 시퀀스는 2n - 1, 다 쓰면 2n이다.
+# 읽는 쪽은 시퀀스를 읽고 내용을 복사한 뒤 시퀀스를 다시 읽어 2n으로 같으면 온전한 상태로 본다 (잠금 없음).
+#
+# 사용법: python statestream.py /dev/shm/tetris.state  (tetris.py --stream 으로 쓰는 스트림을 읽어 출력)
+import argparse
+import mmap
+import struct
+import time
+
+import numpy as np
+
+
+STREAM_MAGIC = b'TSTM'
+STREAM_VERSION = 1
+HEADER = struct.Struct('<4sHHHHIQ')
+WRITTEN = struct.Struct('<Q')
+WRITTEN_OFFSET = HEADER.size - WRITTEN.size
+SEQ = struct.Struct('<Q')
+# 시퀀스 다음의 고정 필드 (틱, 점수, 레벨, 줄, 상태 비트, 조각 종류, 회전, x, y, 다음 조각 종류)
+FIELDS = struct.Struct('<QQIIIbBhhb5x')
+GRID_OFFSET = SEQ.size + FIELDS.size
+
+FLAG_GAME_OVER = 1
+FLAG_CLEARING = 2  # 줄 제거 효과 중
+FLAG_HARD_DROP = 4  # 하드 드롭 효과 중
+
+
+def slot_size(width, height):
+    # 8바이트 단위로 맞춘 슬롯 크기
+    return (GRID_OFFSET + width * height + 7) // 8 * 8
+
+
+def slot_dtype(width, height):
+    # 슬롯 하나에 맞춘 NumPy 구조체 타입 (읽는 쪽 뷰용)
+    return np.dtype({
+        'names': ['seq', 'tick', 'score', 'level', 'lines', 'flags',
+                  'kind', 'rotation', 'x', 'y', 'next_kind', 'grid'],
+        'formats': ['<u8', '<u8', '<u8', '<u4', '<u4', '<u4',
+                    'i1', 'u1', '<i2', '<i2', 'i1', ('u1', (height, width))],
+        'offsets': [0, 8, 16, 24, 28, 32, 36, 37, 38, 40, 42, GRID_OFFSET],
+        'itemsize': slot_size(width, height),
+    })
+
+
+class StateStreamWriter:
+    def __init__(self, path, width, height, capacity=256):
+        # capacity: 링 버퍼 슬롯 수 (읽는 쪽이 이만큼 뒤처지기 전까지는 지난 상태도 읽을 수 있음)
+        self.width = width
+        self.height = height
+        self.capacity = capacity
+        self.slot_size = slot_size(width, height)
+        size = HEADER.size + capacity * self.slot_size
+        self.file = open(path, 'w+b')
+        self.file.truncate(size)
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        HEADER.pack_into(self.mm, 0, STREAM_MAGIC, STREAM_VERSION, width, height, capacity, self.slot_size, 0)
+        self.written = 0
+        self.grid_board = None  # 칸 코드를 만든 보드 (새 게임이나 복원으로 보드가 바뀌면 버전이 다시 작아질 수 있음)
+        self.grid_version = None
+        self.grid_bytes = b''
+
+    def publish(self, engine):
+        # 엔진의 현재 상태를 다음 슬롯에 씀 (보드 칸 코드는 보드가 바뀐 틱에만 다시 만듦)
+        board = engine.board
+        if board is not self.grid_board or board.version != self.grid_version:
+            self.grid_bytes = b''.join(map(board.row_codes, range(board.height)))
+            self.grid_board = board
+            self.grid_version = board.version
+
+        n = self.written + 1
+        offset = HEADER.size + (n - 1) % self.capacity * self.slot_size
+        mm = self.mm
+        piece = engine.current_piece
+        flags = (
+            (FLAG_GAME_OVER if engine.game_over else 0)
+            | (FLAG_CLEARING if engine.lines_to_clear else 0)
+            | (FLAG_HARD_DROP if engine.hard_drop_active else 0)
+        )
+        SEQ.pack_into(mm, offset, 2 * n - 1)
+        FIELDS.pack_into(mm, offset + SEQ.size, engine.tick, engine.score, engine.level, engine.lines_cleared,
+                         flags, piece['kind'], piece['rotation'], piece['x'], piece['y'],
+                         engine.next_piece['kind'])
+        start = offset + GRID_OFFSET
+        mm[start:start + len(self.grid_bytes)] = self.grid_bytes
+        SEQ.pack_into(mm, offset, 2 * n)
+        WRITTEN.pack_into(mm, WRITTEN_OFFSET, n)
+        self.written = n
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+
+class StateStreamReader:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.width, self.height, self.capacity, size, _ = HEADER.unpack_from(self.mm)
+        if magic != STREAM_MAGIC or version != STREAM_VERSION:
+            raise ValueError(f"{path}: 지원하지 않는 스트림 형식")
+        self.dtype = slot_dtype(self.width, self.height)
+        if size != self.dtype.itemsize:
+            raise ValueError(f"{path}: 슬롯 크기가 다름 {size}")
+        # 링 버퍼 전체를 복사 없이 가리키는 읽기 전용 배열 (ring['grid'][i]는 i번 슬롯의 보드)
+        self.ring = np.ndarray((self.capacity,), dtype=self.dtype, buffer=self.mm, offset=HEADER.size)
+
+    @property
+    def written(self):
+        # 지금까지 쓴 상태 수 (가장 최근 상태의 번호)
+        return WRITTEN.unpack_from(self.mm, WRITTEN_OFFSET)[0]
+
+    def slot(self, n):
+        # n번째 상태가 있는 슬롯의 복사 없는 뷰 (쓰는 쪽이 덮어쓸 수 있으므로 일관성은 보장하지 않음)
+        return self.ring[(n - 1) % self.capacity]
+
+    def read(self, n=None, retries=8):
+        # n번째 상태(기본값은 가장 최근)의 일관된 복사본, 이미 덮어써졌거나 아직 없으면 None
+        for _ in range(retries):
+            latest = self.written
+            target = latest if n is None else n
+            if target < 1 or target > latest or latest - target >= self.capacity:
+                return None
+            record = self.slot(target).copy()
+            if record['seq'] == 2 * target and self.slot(target)['seq'] == 2 * target:
+                return record
+            if n is not None and self.slot(target)['seq'] > 2 * target:
+                return None  # 읽는 동안 다음 바퀴의 상태로 덮어써짐
+        return None
+
+    def close(self):
+        # 배열이 메모리 맵을 참조하고 있으면 닫을 수 없으므로 먼저 해제
+        self.ring = None
+        self.mm.close()
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="테트리스 상태 스트림 읽기")
+    parser.add_argument('path', help="tetris.py --stream으로 지정한 파일")
+    parser.add_argument('--interval', type=float, default=0.5, help="출력 간격 (초)")
+    args = parser.parse_args()
+
+    reader = StateStreamReader(args.path)
+    last = 0
+    try:
+        while True:
+            record = reader.read()
+            if record is not None and record['tick'] != last:
+                last = record['tick']
+                # 열마다 가장 위 블록까지의 높이 (맨 아래에 가득 찬 줄을 덧대 빈 열은 0)
+                filled = np.vstack([record['grid'] != 0, np.ones((1, reader.width), bool)])
+                heights = reader.height - np.argmax(filled, axis=0)
+                print(f"tick {record['tick']} score {record['score']} level {record['level']} "
+                      f"lines {record['lines']} piece {record['kind']} next {record['next_kind']} "
+                      f"heights {heights.tolist()}")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
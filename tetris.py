@@ -1,591 +1,897 @@
+import time
+
+# 시작 시간 측정 기준 (모듈 불러오기 시간 포함)
+IMPORT_START = time.perf_counter()
+
 import pygame
 import random
-import time
 import math
+import argparse
 
-# 색상 정의
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-GRAY = (128, 128, 128)
-DARK_GRAY = (51, 51, 51)  # #333333에 해당하는 RGB 값
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLUE = (0, 0, 255)
-CYAN = (0, 255, 255)
-MAGENTA = (255, 0, 255)
-YELLOW = (255, 255, 0)
-ORANGE = (255, 165, 0)
-
-# 테트리미노 모양 정의
-SHAPES = [
-    [[1, 1, 1, 1]],  # I
-    [[1, 1], [1, 1]],  # O
-    [[1, 1, 1], [0, 1, 0]],  # T
-    [[1, 1, 1], [1, 0, 0]],  # L
-    [[1, 1, 1], [0, 0, 1]],  # J
-    [[1, 1, 0], [0, 1, 1]],  # Z
-    [[0, 1, 1], [1, 1, 0]]   # S
-]
-
-# 테트리미노 색상 정의
-SHAPE_COLORS = [CYAN, YELLOW, MAGENTA, ORANGE, BLUE, RED, GREEN]
+from ai import TetrisBot
+from constants import *
+from engine import (
+    TetrisEngine, ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_HARD_DROP
+)
+from fonts import FontLoader, FONT_CACHE_PATH
+from inputs import InputHandler, DAS_MS, ARR_MS, SOFT_DROP_MS
+from particles import ParticleSystem
+from profiler import FrameProfiler, StartupTimer
+from replay import InputRecorder
+from scheduler import FixedStepScheduler
+from statestream import StateStreamWriter, slot_size
+from sprites import BlockSprites
+from viewport import Viewport, ChunkCache
 
 # 게임 설정
 CELL_SIZE = 30
-GRID_WIDTH = 10
-GRID_HEIGHT = 20
-SCREEN_WIDTH = GRID_WIDTH * CELL_SIZE + 200  # 추가 공간
-SCREEN_HEIGHT = GRID_HEIGHT * CELL_SIZE
+PANEL_WIDTH = 200  # 오른쪽 정보 패널 너비
+MIN_SCREEN_HEIGHT = GRID_HEIGHT * CELL_SIZE  # 보드가 낮아도 정보 패널이 들어가는 높이
 FPS = 60
 
+# 보드가 이보다 크면 이만큼만 보이고 조각을 따라 스크롤
+VIEW_COLS = 40
+VIEW_ROWS = 28
+
 # 그리드 위치 설정
 GRID_X = 0
 GRID_Y = 0
 
-# 파티클 클래스 정의
-class Particle:
-    def __init__(self, x, y, color):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.size = random.uniform(2, 5)
-        self.velocity_x = random.uniform(-2, 2)
-        self.velocity_y = random.uniform(-5, -1)
-        self.gravity = 0.1
-        self.life = 1.0  # 수명 (1.0 = 100%)
-        self.decay = random.uniform(0.01, 0.03)  # 수명 감소율
-    
-    def update(self):
-        self.x += self.velocity_x
-        self.y += self.velocity_y
-        self.velocity_y += self.gravity
-        self.life -= self.decay
-        return self.life > 0
-    
-    def draw(self, screen):
-        alpha = int(self.life * 255)
-        color_with_alpha = (*self.color, alpha)
-        
-        # 파티클 그리기
-        s = pygame.Surface((int(self.size * 2), int(self.size * 2)), pygame.SRCALPHA)
-        pygame.draw.circle(s, color_with_alpha, (int(self.size), int(self.size)), int(self.size))
-        screen.blit(s, (int(self.x - self.size), int(self.y - self.size)))
+# 한글 지원 폰트 (우선순위 순, 없으면 pygame 기본 글꼴)
+KOREAN_FONTS = ('AppleGothic', 'Apple SD Gothic Neo', 'Nanum Gothic', 'NanumGothic', 'Malgun Gothic', '맑은 고딕')
+
+# 키 입력과 엔진 동작 연결
+KEY_ACTIONS = {
+    pygame.K_LEFT: ACTION_LEFT,
+    pygame.K_RIGHT: ACTION_RIGHT,
+    pygame.K_DOWN: ACTION_DOWN,
+    pygame.K_UP: ACTION_ROTATE,
+    pygame.K_SPACE: ACTION_HARD_DROP,
+}
+
+# 착지 위치 미리 보기(고스트 조각)의 불투명도
+GHOST_ALPHA = 64
+
+# 성능 오버레이 영역과 표시 값 갱신 주기 (프레임)
+PERF_RECT = pygame.Rect(GRID_X + 4, GRID_Y + 4, 210, 86)
+PERF_REFRESH_FRAMES = 15
+
+# 화면이 멈춰 있을 때 성능 오버레이 값을 갱신하려고 깨어나는 간격 (밀리초)
+PERF_IDLE_TIMEOUT_MS = 250
+
+# 상태 스트림 파일의 최대 크기 (바이트)
+STREAM_BUDGET = 64 << 20
 
 class Tetris:
-    def __init__(self):
-        # 게임 초기화
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    def __init__(self, dirty_rects=False, max_particles=2000, profile_output=None, seed=None, record_path=None,
+                 render_fps=FPS, max_frame_skip=4, stream_path=None, startup=None, startup_report=None,
+                 font_cache=FONT_CACHE_PATH, renderer='software', scale=1, board_width=GRID_WIDTH,
+                 board_height=GRID_HEIGHT, view_cols=VIEW_COLS, view_rows=VIEW_ROWS, das_ms=DAS_MS, arr_ms=ARR_MS,
+                 soft_drop_ms=SOFT_DROP_MS, input_latency_output=None):
+        # 시작 단계별 시간 측정 (첫 프레임을 화면에 내보낼 때까지)
+        # startup_report가 있으면 첫 프레임 후 JSON으로 저장
+        self.startup = startup or StartupTimer()
+        self.startup_report = startup_report
+        self.startup.begin('display')
+        
+        # 화면 배치: 보드 중 보이는 영역(뷰포트) 오른쪽에 정보 패널
+        self.viewport = Viewport(board_width, board_height, view_cols, view_rows)
+        self.board_rect = pygame.Rect(GRID_X, GRID_Y, self.viewport.cols * CELL_SIZE, self.viewport.rows * CELL_SIZE)
+        self.screen_width = self.board_rect.right + PANEL_WIDTH
+        self.screen_height = max(self.board_rect.bottom, MIN_SCREEN_HEIGHT)
+        self.panel_rect = pygame.Rect(self.board_rect.right, 0, PANEL_WIDTH, self.screen_height)
+        self.panel_x = self.board_rect.right + 20
+        screen_size = (self.screen_width, self.screen_height)
+        # 보드 내용을 그릴 때의 클립 영역 (보드 전체가 보이면 줄 제거 효과로 확대된 블록이 가장자리 밖으로 조금 나갈 수 있음)
+        whole_board = (self.viewport.cols, self.viewport.rows) == (board_width, board_height)
+        self.board_clip = pygame.Rect((0, 0), screen_size) if whole_board else self.board_rect
+        
+        # 게임 초기화 (쓰는 모듈만 초기화, 글꼴 모듈은 처음 글자를 그릴 때 초기화)
+        # renderer가 'gl'이면 OpenGL 창(scale배 크기)에 그림, 화면이 없는 dummy 드라이버에서는 헤드리스 컨텍스트에 그림
+        pygame.display.init()
+        gl_window = renderer == 'gl' and pygame.display.get_driver() != 'dummy'
+        if gl_window:
+            pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MAJOR_VERSION, 3)
+            pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 3)
+            pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, pygame.GL_CONTEXT_PROFILE_CORE)
+            self.screen = pygame.display.set_mode((int(self.screen_width * scale), int(self.screen_height * scale)),
+                                                  pygame.OPENGL | pygame.DOUBLEBUF)
+        else:
+            self.screen = pygame.display.set_mode(screen_size)
         pygame.display.set_caption("테트리스")
-        self.clock = pygame.time.Clock()
         
-        # 한글 지원 폰트 설정
-        try:
-            # 한글 지원 폰트들
-            korean_fonts = ['AppleGothic', 'Apple SD Gothic Neo', 'Nanum Gothic', 'NanumGothic', 'Malgun Gothic', '맑은 고딕']
-            font_found = False
-            
-            for font_name in korean_fonts:
-                try:
-                    self.font = pygame.font.SysFont(font_name, 36)
-                    self.title_font = pygame.font.SysFont(font_name, 48)
-                    self.game_over_font = pygame.font.SysFont(font_name, 72)
-                    # 테스트 렌더링으로 폰트 지원 확인
-                    test = self.font.render('테스트', True, WHITE)
-                    font_found = True
-                    break
-                except:
-                    continue
-            
-            if not font_found:
-                # 폴백: 기본 폰트 사용
-                self.font = pygame.font.SysFont(None, 36)
-                self.title_font = pygame.font.SysFont(None, 48)
-                self.game_over_font = pygame.font.SysFont(None, 72)
-        except:
-            self.font = pygame.font.SysFont(None, 36)
-            self.title_font = pygame.font.SysFont(None, 48)
-            self.game_over_font = pygame.font.SysFont(None, 72)
+        # 한글 지원 폰트 (찾은 글꼴 경로는 캐시 파일에 저장, 크기별 글꼴은 처음 쓸 때 로드)
+        self.fonts = FontLoader(KOREAN_FONTS, font_cache, self.startup)
+        self.default_fonts = FontLoader((), None, self.startup)
+        self.startup.begin('sprites')
         
         # 더블 버퍼링을 위한 서피스 생성
-        self.buffer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.buffer = pygame.Surface(screen_size)
+        
+        # 블록 타일 캐시 (색상별, 확대 크기별, 잔상 알파 단계별)
+        self.sprites = BlockSprites(CELL_SIZE)
+        self.sprites.prewarm(SHAPE_COLORS, max_expand=int(CELL_SIZE * 0.2))
+        
+        # 고정된 블록은 덩어리 서피스로 미리 그려 두고 보이는 덩어리만 복사
+        self.chunks = ChunkCache(self.sprites, CELL_SIZE)
+        
+        self.startup.begin('static_layer')
+        
+        # 고정 레이어(격자, 패널 테두리)는 한 번만 그려 두고, 글자는 값이 바뀔 때만 다시 렌더링
+        self.text_cache = {}
+        self.static_layer = pygame.Surface(screen_size)
+        self.static_layer.fill(BLACK)
+        self.draw_grid(self.static_layer)
+        self.draw_panel_frame(self.static_layer)
+        self.game_over_overlay = pygame.Surface(screen_size, pygame.SRCALPHA)
+        self.game_over_overlay.fill((0, 0, 0, 128))
+        
+        # OpenGL 렌더러 (PyOpenGL은 이 모드에서만 불러옴)
+        self.gl = None
+        if renderer == 'gl':
+            from glrenderer import GLRenderer
+            self.gl = GLRenderer(screen_size, CELL_SIZE, (GRID_X, GRID_Y), PERF_RECT, GHOST_ALPHA,
+                                 scale=scale, headless=not gl_window)
+        self.startup.begin('game')
+        
+        # 더티 렉트 모드: 바뀐 영역만 다시 그리고 display.update(rects)로 전송
+        self.dirty_rects = dirty_rects
+        self.last_mode = None
+        self.last_cells = {}
+        self.last_overlay = None
+        self.last_panel = None
+        self.last_view = None
+        
+        # 게임 규칙은 헤드리스 엔진이 처리 (화면 프레임당 한 틱)
+        # 게임마다 seed에서 이어지는 시드를 쓰므로 기록한 입력으로 그대로 다시 실행할 수 있음
+        self.engine = TetrisEngine(tick_rate=FPS, width=board_width, height=board_height)
+        
+        # 로직은 고정 틱(FPS)으로, 그리기는 render_fps 이하로 진행 (그리기가 밀려도 로직 틱 수는 같음)
+        self.scheduler = FixedStepScheduler(FPS, render_fps=render_fps, max_frame_skip=max_frame_skip)
+        self.tick_alpha = 0.0  # 마지막 틱 이후 다음 틱까지 진행한 비율 (애니메이션 보간용)
+        self.seeds = random.Random(seed)
+        self.recorder = InputRecorder(record_path, FPS, board_width, board_height) if record_path else None
+        
+        # 틱마다 게임 상태를 공유 메모리 링 버퍼에 씀 (다른 프로세스가 statestream.StateStreamReader로 읽음)
+        # 큰 보드는 파일이 STREAM_BUDGET을 넘지 않게 슬롯 수를 줄임
+        self.stream = None
+        if stream_path:
+            capacity = max(8, min(256, STREAM_BUDGET // slot_size(board_width, board_height)))
+            self.stream = StateStreamWriter(stream_path, board_width, board_height, capacity)
+        
+        # 키 입력: 틱마다 눌림 상태로 자동 반복(DAS/ARR), 효과 중 입력은 버퍼에 두었다가 적용
+        # 입력에서 화면 표시까지의 지연을 기록 (input_latency_output이 있으면 종료 시 저장)
+        self.inputs = InputHandler(self.apply_action, FPS, das_ms, arr_ms, soft_drop_ms)
+        self.input_latency_output = input_latency_output
+        
+        # 파티클 효과 (최대 개수를 넘는 파티클은 생성하지 않음)
+        self.particles = ParticleSystem(max_particles)
+        
+        # AI 자동 플레이 (A 키로 켜고 끔)
+        self.bot = None
+        
+        # 프레임 단계별 시간 측정 (profile_output이 있으면 처음부터 기록하고 종료 시 저장,
+        # 없으면 F3 키로 오버레이를 처음 켤 때 시작)
+        self.profile_output = profile_output
+        self.profiler = None
+        self.show_perf = False
+        self.last_perf = False
+        self.perf_font = None
+        self.perf_stats = (0.0, 0.0, 0.0, 0.0, 0.0)
+        if profile_output:
+            self.enable_profiler()
         
         # 게임 변수 초기화
         self.reset_game()
         
         # 게임 시작 화면 표시 여부
         self.show_start_screen = True
+        
+        # 일시정지 (P 키), 멈춘 화면을 이미 그렸으면 입력이 올 때까지 이벤트 대기
+        self.paused = False
+        self.idle_frame_shown = False
+        self.startup.begin('first_frame')
+
+    @property
+    def font(self):
+        return self.fonts.get(36)
+
+    @property
+    def title_font(self):
+        return self.fonts.get(48)
+
+    @property
+    def game_over_font(self):
+        return self.fonts.get(72)
 
     def reset_game(self):
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.current_piece = self.new_piece()
-        self.next_piece = self.new_piece()
-        self.game_over = False
-        self.score = 0
-        self.level = 1
-        self.lines_cleared = 0
-        self.fall_speed = 0.5  # 초당 한 칸씩 떨어짐
-        self.last_fall_time = time.time()
-        
-        # 줄 제거 효과를 위한 변수 추가
-        self.lines_to_clear = []
-        self.clear_effect_time = 0
-        self.clear_effect_duration = 1.0  # 효과 지속 시간 (초)
-        self.clear_effect_flashes = 6  # 깜빡임 횟수
+        seed = self.seeds.getrandbits(63)
+        if self.recorder:
+            self.recorder.reset(self.engine, seed)
+        self.engine.reset(seed=seed)
+        piece = self.engine.current_piece
+        self.viewport.center(piece, self.engine.drop_position(piece))
+        self.inputs.reset()
         
         # 파티클 효과
-        self.particles = []
+        self.particles.clear()
         
         # 효과를 위한 변수
         self.glow_intensity = 0.0
-        
-        # 하드 드롭 애니메이션을 위한 변수
-        self.hard_drop_active = False
-        self.hard_drop_start_time = 0
-        self.hard_drop_duration = 0.15  # 하드 드롭 애니메이션 지속 시간 (초)
-        self.hard_drop_start_y = 0
-        self.hard_drop_end_y = 0
-        self.hard_drop_piece = None
-
-    def new_piece(self):
-        # 새로운 테트리미노 생성
-        shape_idx = random.randint(0, len(SHAPES) - 1)
-        return {
-            'shape': SHAPES[shape_idx],
-            'color': SHAPE_COLORS[shape_idx],
-            'x': GRID_WIDTH // 2 - len(SHAPES[shape_idx][0]) // 2,
-            'y': 0
-        }
-
-    def valid_position(self, piece, x_offset=0, y_offset=0):
-        # 테트리미노가 유효한 위치에 있는지 확인
-        for y, row in enumerate(piece['shape']):
-            for x, cell in enumerate(row):
-                if cell:
-                    pos_x = piece['x'] + x + x_offset
-                    pos_y = piece['y'] + y + y_offset
-                    
-                    if (pos_x < 0 or pos_x >= GRID_WIDTH or 
-                        pos_y >= GRID_HEIGHT or 
-                        (pos_y >= 0 and self.grid[pos_y][pos_x])):
-                        return False
-        return True
-
-    def rotate_piece(self, piece):
-        # 테트리미노 회전
-        shape = piece['shape']
-        rotated = list(zip(*reversed(shape)))
-        return rotated
-
-    def try_rotate(self):
-        # 테트리미노 회전 시도
-        rotated_shape = self.rotate_piece(self.current_piece)
-        old_shape = self.current_piece['shape']
-        self.current_piece['shape'] = rotated_shape
-        
-        if not self.valid_position(self.current_piece):
-            self.current_piece['shape'] = old_shape
-
-    def lock_piece(self):
-        # 테트리미노를 그리드에 고정
-        for y, row in enumerate(self.current_piece['shape']):
-            for x, cell in enumerate(row):
-                if cell:
-                    pos_x = self.current_piece['x'] + x
-                    pos_y = self.current_piece['y'] + y
-                    if 0 <= pos_y < GRID_HEIGHT and 0 <= pos_x < GRID_WIDTH:
-                        self.grid[pos_y][pos_x] = self.current_piece['color']
-        
-        # 완성된 줄 확인
-        self.lines_to_clear = []
-        for y in range(GRID_HEIGHT - 1, -1, -1):
-            if all(self.grid[y]):
-                self.lines_to_clear.append(y)
-        
-        # 완성된 줄이 있으면 효과 시작
-        if self.lines_to_clear:
-            self.clear_effect_time = time.time()
-            
-            # 파티클 효과 생성
-            for y in self.lines_to_clear:
-                for x in range(GRID_WIDTH):
-                    color = self.grid[y][x]
-                    center_x = x * CELL_SIZE + CELL_SIZE // 2
-                    center_y = y * CELL_SIZE + CELL_SIZE // 2
-                    
-                    # 각 블록마다 여러 파티클 생성
-                    for _ in range(10):
-                        self.particles.append(Particle(center_x, center_y, color))
-            
-            # 다음 테트리미노는 효과가 끝난 후에 설정됨
-        else:
-            # 완성된 줄이 없으면 바로 다음 테트리미노 설정
-            self.current_piece = self.next_piece
-            self.next_piece = self.new_piece()
-            
-            # 게임 오버 확인
-            if not self.valid_position(self.current_piece):
-                self.game_over = True
 
-    def draw_grid(self):
-        # 그리드 그리기 (격자만 그림)
-        for x in range(GRID_WIDTH + 1):
+    def apply_action(self, action):
+        # 키 입력 또는 AI 입력을 기록하고 엔진에 전달 (효과 중 입력은 엔진에서 무시됨)
+        if self.recorder:
+            self.recorder.record(self.engine, action)
+        self.spawn_clear_particles(self.engine.apply(action))
+
+    def spawn_clear_particles(self, rows):
+        # 화면에 보이는 가득 찬 줄의 블록마다 파티클 효과 생성
+        grid = self.engine.grid
+        viewport = self.viewport
+        origin_x, origin_y = self.view_origin()
+        for y in rows:
+            if y not in viewport.visible_rows():
+                continue
+            row = grid[y]
+            for x in viewport.visible_cols():
+                color = row[x]
+                center_x = origin_x + x * CELL_SIZE + CELL_SIZE // 2
+                center_y = origin_y + y * CELL_SIZE + CELL_SIZE // 2
+                
+                # 각 블록마다 여러 파티클 생성
+                self.particles.emit(center_x, center_y, color, 10)
+
+    def view_origin(self):
+        # 보드 (0, 0) 칸의 화면 좌표 (뷰포트만큼 이동)
+        return GRID_X - self.viewport.x * CELL_SIZE, GRID_Y - self.viewport.y * CELL_SIZE
+
+    def update_viewport(self):
+        # 조각을 조작할 수 있는 동안 뷰포트가 현재 조각을 따라감 (효과 중에는 고정)
+        engine = self.engine
+        if engine.accepts_input():
+            piece = engine.current_piece
+            self.viewport.follow(piece, engine.drop_position(piece))
+
+    def cached_text(self, slot, font, text):
+        # 슬롯마다 마지막으로 렌더링한 글자를 기억하고 값이 바뀔 때만 다시 렌더링
+        cached = self.text_cache.get(slot)
+        if cached is None or cached[0] != text:
+            cached = (text, font.render(text, True, WHITE))
+            self.text_cache[slot] = cached
+        return cached[1]
+
+    def draw_grid(self, surface):
+        # 그리드 그리기 (격자만 그림, 뷰포트는 칸 단위로 움직이므로 보이는 칸 수만큼)
+        cols = self.viewport.cols
+        rows = self.viewport.rows
+        for x in range(cols + 1):
             pygame.draw.line(
-                self.buffer,
+                surface,
                 DARK_GRAY,
                 (GRID_X + x * CELL_SIZE, GRID_Y),
-                (GRID_X + x * CELL_SIZE, GRID_Y + GRID_HEIGHT * CELL_SIZE),
+                (GRID_X + x * CELL_SIZE, GRID_Y + rows * CELL_SIZE),
                 1
             )
-        for y in range(GRID_HEIGHT + 1):
+        for y in range(rows + 1):
             pygame.draw.line(
-                self.buffer,
+                surface,
                 DARK_GRAY,
                 (GRID_X, GRID_Y + y * CELL_SIZE),
-                (GRID_X + GRID_WIDTH * CELL_SIZE, GRID_Y + y * CELL_SIZE),
+                (GRID_X + cols * CELL_SIZE, GRID_Y + y * CELL_SIZE),
                 1
             )
 
     def draw_blocks(self):
-        # 고정된 블록 그리기
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                if self.grid[y][x] != 0:
-                    color = self.grid[y][x]  # 그리드에 저장된 색상 사용
+        # 고정된 블록 그리기 (보이는 덩어리 서피스를 한 번의 blits 호출로 그림)
+        # 줄 제거 효과 중인 줄은 덩어리에서 빼고 칸마다 그림
+        engine = self.engine
+        lines_to_clear = engine.lines_to_clear
+        origin_x, origin_y = self.view_origin()
+        blits = self.chunks.blits(engine.board, self.viewport, (origin_x, origin_y), lines_to_clear)
+        if not lines_to_clear:
+            self.buffer.blits(blits, doreturn=False)
+            return
+        
+        grid = engine.grid
+        sprites = self.sprites
+        flash_state, expand = self.clear_effect_state()
+        visible_rows = self.viewport.visible_rows()
+        visible_cols = self.viewport.visible_cols()
+        for y in sorted(lines_to_clear):
+            if y not in visible_rows:
+                continue
+            pos_y = origin_y + y * CELL_SIZE
+            row = grid[y]
+            for x in visible_cols:
+                color = row[x]
+                if color == 0:
+                    continue
+                pos_x = origin_x + x * CELL_SIZE
+                
+                # 줄 제거 효과 (깜빡임)
+                if flash_state == 0:
+                    # 블록 확대 효과
+                    blits.append((sprites.tile(color, CELL_SIZE + expand),
+                                  (pos_x - expand // 2, pos_y - expand // 2)))
                     
-                    # 줄 제거 효과 (깜빡임)
-                    if self.lines_to_clear and y in self.lines_to_clear:
-                        effect_progress = (time.time() - self.clear_effect_time) / self.clear_effect_duration
-                        flash_count = 5  # 깜빡임 횟수
-                        flash_state = int(effect_progress * flash_count * 2) % 2
-                        
-                        if flash_state == 0:
-                            # 블록 확대 효과
-                            expand = int(CELL_SIZE * 0.2 * math.sin(effect_progress * math.pi))
-                            rect = pygame.Rect(
-                                GRID_X + x * CELL_SIZE - expand // 2,
-                                GRID_Y + y * CELL_SIZE - expand // 2,
-                                CELL_SIZE + expand,
-                                CELL_SIZE + expand
-                            )
-                            pygame.draw.rect(self.buffer, color, rect)
-                            
-                            # 블록 테두리
-                            pygame.draw.rect(self.buffer, WHITE, rect, 1)
-                            
-                            # 파티클 생성 (일정 간격으로)
-                            if random.random() < 0.1:
-                                particle_x = GRID_X + x * CELL_SIZE + CELL_SIZE // 2
-                                particle_y = GRID_Y + y * CELL_SIZE + CELL_SIZE // 2
-                                self.particles.append(Particle(particle_x, particle_y, color))
-                        else:
-                            # 깜빡임 효과 - 흰색으로 변경
-                            rect = pygame.Rect(
-                                GRID_X + x * CELL_SIZE,
-                                GRID_Y + y * CELL_SIZE,
-                                CELL_SIZE,
-                                CELL_SIZE
-                            )
-                            pygame.draw.rect(self.buffer, WHITE, rect)
-                    else:
-                        # 일반 블록
-                        rect = pygame.Rect(
-                            GRID_X + x * CELL_SIZE,
-                            GRID_Y + y * CELL_SIZE,
-                            CELL_SIZE,
-                            CELL_SIZE
-                        )
-                        pygame.draw.rect(self.buffer, color, rect)
-                        pygame.draw.rect(self.buffer, WHITE, rect, 1)
+                    # 파티클 생성 (일정 간격으로)
+                    if random.random() < 0.1:
+                        self.particles.emit(pos_x + CELL_SIZE // 2, pos_y + CELL_SIZE // 2, color)
+                else:
+                    # 깜빡임 효과 - 흰색으로 변경
+                    blits.append((sprites.solid(WHITE), (pos_x, pos_y)))
+
+            # 확대된 블록이 바로 아래 줄 블록을 덮지 않도록 그 줄을 다시 그림 (칸 순서대로 그릴 때와 같은 겹침)
+            below = y + 1
+            if flash_state == 0 and expand and below in visible_rows and below not in lines_to_clear:
+                row = grid[below]
+                blits.extend(
+                    (sprites.tile(row[x]), (origin_x + x * CELL_SIZE, pos_y + CELL_SIZE))
+                    for x in visible_cols if row[x]
+                )
+
+        self.buffer.blits(blits, doreturn=False)
+
+    def shape_blits(self, shape, color, origin_x, origin_y):
+        # 모양의 칸마다 (타일, 위치) 목록
+        tile = self.sprites.tile(color)
+        return [
+            (tile, (origin_x + x * CELL_SIZE, origin_y + y * CELL_SIZE))
+            for y, row in enumerate(shape)
+            for x, cell in enumerate(row)
+            if cell
+        ]
+
+    def clear_effect_state(self):
+        # 줄 제거 효과의 (깜빡임 상태, 확대 크기)
+        effect_progress = self.engine.clear_effect_progress(self.tick_alpha)
+        flash_count = 5  # 깜빡임 횟수
+        flash_state = int(effect_progress * flash_count * 2) % 2
+        expand = int(CELL_SIZE * 0.2 * math.sin(effect_progress * math.pi))
+        return flash_state, expand
 
     def draw_piece(self, piece, offset_x=0, offset_y=0):
         # 테트리미노 그리기
-        shape = piece['shape']
-        color = piece['color']  # 이미 색상 튜플이므로 인덱싱 제거
-        
-        for y in range(len(shape)):
-            for x in range(len(shape[y])):
-                if shape[y][x]:
-                    rect = pygame.Rect(
-                        GRID_X + (piece['x'] + x) * CELL_SIZE + offset_x,  # 위치 계산 수정
-                        GRID_Y + (piece['y'] + y) * CELL_SIZE + offset_y,  # 위치 계산 수정
-                        CELL_SIZE,
-                        CELL_SIZE
-                    )
-                    pygame.draw.rect(self.buffer, color, rect)
-                    pygame.draw.rect(self.buffer, WHITE, rect, 1)
+        origin_x, origin_y = self.view_origin()
+        self.buffer.blits(self.shape_blits(
+            piece['shape'],
+            piece['color'],
+            origin_x + piece['x'] * CELL_SIZE + offset_x,
+            origin_y + piece['y'] * CELL_SIZE + offset_y
+        ), doreturn=False)
+
+    def draw_ghost_piece(self, piece):
+        # 현재 조각이 떨어질 위치를 반투명하게 표시 (착지 위치는 보드가 바뀔 때까지 엔진에 캐시됨)
+        ghost_y = self.engine.drop_position(piece)
+        if ghost_y == piece['y']:
+            return
+        tile = self.sprites.trail(piece['color'], GHOST_ALPHA)
+        view_x, view_y = self.view_origin()
+        origin_x = view_x + piece['x'] * CELL_SIZE
+        origin_y = view_y + ghost_y * CELL_SIZE
+        self.buffer.blits([
+            (tile, (origin_x + x * CELL_SIZE, origin_y + y * CELL_SIZE))
+            for y, row in enumerate(piece['shape'])
+            for x, cell in enumerate(row)
+            if cell
+        ], doreturn=False)
 
     def draw_next_piece(self):
-        # 다음 테트리미노 표시
-        next_piece = self.next_piece
+        # 다음 테트리미노 표시 (중앙에 배치)
+        next_piece = self.engine.next_piece
         shape = next_piece['shape']
-        color = next_piece['color']  # 이미 색상 튜플이므로 인덱싱 제거
-        
+        offset_x = (6 - len(shape[0])) // 2
+        offset_y = (6 - len(shape)) // 2
+        self.buffer.blits(self.shape_blits(
+            shape,
+            next_piece['color'],
+            self.panel_x + offset_x * CELL_SIZE,
+            GRID_Y + offset_y * CELL_SIZE
+        ), doreturn=False)
+
+    def draw_panel_frame(self, surface):
         # 다음 조각 영역 배경
         next_area = pygame.Rect(
-            GRID_X + GRID_WIDTH * CELL_SIZE + 20,
+            self.panel_x,
             GRID_Y,
             6 * CELL_SIZE,
             6 * CELL_SIZE
         )
-        pygame.draw.rect(self.buffer, BLACK, next_area)
-        pygame.draw.rect(self.buffer, WHITE, next_area, 1)
-        
-        # 다음 조각 텍스트
-        next_text = self.font.render("다음", True, WHITE)
-        self.buffer.blit(
-            next_text,
-            (GRID_X + GRID_WIDTH * CELL_SIZE + 20 + (6 * CELL_SIZE - next_text.get_width()) // 2,
-             GRID_Y - 40)
-        )
-        
-        # 다음 조각 그리기
-        for y in range(len(shape)):
-            for x in range(len(shape[y])):
-                if shape[y][x]:
-                    # 중앙에 배치하기 위한 오프셋 계산
-                    offset_x = (6 - len(shape[0])) // 2
-                    offset_y = (6 - len(shape)) // 2
-                    
-                    rect = pygame.Rect(
-                        GRID_X + GRID_WIDTH * CELL_SIZE + 20 + (offset_x + x) * CELL_SIZE,
-                        GRID_Y + (offset_y + y) * CELL_SIZE,
-                        CELL_SIZE,
-                        CELL_SIZE
-                    )
-                    pygame.draw.rect(self.buffer, color, rect)
-                    pygame.draw.rect(self.buffer, WHITE, rect, 1)
+        pygame.draw.rect(surface, BLACK, next_area)
+        pygame.draw.rect(surface, WHITE, next_area, 1)
 
     def draw_info(self):
         # 게임 정보 표시
-        info_x = GRID_X + GRID_WIDTH * CELL_SIZE + 20
+        info_x = self.panel_x
         info_y = GRID_Y + 6 * CELL_SIZE + 20
         
         # 점수
-        score_text = self.font.render(f"점수: {self.score}", True, WHITE)
+        score_text = self.cached_text('score', self.font, f"점수: {self.engine.score}")
         self.buffer.blit(score_text, (info_x, info_y))
         
         # 레벨
-        level_text = self.font.render(f"레벨: {self.level}", True, WHITE)
+        level_text = self.cached_text('level', self.font, f"레벨: {self.engine.level}")
         self.buffer.blit(level_text, (info_x, info_y + 40))
         
         # 지운 줄 수
-        lines_text = self.font.render(f"줄: {self.lines_cleared}", True, WHITE)
+        lines_text = self.cached_text('lines', self.font, f"줄: {self.engine.lines_cleared}")
         self.buffer.blit(lines_text, (info_x, info_y + 80))
 
     def draw_game_over(self):
         # 게임 오버 메시지
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        self.buffer.blit(overlay, (0, 0))
+        self.buffer.blit(self.game_over_overlay, (0, 0))
         
-        game_over_text = self.game_over_font.render("GAME OVER", True, WHITE)
-        restart_text = self.font.render("R 키를 눌러 재시작", True, WHITE)
+        game_over_text = self.cached_text('game_over', self.game_over_font, "GAME OVER")
+        restart_text = self.cached_text('restart', self.font, "R 키를 눌러 재시작")
         
         self.buffer.blit(
             game_over_text,
-            (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2,
-             SCREEN_HEIGHT // 2 - game_over_text.get_height() // 2 - 30)
+            (self.screen_width // 2 - game_over_text.get_width() // 2,
+             self.screen_height // 2 - game_over_text.get_height() // 2 - 30)
         )
         
         self.buffer.blit(
             restart_text,
-            (SCREEN_WIDTH // 2 - restart_text.get_width() // 2,
-             SCREEN_HEIGHT // 2 + game_over_text.get_height() // 2)
+            (self.screen_width // 2 - restart_text.get_width() // 2,
+             self.screen_height // 2 + game_over_text.get_height() // 2)
         )
 
+    def draw_pause_screen(self):
+        # 일시정지 메시지
+        self.buffer.blit(self.game_over_overlay, (0, 0))
+        pause_text = self.cached_text('pause', self.title_font, "일시정지")
+        resume_text = self.cached_text('resume', self.font, "P 키를 눌러 계속")
+        self.buffer.blit(pause_text, (self.screen_width // 2 - pause_text.get_width() // 2, self.screen_height // 2 - 60))
+        self.buffer.blit(resume_text, (self.screen_width // 2 - resume_text.get_width() // 2, self.screen_height // 2))
+
     def update_particles(self):
         # 파티클 업데이트
-        new_particles = []
-        for particle in self.particles:
-            if particle.update():
-                new_particles.append(particle)
-        self.particles = new_particles
+        self.particles.update()
 
     def draw_particles(self):
         # 파티클 그리기
-        for particle in self.particles:
-            particle.draw(self.buffer)
+        self.particles.draw(self.buffer)
 
     def draw_hard_drop_animation(self):
         # 하드 드롭 애니메이션 그리기
-        if not self.hard_drop_active:
+        engine = self.engine
+        if not engine.hard_drop_active:
             return
             
         # 애니메이션 진행 상태 계산 (0.0 ~ 1.0)
-        progress = min(1.0, (time.time() - self.hard_drop_start_time) / self.hard_drop_duration)
+        progress = engine.hard_drop_progress(self.tick_alpha)
         
         # 현재 Y 위치 계산 (시작 위치에서 끝 위치로 선형 보간)
-        current_y = self.hard_drop_start_y + (self.hard_drop_end_y - self.hard_drop_start_y) * progress
-        
-        # 애니메이션 중인 조각 그리기
-        piece_copy = self.hard_drop_piece.copy()
-        piece_copy['y'] = current_y
-        
-        # 그림자 효과 (반투명)
-        shape = piece_copy['shape']
-        color = piece_copy['color']  # 이미 색상 튜플이므로 인덱싱 제거
-        
-        for y in range(len(shape)):
-            for x in range(len(shape[y])):
-                if shape[y][x]:
-                    rect = pygame.Rect(
-                        GRID_X + (piece_copy['x'] + x) * CELL_SIZE,  # 위치 계산 수정
-                        GRID_Y + (piece_copy['y'] + y) * CELL_SIZE,  # 위치 계산 수정
-                        CELL_SIZE,
-                        CELL_SIZE
-                    )
-                    # 속도감을 위한 잔상 효과
-                    alpha = int(255 * (1 - progress * 0.5))
-                    shadow_color = (*color, alpha)
-                    
-                    # 반투명 사각형 그리기
-                    shadow_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                    pygame.draw.rect(shadow_surface, shadow_color, (0, 0, CELL_SIZE, CELL_SIZE))
-                    pygame.draw.rect(shadow_surface, (255, 255, 255, alpha), (0, 0, CELL_SIZE, CELL_SIZE), 1)
-                    self.buffer.blit(shadow_surface, rect)
+        current_y = self.hard_drop_y()
+        
+        # 애니메이션 중인 조각 그리기 (속도감을 위한 반투명 잔상 타일)
+        piece = engine.hard_drop_piece
+        alpha = int(255 * (1 - progress * 0.5))
+        tile = self.sprites.trail(piece['color'], alpha)
+        view_x, view_y = self.view_origin()
+        origin_x = view_x + piece['x'] * CELL_SIZE
+        self.buffer.blits([
+            (tile, (origin_x + x * CELL_SIZE, int(view_y + (current_y + y) * CELL_SIZE)))
+            for y, row in enumerate(piece['shape'])
+            for x, cell in enumerate(row)
+            if cell
+        ], doreturn=False)
+
+    def hard_drop_y(self):
+        # 하드 드롭 애니메이션 중인 조각의 현재 Y 위치 (시작 위치에서 끝 위치로 선형 보간)
+        engine = self.engine
+        progress = engine.hard_drop_progress(self.tick_alpha)
+        return engine.hard_drop_start_y + (engine.hard_drop_end_y - engine.hard_drop_start_y) * progress
 
     def draw_start_screen(self):
         # 시작 화면 그리기
         self.buffer.fill(BLACK)
-        title_text = self.title_font.render("BCAI 테트리스", True, WHITE)
-        start_text = self.font.render("시작하려면 스페이스바를 누르세요", True, WHITE)
+        title_text = self.cached_text('title', self.title_font, "BCAI 테트리스")
+        start_text = self.cached_text('start', self.font, "시작하려면 스페이스바를 누르세요")
+        
+        self.buffer.blit(title_text, (self.screen_width // 2 - title_text.get_width() // 2, self.screen_height // 2 - 100))
+        self.buffer.blit(start_text, (self.screen_width // 2 - start_text.get_width() // 2, self.screen_height // 2))
+
+    def enable_profiler(self):
+        # 프레임 프로파일러를 만들고 엔진 단계 측정도 연결
+        if not self.profiler:
+            self.profiler = FrameProfiler()
+            self.engine.profiler = self.profiler
+
+    def toggle_perf_overlay(self):
+        self.enable_profiler()
+        self.show_perf = not self.show_perf
+        if self.show_perf and not self.perf_font:
+            self.perf_font = self.default_fonts.get(22)
+
+    def refresh_perf_stats(self):
+        # 성능 오버레이 값은 PERF_REFRESH_FRAMES마다 갱신
+        if self.profiler.frames % PERF_REFRESH_FRAMES == 0:
+            self.perf_stats = self.profiler.frame_stats() + self.inputs.latency.stats()
+
+    def draw_perf_overlay(self):
+        # FPS, 프레임 시간 p50/p99, 입력 -> 화면 표시 지연 p50/p99, 파티클 수 표시
+        self.refresh_perf_stats()
+        fps, p50, p99, input_p50, input_p99 = self.perf_stats
+        self.buffer.blit(self.game_over_overlay, PERF_RECT.topleft, PERF_RECT.move(-PERF_RECT.x, -PERF_RECT.y))
+        lines = (
+            ('perf_fps', f"FPS {fps:.1f}"),
+            ('perf_frame', f"frame p50 {p50 * 1000:.2f} / p99 {p99 * 1000:.2f} ms"),
+            ('perf_input', f"input p50 {input_p50 * 1000:.2f} / p99 {input_p99 * 1000:.2f} ms"),
+            ('perf_particles', f"particles {len(self.particles)}"),
+        )
+        for i, (slot, text) in enumerate(lines):
+            self.buffer.blit(self.cached_text(slot, self.perf_font, text), (PERF_RECT.x + 6, PERF_RECT.y + 5 + i * 20))
+
+    def compose_frame(self):
+        # 현재 상태를 버퍼에 그리기 (더티 렉트 모드에서는 클립 영역 안만 실제로 그려짐)
+        profiler = self.profiler
+        if self.show_start_screen:
+            self.draw_start_screen()
+            if profiler:
+                profiler.mark('draw_start_screen')
+        else:
+            self.compose_game(profiler)
+        
+        if self.show_perf:
+            self.draw_perf_overlay()
+            profiler.mark('draw_overlay')
+
+    def compose_game(self, profiler):
+        engine = self.engine
+        self.buffer.blit(self.static_layer, (0, 0))
+        
+        # 보드 내용은 보이는 보드 영역 안에만 그림 (덩어리와 조각이 패널로 넘치지 않게)
+        clip = self.buffer.get_clip()
+        self.buffer.set_clip(clip.clip(self.board_clip))
+        self.draw_blocks()
+        if profiler:
+            profiler.mark('draw_blocks')
+        
+        # 하드 드롭 애니메이션 또는 현재 조각 그리기
+        if engine.hard_drop_active:
+            self.draw_hard_drop_animation()
+        elif not engine.game_over and not engine.lines_to_clear:
+            self.draw_ghost_piece(engine.current_piece)
+            self.draw_piece(engine.current_piece)
+        self.buffer.set_clip(clip)
+        if profiler:
+            profiler.mark('draw_piece')
+        
+        # 다음 조각 및 게임 정보 그리기
+        self.draw_next_piece()
+        if profiler:
+            profiler.mark('draw_next_piece')
+        self.draw_info()
+        if profiler:
+            profiler.mark('draw_info')
+        self.draw_particles()
+        if profiler:
+            profiler.mark('draw_particles')
+        
+        # 게임 오버 화면
+        if engine.game_over:
+            self.draw_game_over()
+            if profiler:
+                profiler.mark('draw_game_over')
+        elif self.paused:
+            self.draw_pause_screen()
+            if profiler:
+                profiler.mark('draw_pause')
+
+    def cell_states(self):
+        # 보드 칸별 화면 상태 (이전 프레임과 비교해 바뀐 칸만 다시 그림)
+        engine = self.engine
+        states = {}
+        lines_to_clear = engine.lines_to_clear
+        effect = self.clear_effect_state() if lines_to_clear else None
+        grid = engine.grid
+        visible_cols = self.viewport.visible_cols()
+        for y in self.viewport.visible_rows():
+            clearing = lines_to_clear and y in lines_to_clear
+            row = grid[y]
+            for x in visible_cols:
+                color = row[x]
+                if color:
+                    states[(x, y)] = ('clear', color, effect) if clearing else color
+        
+        if not engine.hard_drop_active and not engine.game_over and not lines_to_clear:
+            piece = engine.current_piece
+            ghost_y = engine.drop_position(piece)
+            for y, row in enumerate(piece['shape']):
+                for x, cell in enumerate(row):
+                    if cell:
+                        states[(piece['x'] + x, ghost_y + y)] = ('ghost', piece['color'])
+            for y, row in enumerate(piece['shape']):
+                for x, cell in enumerate(row):
+                    if cell:
+                        states[(piece['x'] + x, piece['y'] + y)] = piece['color']
+        return states
+
+    def overlay_rect(self):
+        # 칸 단위로 맞지 않는 요소(하드 드롭 잔상, 파티클)를 덮는 영역
+        rects = []
+        engine = self.engine
+        if engine.hard_drop_active:
+            piece = engine.hard_drop_piece
+            origin_x, origin_y = self.view_origin()
+            rects.append(pygame.Rect(
+                origin_x + piece['x'] * CELL_SIZE - 1,
+                int(origin_y + self.hard_drop_y() * CELL_SIZE) - 1,
+                len(piece['shape'][0]) * CELL_SIZE + 2,
+                len(piece['shape']) * CELL_SIZE + 2
+            ))
+        particle_bounds = self.particles.bounds()
+        if particle_bounds:
+            rects.append(particle_bounds)
+        if not rects:
+            return None
+        return rects[0].unionall(rects[1:])
+
+    def collect_dirty_regions(self):
+        # 이전 프레임과 달라진 화면 영역 목록
+        engine = self.engine
+        screen_rect = self.buffer.get_rect()
+        # 성능 오버레이는 켜져 있는 동안 매 프레임, 끈 직후 한 번 다시 그림
+        perf = [PERF_RECT] if self.show_perf or self.last_perf else []
+        self.last_perf = self.show_perf
+        mode = ('start' if self.show_start_screen else 'game_over' if engine.game_over else
+                'paused' if self.paused else 'play')
+        view = (self.viewport.x, self.viewport.y)
+        if mode != self.last_mode or view != self.last_view:
+            # 화면 모드가 바뀌거나 뷰포트가 움직이면 전체를 다시 그림
+            self.last_mode = mode
+            self.last_view = view
+            self.last_cells = {} if self.show_start_screen else self.cell_states()
+            self.last_panel = None
+            return [screen_rect]
+        if self.show_start_screen:
+            return perf
+        
+        regions = perf
+        cells = self.cell_states()
+        last_cells = self.last_cells
+        origin_x, origin_y = self.view_origin()
+        for key in cells.keys() | last_cells.keys():
+            state = cells.get(key)
+            last_state = last_cells.get(key)
+            if state != last_state:
+                rect = pygame.Rect(origin_x + key[0] * CELL_SIZE, origin_y + key[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+                if 'clear' in (state and state[0], last_state and last_state[0]):
+                    # 줄 제거 효과로 확대된 블록
+                    rect.inflate_ip(CELL_SIZE // 2, CELL_SIZE // 2)
+                regions.append(rect)
+        self.last_cells = cells
         
-        self.buffer.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, SCREEN_HEIGHT // 2 - 100))
-        self.buffer.blit(start_text, (SCREEN_WIDTH // 2 - start_text.get_width() // 2, SCREEN_HEIGHT // 2))
+        for rect in (self.overlay_rect(), self.last_overlay):
+            if rect:
+                regions.append(rect)
+        
+        next_piece = engine.next_piece
+        panel = (next_piece['kind'], next_piece['rotation'], engine.score, engine.level, engine.lines_cleared)
+        if panel != self.last_panel:
+            regions.append(self.panel_rect)
+            self.last_panel = panel
+        
+        return [rect.clip(screen_rect) for rect in regions if rect.colliderect(screen_rect)]
+
+    def render(self):
+        # 버퍼를 화면에 그리기
+        profiler = self.profiler
+        if not self.show_start_screen:
+            self.update_viewport()
+        if self.gl:
+            # OpenGL은 매 프레임 전체를 다시 그림 (더티 렉트 모드 무시)
+            self.gl.render(self)
+            if not self.gl.context:
+                pygame.display.flip()
+            self.presented()
+            if profiler:
+                profiler.mark('present')
+            return
+        if not self.dirty_rects:
+            self.buffer.fill(BLACK)
+            if profiler:
+                profiler.mark('prepare')
+            self.compose_frame()
+            self.screen.blit(self.buffer, (0, 0))
+            pygame.display.flip()
+            self.presented()
+            if profiler:
+                profiler.mark('present')
+            return
+        
+        regions = self.collect_dirty_regions()
+        if not regions:
+            if profiler:
+                profiler.mark('prepare')
+            return
+        area = regions[0].unionall(regions[1:])
+        self.buffer.set_clip(area)
+        self.buffer.fill(BLACK, area)
+        if profiler:
+            profiler.mark('prepare')
+        self.compose_frame()
+        self.buffer.set_clip(None)
+        # 그리는 중에 생긴 파티클까지 포함해 다음 프레임에 지울 영역 기록
+        self.last_overlay = None if self.show_start_screen else self.overlay_rect()
+        self.screen.blit(self.buffer, area, area)
+        pygame.display.update(regions)
+        self.presented()
+        if profiler:
+            profiler.mark('present')
+
+    def presented(self):
+        # 화면을 내보낸 직후: 적용된 입력의 결과가 처음 화면에 나간 시각 기록
+        latency = self.inputs.latency
+        if latency.pending:
+            latency.presented(time.perf_counter())
+
+    def idle_timeout(self):
+        # 화면이 멈춰 있으면(시작 화면, 일시정지, 파티클이 모두 사라진 게임 오버) 이벤트를 기다릴 시간
+        # (밀리초, 0은 입력이 올 때까지), 움직이는 화면이면 None
+        if self.show_start_screen or self.paused or (self.engine.game_over and not len(self.particles)):
+            return PERF_IDLE_TIMEOUT_MS if self.show_perf else 0
+        return None
+
+    def poll_events(self, scheduler):
+        # 멈춘 화면을 이미 그렸으면 입력이 올 때까지 잠들고, 아니면 다음 틱/그리기 시각까지 기다린 뒤 이벤트 수집
+        # 기다리는 중에 입력이 오면 바로 깨어나 처리 (1밀리초 미만 남으면 이벤트 대기 없이 잠듦)
+        # 이벤트에는 시각이 없으므로 이벤트를 꺼낸 시각을 입력 시각으로 씀 (self.events_time)
+        timeout = self.idle_timeout()
+        if timeout is None or not self.idle_frame_shown:
+            timeout = int(scheduler.delay() * 1000)
+            if timeout < 1:
+                scheduler.wait()
+                timeout = None
+        events = []
+        if timeout is not None:
+            event = pygame.event.wait(timeout)
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+        events += pygame.event.get()
+        self.events_time = time.perf_counter()
+        return events
+
+    def finish_startup(self):
+        # 첫 프레임을 화면에 내보낸 뒤 시작 단계별 시간 기록
+        self.startup.finish()
+        if self.startup_report:
+            self.startup.dump(self.startup_report)
 
     def run(self):
         # 게임 메인 루프
         running = True
+        scheduler = self.scheduler
         while running:
-            self.clock.tick(60)  # FPS 설정
+            profiler = self.profiler
+            if profiler:
+                profiler.begin_frame()
+            events = self.poll_events(scheduler)
+            if profiler:
+                profiler.mark('wait')
             
-            # 버퍼 초기화
-            self.buffer.fill(BLACK)
+            # 이번 프레임에 진행할 로직 틱 수 (멈춘 화면에서는 시간을 쌓지 않음)
+            ticks = scheduler.begin_frame(running=self.idle_timeout() is None)
             
             if self.show_start_screen:
-                # 시작 화면 표시
-                self.draw_start_screen()
-                
                 # 이벤트 처리
-                for event in pygame.event.get():
+                for event in events:
                     if event.type == pygame.QUIT:
                         running = False
                     elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                         self.show_start_screen = False
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                        self.toggle_perf_overlay()
+                if profiler:
+                    profiler.mark('events')
             else:
                 # 이벤트 처리
-                for event in pygame.event.get():
+                engine = self.engine
+                for event in events:
                     if event.type == pygame.QUIT:
                         running = False
-                    
-                    if not self.game_over and not self.lines_to_clear and not self.hard_drop_active:  # 효과 중에는 입력 무시
-                        if event.type == pygame.KEYDOWN:
-                            if event.key == pygame.K_LEFT:
-                                if self.valid_position(self.current_piece, x_offset=-1):
-                                    self.current_piece['x'] -= 1
-                            elif event.key == pygame.K_RIGHT:
-                                if self.valid_position(self.current_piece, x_offset=1):
-                                    self.current_piece['x'] += 1
-                            elif event.key == pygame.K_DOWN:
-                                if self.valid_position(self.current_piece, y_offset=1):
-                                    self.current_piece['y'] += 1
-                            elif event.key == pygame.K_UP:
-                                self.try_rotate()
-                            elif event.key == pygame.K_SPACE:
-                                # 하드 드롭 애니메이션 시작
-                                self.hard_drop_start_y = float(self.current_piece['y'])
-                                
-                                # 최종 위치 계산
-                                end_y = self.current_piece['y']
-                                while self.valid_position(self.current_piece, y_offset=1):
-                                    self.current_piece['y'] += 1
-                                    end_y = self.current_piece['y']
-                                
-                                # 원래 위치로 복원
-                                self.current_piece['y'] = int(self.hard_drop_start_y)
-                                
-                                # 하드 드롭 애니메이션 설정
-                                self.hard_drop_end_y = float(end_y)
-                                self.hard_drop_piece = self.current_piece.copy()
-                                self.hard_drop_piece['shape'] = [row[:] for row in self.current_piece['shape']]
-                                self.hard_drop_active = True
-                                self.hard_drop_start_time = time.time()
-                    else:
-                        if event.type == pygame.KEYDOWN and event.key == pygame.K_r and self.game_over:
+                    elif event.type == pygame.KEYUP and event.key in KEY_ACTIONS:
+                        self.inputs.release(KEY_ACTIONS[event.key])
+                    elif event.type == pygame.WINDOWFOCUSLOST:
+                        self.inputs.release_all()
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_p and not engine.game_over:
+                            self.paused = not self.paused
+                        elif event.key == pygame.K_F3:
+                            self.toggle_perf_overlay()
+                        elif self.paused:
+                            continue  # 일시정지 중에는 게임 입력 무시
+                        elif event.key in KEY_ACTIONS:
+                            self.inputs.press(KEY_ACTIONS[event.key], engine, self.events_time)
+                        elif event.key == pygame.K_r and engine.game_over:
                             self.reset_game()
-            
-                # 하드 드롭 애니메이션 처리
-                if not self.show_start_screen and self.hard_drop_active and time.time() - self.hard_drop_start_time > self.hard_drop_duration:
-                    self.hard_drop_active = False
-                    # 최종 위치로 이동
-                    self.current_piece['y'] = int(self.hard_drop_end_y)
-                    self.lock_piece()
+                        elif event.key == pygame.K_a:
+                            self.bot = None if self.bot else TetrisBot()
                 
-                # 줄 제거 효과 처리
-                if not self.show_start_screen and self.lines_to_clear and time.time() - self.clear_effect_time > self.clear_effect_duration:
-                    # 효과 시간이 끝나면 줄 제거 및 점수 계산
-                    lines_cleared = len(self.lines_to_clear)
-                    
-                    # 줄 제거
-                    for y in sorted(self.lines_to_clear):
-                        for y2 in range(y, 0, -1):
-                            self.grid[y2] = self.grid[y2 - 1][:]
-                        self.grid[0] = [0] * GRID_WIDTH
-                    
-                    # 점수 계산
-                    self.score += [0, 100, 300, 500, 800][min(lines_cleared, 4)] * self.level
-                    self.lines_cleared += lines_cleared
-                    self.level = self.lines_cleared // 10 + 1
-                    self.fall_speed = max(0.05, 0.5 - (self.level - 1) * 0.05)
+                if profiler:
+                    profiler.mark('events')
+                
+                if self.paused:
+                    ticks = 0
+                for _ in range(ticks):
+                    # 눌린 키의 자동 반복과 효과 중에 모아 둔 입력 적용
+                    self.inputs.tick(engine)
+                    if profiler:
+                        profiler.mark('input')
                     
-                    # 다음 테트리미노 설정
-                    self.current_piece = self.next_piece
-                    self.next_piece = self.new_piece()
+                    # AI가 켜져 있으면 틱마다 입력 하나 선택
+                    if self.bot:
+                        self.apply_action(self.bot.next_action(engine))
+                        if profiler:
+                            profiler.mark('bot')
                     
-                    # 게임 오버 확인
-                    if not self.valid_position(self.current_piece):
-                        self.game_over = True
+                    # 게임 로직 한 틱 진행 (하드 드롭, 줄 제거, 자동 낙하)
+                    self.spawn_clear_particles(engine.step())
+                    if self.stream:
+                        self.stream.publish(engine)
+                        if profiler:
+                            profiler.mark('stream')
                     
-                    # 효과 종료
-                    self.lines_to_clear = []
-                
-                # 자동 낙하 (효과 중에는 낙하 중지)
-                if not self.show_start_screen and not self.game_over and not self.lines_to_clear and not self.hard_drop_active and time.time() - self.last_fall_time > self.fall_speed:
-                    if self.valid_position(self.current_piece, y_offset=1):
-                        self.current_piece['y'] += 1
-                    else:
-                        self.lock_piece()
-                    self.last_fall_time = time.time()
-                
-                # 파티클 업데이트
-                self.update_particles()
-                
-                # 그리기
-                self.draw_grid()
-                self.draw_blocks()
-                
-                # 하드 드롭 애니메이션 또는 현재 조각 그리기
-                if self.hard_drop_active:
-                    self.draw_hard_drop_animation()
-                elif not self.game_over and not self.lines_to_clear:
-                    self.draw_piece(self.current_piece)
-                
-                # 다음 조각 및 게임 정보 그리기
-                self.draw_next_piece()
-                self.draw_info()
-                self.draw_particles()
-                
-                # 게임 오버 화면
-                if self.game_over:
-                    self.draw_game_over()
+                    # 파티클 업데이트
+                    self.update_particles()
+                    if profiler:
+                        profiler.mark('update_particles')
             
-            # 버퍼를 화면에 그리기 (한 번에 업데이트)
-            self.screen.blit(self.buffer, (0, 0))
-            pygame.display.flip()
+            # 그리기 (속도 제한에 걸리거나 로직이 밀려 건너뛰는 프레임은 생략)
+            # 새로 적용한 키 입력이 있으면 다음 그리기 시각을 기다리지 않고 바로 그림
+            rendered = scheduler.should_render(urgent=bool(self.inputs.latency.pending))
+            if rendered:
+                self.tick_alpha = scheduler.alpha
+                self.render()
+                if not self.startup.done:
+                    self.finish_startup()
+            # 멈춘 화면을 다 그렸으면 다음 프레임부터 이벤트 대기
+            self.idle_frame_shown = rendered and self.idle_timeout() is not None
+            if profiler:
+                profiler.end_frame()
         
+        if self.profiler and self.profile_output:
+            self.profiler.dump(self.profile_output)
+        if self.input_latency_output:
+            self.inputs.latency.dump(self.input_latency_output)
+        if self.recorder:
+            self.recorder.close(self.engine)
+        if self.stream:
+            self.stream.close()
         pygame.quit()
 
 if __name__ == "__main__":
-    game = Tetris()
-    game.run() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="테트리스")
+    parser.add_argument('--dirty-rects', action='store_true', help="바뀐 영역만 다시 그리는 렌더링 모드")
+    parser.add_argument('--max-particles', type=int, default=2000, help="동시에 표시할 최대 파티클 수")
+    parser.add_argument('--profile', metavar='PATH', help="프레임 단계별 시간을 기록해 종료 시 저장 (.csv 또는 .json)")
+    parser.add_argument('--seed', type=int, help="조각 순서 시드 (지정하지 않으면 무작위)")
+    parser.add_argument('--record', metavar='PATH', help="시드와 입력을 기록할 파일 (replay.py로 재생)")
+    parser.add_argument('--render-fps', type=int, default=FPS, help="초당 최대 그리기 횟수 (0이면 제한 없음, 로직은 항상 60틱)")
+    parser.add_argument('--max-frame-skip', type=int, default=4, help="로직이 밀릴 때 연속으로 건너뛸 최대 그리기 횟수")
+    parser.add_argument('--stream', metavar='PATH', help="틱마다 게임 상태를 쓸 공유 메모리 파일 (예: /dev/shm/tetris.state)")
+    parser.add_argument('--startup-report', metavar='PATH', help="첫 프레임까지의 단계별 시작 시간을 저장할 JSON 파일")
+    parser.add_argument('--font-cache', default=FONT_CACHE_PATH, help="찾은 글꼴 경로를 저장할 캐시 파일")
+    parser.add_argument('--renderer', choices=('software', 'gl'), default='software', help="그리기 방식 (gl은 PyOpenGL 필요)")
+    parser.add_argument('--scale', type=float, default=1, help="OpenGL 렌더러의 화면 배율 (예: 2는 두 배 해상도)")
+    parser.add_argument('--board-width', type=int, default=GRID_WIDTH, help="보드 열 수 (최대 수백 열)")
+    parser.add_argument('--board-height', type=int, default=GRID_HEIGHT, help="보드 줄 수 (최대 수천 줄)")
+    parser.add_argument('--view-cols', type=int, default=VIEW_COLS, help="보드가 넓을 때 화면에 보이는 열 수")
+    parser.add_argument('--view-rows', type=int, default=VIEW_ROWS, help="보드가 높을 때 화면에 보이는 줄 수")
+    parser.add_argument('--das', type=int, default=DAS_MS, help="좌우 키를 누르고 있을 때 자동 반복까지의 지연 (밀리초)")
+    parser.add_argument('--arr', type=int, default=ARR_MS, help="자동 반복 간격 (밀리초, 0이면 벽까지 바로 이동)")
+    parser.add_argument('--soft-drop', type=int, default=SOFT_DROP_MS, help="아래쪽 키를 누르고 있을 때 내려가는 간격 (밀리초)")
+    parser.add_argument('--input-latency', metavar='PATH', help="입력에서 화면 표시까지의 지연을 기록해 종료 시 저장 (.csv 또는 .json)")
+    args = parser.parse_args()
+    
+    startup = StartupTimer(IMPORT_START, 'imports')
+    game = Tetris(dirty_rects=args.dirty_rects, max_particles=args.max_particles, profile_output=args.profile,
+                  seed=args.seed, record_path=args.record, render_fps=args.render_fps,
+                  max_frame_skip=args.max_frame_skip, stream_path=args.stream, startup=startup,
+                  startup_report=args.startup_report, font_cache=args.font_cache, renderer=args.renderer,
+                  scale=args.scale, board_width=args.board_width, board_height=args.board_height,
+                  view_cols=args.view_cols, view_rows=args.view_rows, das_ms=args.das, arr_ms=args.arr,
+                  soft_drop_ms=args.soft_drop, input_latency_output=args.input_latency)
+    game.run()
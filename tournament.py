@@ -0,0 +1,106 @@
+# 대량 자가 대전 평가 실행기
+# 시드가 정해진 게임들을 프로세스 풀에 나눠 실행하고 결과를 모아 요약한다.
+# 워커에는 시드 목록과 정책 이름만 보내고, 게임 결과만 묶음 단위로 돌려받는다.
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ai import TetrisBot
+from engine import TetrisEngine, play_game, random_policy
+
+# 이름으로 찾는 정책 목록 (워커로 객체를 피클하지 않기 위해)
+POLICIES = {
+    'random': random_policy,
+    'ai': TetrisBot(),
+    'ai-greedy': TetrisBot(lookahead=False),
+}
+
+
+def play_seeded_game(seed, policy, max_ticks=None):
+    # 시드 하나로 게임 한 판 진행 (조각 RNG와 정책 RNG 모두 시드에서 파생)
+    start = time.perf_counter()
+    engine = TetrisEngine(seed=seed, animations=False)
+    play_game(engine, policy, random.Random(seed), max_ticks)
+    return {
+        'seed': seed,
+        'score': engine.score,
+        'lines': engine.lines_cleared,
+        'level': engine.level,
+        'pieces': engine.pieces_placed,
+        'ticks': engine.tick,
+        'duration': time.perf_counter() - start,
+    }
+
+
+def play_batch(seeds, policy_name, max_ticks=None):
+    # 워커 프로세스에서 시드 묶음을 실행
+    policy = POLICIES[policy_name]
+    return [play_seeded_game(seed, policy, max_ticks) for seed in seeds]
+
+
+def summarize(results, elapsed):
+    scores = [r['score'] for r in results]
+    return {
+        'games': len(results),
+        'elapsed': elapsed,
+        'games_per_second': len(results) / elapsed if elapsed else 0.0,
+        'score_mean': statistics.fmean(scores) if scores else 0.0,
+        'score_median': statistics.median(scores) if scores else 0,
+        'score_max': max(scores, default=0),
+        'lines_mean': statistics.fmean(r['lines'] for r in results) if results else 0.0,
+        'level_max': max((r['level'] for r in results), default=0),
+        'pieces_total': sum(r['pieces'] for r in results),
+    }
+
+
+def run_tournament(games, policy_name='random', workers=None, batch_size=50, seed=0,
+                   max_ticks=None, on_batch=None):
+    # 게임을 batch_size 단위로 나눠 프로세스 풀에 제출하고 끝나는 대로 결과를 합침
+    seeds = list(range(seed, seed + games))
+    batches = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_batch, batch, policy_name, max_ticks) for batch in batches]
+        for future in as_completed(futures):
+            batch_results = future.result()
+            results.extend(batch_results)
+            if on_batch:
+                on_batch(batch_results, len(results))
+    results.sort(key=lambda r: r['seed'])
+    return results, summarize(results, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="테트리스 자가 대전 평가")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0, help="첫 게임 시드 (게임마다 1씩 증가)")
+    parser.add_argument('--max-ticks', type=int, default=None)
+    parser.add_argument('--output', help="게임별 결과와 요약을 저장할 JSON 파일")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    def report(batch_results, done):
+        if not args.quiet:
+            print(f"{done}/{args.games} games", flush=True)
+
+    results, summary = run_tournament(
+        args.games, args.policy, args.workers, args.batch_size, args.seed, args.max_ticks, report
+    )
+    for key, value in summary.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': summary, 'results': results}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# 큰 보드용 스크롤 뷰포트와 블록 덩어리 캐시
+# 보드가 화면보다 크면 현재 조각과 착지 위치가 보이도록 뷰포트를 옮기고 보이는 칸만 그린다.
+# 고정된 블록은 CHUNK_SIZE x CHUNK_SIZE 칸 단위 서피스에 미리 그려 두고 칸 코드가 바뀐 덩어리만 다시 그리므로
+# 프레임마다 드는 시간은 보드 크기가 아니라 보이는 영역의 크기에 비례한다.
+import pygame
+
+from board import CODE_TABLE
+from constants import BLACK
+
+# 덩어리 한 변의 칸 수
+CHUNK_SIZE = 16
+
+# 캐시에 남겨 두는 최대 덩어리 수 (넘으면 화면 밖 덩어리부터 버림)
+MAX_CHUNKS = 48
+
+
+class Viewport:
+    def __init__(self, board_width, board_height, cols, rows, margin=2):
+        # cols, rows: 화면에 보이는 칸 수 (보드보다 크면 보드 크기로 줄임)
+        # margin: 조각과 화면 가장자리 사이에 남기는 칸 수
+        self.board_width = board_width
+        self.board_height = board_height
+        self.cols = min(cols, board_width)
+        self.rows = min(rows, board_height)
+        self.margin = margin
+        self.x = 0
+        self.y = 0
+
+    def follow(self, piece, landing_y):
+        # 조각이 보이도록 뷰포트 이동, 세로로는 가능하면 착지 위치와 그 아래 쌓인 블록도 함께 보이게 함
+        # 가로로는 조각이 가장자리 margin칸 안으로 들어올 때만 움직임 (좌우 이동마다 화면이 흔들리지 않게)
+        height = len(piece['masks'])
+        width = len(piece['shape'][0])
+        margin = min(self.margin, max(0, (self.cols - width) // 2))
+        x = self.x
+        if piece['x'] - margin < x:
+            x = piece['x'] - margin
+        elif piece['x'] + width + margin > x + self.cols:
+            x = piece['x'] + width + margin - self.cols
+
+        y = landing_y + height + max(self.margin, self.rows // 4) - self.rows
+        if piece['y'] - self.margin < y:
+            y = piece['y'] - self.margin
+
+        self.x = max(0, min(x, self.board_width - self.cols))
+        self.y = max(0, min(y, self.board_height - self.rows))
+
+    def center(self, piece, landing_y):
+        # 새 게임: 조각을 가로 가운데에 두고 따라가기 시작
+        self.x = piece['x'] + len(piece['shape'][0]) // 2 - self.cols // 2
+        self.follow(piece, landing_y)
+
+    def visible_rows(self):
+        return range(self.y, self.y + self.rows)
+
+    def visible_cols(self):
+        return range(self.x, self.x + self.cols)
+
+
+class ChunkCache:
+    def __init__(self, sprites, cell_size):
+        # sprites: sprites.BlockSprites (덩어리 안의 블록 타일)
+        self.sprites = sprites
+        self.cell_size = cell_size
+        self.chunks = {}  # (덩어리 열, 덩어리 줄) -> (칸 코드, 서피스 또는 빈 덩어리면 None)
+        self.state = None
+        self.checked = set()  # 지금 보드 상태에서 이미 확인한 덩어리
+
+    def blits(self, board, viewport, origin, skip_rows=()):
+        # 보이는 덩어리의 (서피스, 위치) 목록, origin: 보드 (0, 0) 칸의 화면 좌표
+        # skip_rows의 줄은 빈 줄로 그림 (줄 제거 효과는 호출하는 쪽에서 칸마다 그림)
+        # 새 게임이나 복원으로 보드 객체가 바뀌면 버전이 다시 작아질 수 있으므로 보드 객체도 함께 비교
+        state = (board, board.version, tuple(skip_rows))
+        if state != self.state:
+            self.state = state
+            self.checked.clear()
+        span = CHUNK_SIZE * self.cell_size
+        origin_x, origin_y = origin
+        blits = []
+        for cy in range(viewport.y // CHUNK_SIZE, (viewport.y + viewport.rows - 1) // CHUNK_SIZE + 1):
+            for cx in range(viewport.x // CHUNK_SIZE, (viewport.x + viewport.cols - 1) // CHUNK_SIZE + 1):
+                surface = self.chunk(board, cx, cy, skip_rows)
+                if surface:
+                    blits.append((surface, (origin_x + cx * span, origin_y + cy * span)))
+        if len(self.chunks) > MAX_CHUNKS:
+            for key in [key for key in self.chunks if key not in self.checked]:
+                del self.chunks[key]
+        return blits
+
+    def chunk(self, board, cx, cy, skip_rows):
+        # 덩어리 서피스 (보드가 바뀐 뒤 처음 볼 때 칸 코드를 비교해 달라졌으면 다시 그림)
+        key = (cx, cy)
+        if key in self.checked:
+            return self.chunks[key][1]
+        self.checked.add(key)
+        x0 = cx * CHUNK_SIZE
+        x1 = min(x0 + CHUNK_SIZE, board.width)
+        y0 = cy * CHUNK_SIZE
+        y1 = min(y0 + CHUNK_SIZE, board.height)
+        blank = bytes(x1 - x0)
+        codes = b''.join(blank if y in skip_rows else board.row_codes(y)[x0:x1] for y in range(y0, y1))
+        cached = self.chunks.get(key)
+        if cached and cached[0] == codes:
+            return cached[1]
+        surface = self.render(codes, x1 - x0, y1 - y0) if codes.strip(b'\0') else None
+        self.chunks[key] = (codes, surface)
+        return surface
+
+    def render(self, codes, cols, rows):
+        # 블록만 덩어리 서피스에 그림, 빈 칸은 투명(색상 키)이라 아래의 격자가 보이고
+        # RLE 가속으로 복사할 때 빈 칸을 건너뜀 (복사하는 픽셀 수는 칸마다 그릴 때와 같음)
+        cell = self.cell_size
+        surface = pygame.Surface((cols * cell, rows * cell)).convert()
+        surface.fill(BLACK)
+        tile = self.sprites.tile
+        surface.blits([
+            (tile(CODE_TABLE[code]), ((i % cols) * cell, (i // cols) * cell))
+            for i, code in enumerate(codes)
+            if code
+        ], doreturn=False)
+        surface.set_colorkey(BLACK, pygame.RLEACCEL)
+        return surface